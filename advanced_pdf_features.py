@@ -1,8 +1,104 @@
+import re
+import time
 import PyPDF2
 import pdfplumber
+from io import BytesIO
 from pathlib import Path
 
 
+# Page profiling works on the raw content stream (no text extraction or
+# layout analysis), so it costs a few milliseconds per page
+_TEXT_OPS = re.compile(rb'T[jJ]\s')
+_RULE_OPS = re.compile(rb'\s(?:re|l)\s')
+_CURVE_OPS = re.compile(rb'\s[cvy]\s')
+
+
+def _page_profile(page):
+    """Count text operators, straight rules and images on one page"""
+    contents = page.get('/Contents')
+    data = b""
+    if contents is not None:
+        contents = contents.get_object()
+        if isinstance(contents, PyPDF2.generic.ArrayObject):
+            data = b"\n".join(c.get_object().get_data() for c in contents)
+        else:
+            data = contents.get_data()
+
+    images = 0
+    resources = page.get('/Resources')
+    if resources is not None:
+        xobjects = resources.get_object().get('/XObject')
+        if xobjects is not None:
+            xobjects = xobjects.get_object()
+            images = sum(
+                1 for name in xobjects
+                if xobjects[name].get_object().get('/Subtype') == '/Image'
+            )
+
+    return {
+        'text_ops': len(_TEXT_OPS.findall(data)),
+        # Rules that aren't part of curved drawings (logos, charts)
+        'rule_ops': len(_RULE_OPS.findall(data)) - len(_CURVE_OPS.findall(data)),
+        'images': images
+    }
+
+
+def choose_pdf_strategy(source, sample_pages=3, min_text_ops=5, table_rule_ops=80):
+    """
+    Cheap pre-pass that picks one extractor for the whole document
+
+    Profiles a few evenly spaced pages instead of extracting everything
+    twice: table-heavy and scanned/sparse PDFs go straight to pdfplumber,
+    normal text PDFs use the faster PyPDF2.
+
+    Args:
+        source: PDF path or raw bytes
+        sample_pages: Number of pages to look at
+        min_text_ops: Text operators per page below which the text layer
+                      is considered too weak for PyPDF2
+        table_rule_ops: Straight rules per page that indicate a table
+
+    Returns:
+        Dict with parser ('pypdf2' / 'pdfplumber'), kind
+        ('text' / 'tables' / 'scanned' / 'sparse' / 'unreadable'),
+        pages and the seconds the pre-pass took
+    """
+    start = time.time()
+
+    def result(parser, kind, pages=0):
+        return {
+            'parser': parser,
+            'kind': kind,
+            'pages': pages,
+            'seconds': round(time.time() - start, 3)
+        }
+
+    try:
+        stream = BytesIO(source) if isinstance(source, (bytes, bytearray)) else open(source, 'rb')
+        with stream:
+            reader = PyPDF2.PdfReader(stream)
+            n_pages = len(reader.pages)
+            if n_pages == 0:
+                return result('pypdf2', 'text')
+
+            # Evenly spaced pages: first, ..., last
+            k = min(sample_pages, n_pages)
+            sample = sorted({round(i * (n_pages - 1) / max(k - 1, 1)) for i in range(k)})
+            profiles = [_page_profile(reader.pages[i]) for i in sample]
+    except Exception:
+        return result('pdfplumber', 'unreadable')
+
+    table_pages = sum(1 for p in profiles if p['rule_ops'] >= table_rule_ops)
+    avg_text_ops = sum(p['text_ops'] for p in profiles) / len(profiles)
+    image_pages = sum(1 for p in profiles if p['images'])
+
+    if table_pages * 2 >= len(profiles):
+        return result('pdfplumber', 'tables', n_pages)
+    if avg_text_ops < min_text_ops:
+        return result('pdfplumber', 'scanned' if image_pages else 'sparse', n_pages)
+    return result('pypdf2', 'text', n_pages)
+
+
 def analyze_pdf(pdf_path):
     """Comprehensive PDF analysis"""
 
@@ -3,7 +3,7 @@ from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 import os
 from pathlib import Path
-import numpy as np
+from vector_index import MatrixVectorIndex
 
 # Load environment
 load_dotenv()
@@ -16,11 +16,7 @@ print("✅ Embedding model ready!\n")
 
 # Storage
 documents = {}  # filename -> content
-document_embeddings = {}  # filename -> embedding vector
-
-def cosine_similarity(vec1, vec2):
-    """Calculate similarity between two vectors"""
-    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+document_index = MatrixVectorIndex()  # filename -> normalized embedding (one matrix row)
 
 def read_file(filename):
     """Read a text file"""
@@ -50,7 +46,7 @@ def load_and_embed_documents():
             # Create embedding
             print(f"🔄 Processing: {file.name}")
             embedding = embedding_model.encode(content)
-            document_embeddings[file.name] = embedding
+            document_index.add(ids=[file.name], embeddings=[embedding])
             
             print(f"   ✅ Embedded into {len(embedding)} dimensions")
             print(f"   📊 Sample values: [{embedding[0]:.4f}, {embedding[1]:.4f}, {embedding[2]:.4f}, ...]")
@@ -69,14 +65,17 @@ def semantic_search(question, top_k=3):
     question_embedding = embedding_model.encode(question)
     print(f"   ✅ Question embedded into {len(question_embedding)} dimensions\n")
     
-    # Calculate similarity with each document
+    # Similarity with every document in one matrix product
     print(f"📊 Calculating similarity with each document:\n")
-    similarities = []
+    results = document_index.query(
+        query_embeddings=[question_embedding], n_results=document_index.count(), include=("distances",)
+    )
+    similarities = [
+        (filename, 1 - distance)
+        for filename, distance in zip(results['ids'][0], results['distances'][0])
+    ]
     
-    for filename, doc_embedding in document_embeddings.items():
-        similarity = cosine_similarity(question_embedding, doc_embedding)
-        similarities.append((filename, similarity))
-        
+    for filename, similarity in similarities:
         # Visual representation
         bar_length = int(similarity * 40)
         bar = "█" * bar_length + "░" * (40 - bar_length)
@@ -84,10 +83,7 @@ def semantic_search(question, top_k=3):
         print(f"   Similarity: {similarity:.4f} {bar}")
         print()
     
-    # Sort by similarity (highest first)
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    
-    # Return top K most relevant
+    # Already sorted by similarity (highest first) - return top K most relevant
     top_docs = similarities[:top_k]
     
     print("="*60)
@@ -8,14 +8,10 @@ from rank_bm25 import BM25Okapi
 from sentence_transformers import CrossEncoder
 import numpy as np
 
-import PyPDF2
-import pdfplumber
-from docx import Document as DocxDocument
-import email
-from email import policy
-import html2text
-from bs4 import BeautifulSoup
-import csv
+from universal_loader import UniversalDocumentLoader
+from embeddings import get_embedding_function
+from ingest_pipeline import IngestPipeline
+from file_manifest import FileManifest
 
 load_dotenv()
 groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
@@ -24,10 +20,16 @@ print("🔄 Initializing PAiKA with Re-Ranking...")
 chroma_client = chromadb.PersistentClient(path="./paika_rerank_db")
 print("✅ ChromaDB ready!")
 
+# Same embedding model (and settings) for indexing and questions
+embedder = get_embedding_function()
+
 print("🔄 Loading cross-encoder for re-ranking...")
 reranker_model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
 print("✅ Re-ranker ready!\n")
 
+# Skips unchanged files and replaces the chunks of changed ones
+manifest = FileManifest("./paika_rerank_db/ingest_manifest.json")
+
 collection = None
 bm25_index = None
 doc_ids_list = []
@@ -38,106 +40,16 @@ text_splitter = RecursiveCharacterTextSplitter(
     separators=["\n\n", "\n", ". ", " ", ""]
 )
 
-class UniversalDocumentLoader:
-
-    @staticmethod
-    def load_text(filepath):
-        try:
-            return open(filepath, "r", encoding="utf-8").read()
-        except:
-            return open(filepath, "r", encoding="latin-1").read()
-
-    @staticmethod
-    def load_pdf(filepath):
-        try:
-            with open(filepath, "rb") as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                if len(text.strip()) > 100:
-                    return text
-        except:
-            pass
-
-        with pdfplumber.open(filepath) as pdf:
-            text = ""
-            for page in pdf.pages:
-                if page.extract_text():
-                    text += page.extract_text() + "\n"
-            return text
-
-    @staticmethod
-    def load_docx(filepath):
-        doc = DocxDocument(filepath)
-        return "\n".join(p.text for p in doc.paragraphs)
-
-    @staticmethod
-    def load_eml(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            msg = email.message_from_file(f, policy=policy.default)
-
-        body = ""
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_type() == "text/plain":
-                    body = part.get_content()
-                    break
-        else:
-            body = msg.get_content()
-
-        return f"Email from {msg.get('From')} | Subject: {msg.get('Subject')}\n\n{body}"
-
-    @staticmethod
-    def load_csv(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            headers = reader.fieldnames
-            text_parts = [f"CSV: {Path(filepath).name}\nColumns: {', '.join(headers)}\n"]
-            for i, row in enumerate(reader, 1):
-                text_parts.append(
-                    f"Row {i}: " +
-                    ", ".join(f"{k}={v}" for k, v in row.items() if v)
-                )
-            return "\n".join(text_parts)
-
-    @staticmethod
-    def load_html(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            soup = BeautifulSoup(f.read(), "html.parser")
-
-        for tag in soup(["script", "style"]):
-            tag.decompose()
-
-        return soup.get_text()
-
-    @classmethod
-    def load(cls, filepath):
-        ext = Path(filepath).suffix.lower()
-        loaders = {
-            ".txt": cls.load_text,
-            ".md": cls.load_text,
-            ".pdf": cls.load_pdf,
-            ".docx": cls.load_docx,
-            ".eml": cls.load_eml,
-            ".csv": cls.load_csv,
-            ".html": cls.load_html,
-            ".htm": cls.load_html
-        }
-        if ext in loaders:
-            return loaders[ext](filepath), ext
-        else:
-            raise ValueError(f"Unsupported: {ext}")
-
 def get_or_create_collection():
     global collection
     try:
-        collection = chroma_client.get_collection("paika_rerank")
+        collection = chroma_client.get_collection("paika_rerank", embedding_function=embedder)
         print(f"📂 Found collection with {collection.count()} chunks\n")
     except:
         collection = chroma_client.create_collection(
             name="paika_rerank",
-            metadata={"description": "PAiKA with Re-Ranking"}
+            metadata={"description": "PAiKA with Re-Ranking"},
+            embedding_function=embedder
         )
         print("✅ Collection created!\n")
 
@@ -145,6 +57,7 @@ def build_bm25_index():
     global bm25_index, doc_ids_list
 
     if collection.count() == 0:
+        bm25_index, doc_ids_list = None, []
         return
 
     print("🔄 Building BM25 index...")
@@ -155,38 +68,27 @@ def build_bm25_index():
     print("✅ BM25 indexed!\n")
 
 def load_all_documents():
-    supported = [".txt", ".md", ".pdf", ".docx", ".eml", ".csv", ".html"]
+    supported = UniversalDocumentLoader.get_supported_formats()
     all_files = []
     for ext in supported:
         all_files.extend(list(Path(".").glob(f"*{ext}")))
 
+    # Parse in a process pool, chunk + embed in pipelined stages.
+    # The manifest skips unchanged files and replaces stale chunks
+    # (including those written before it existed).
+    pipeline = IngestPipeline(
+        collection, text_splitter, batch_size=embedder.batch_size,
+        embedding_function=embedder, manifest=manifest
+    )
+    pipeline.run(all_files)
+
+    if pipeline.counters['chunk'].items or pipeline.removed or pipeline.deleted:
+        build_bm25_index()
+
     if not all_files:
         print("⚠️ No files found!\n")
         return
-
-    all_chunks, all_ids, all_metadatas = [], [], []
-
-    for file in all_files:
-        try:
-            content, file_type = UniversalDocumentLoader.load(file)
-            chunks = text_splitter.split_text(content)
-
-            for i, chunk in enumerate(chunks):
-                all_chunks.append(chunk)
-                all_ids.append(f"{file.name}_chunk_{i}")
-                all_metadatas.append({
-                    "filename": file.name,
-                    "file_type": file_type,
-                    "chunk_index": i
-                })
-
-            print(f"✅ {file.name}: {len(chunks)} chunks")
-        except Exception as e:
-            print(f"❌ {file.name}: {e}")
-
-    if all_chunks:
-        collection.add(documents=all_chunks, ids=all_ids, metadatas=all_metadatas)
-        build_bm25_index()
+    pipeline.print_stats()
 
 def search_with_reranking(query, n_retrieve=20, n_final=5):
     if collection.count() == 0:
@@ -278,6 +180,7 @@ def main():
             print(ask_question_reranked(q))
         elif choice == "3":
             chroma_client.delete_collection("paika_rerank")
+            manifest.clear()
             get_or_create_collection()
         elif choice == "4":
             break
@@ -0,0 +1,258 @@
+"""
+Chunking strategy benchmark
+
+Runs every splitter configuration over the same corpus and reports
+chunking throughput, embedding time, on-disk index size, query latency
+and recall@k against a labeled question set.
+
+    python benchmark_chunking.py
+    python benchmark_chunking.py --corpus dl1.pdf notes/ --sizes 300 500 800 --overlaps 0 50
+    python benchmark_chunking.py --questions my_questions.json --json results.json
+
+A question counts as answered when one of the top-k chunks contains its
+"answer" text (whitespace/case-insensitive), so labels stay valid no
+matter how a strategy cuts the documents.
+"""
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from universal_loader import UniversalDocumentLoader
+from file_crawler import FileCrawler
+from chunking import StreamingChunker, chunk_blocks
+
+
+DEFAULT_CORPUS = [
+    "dl1.pdf", "ai_concepts.txt", "cooking_recipies.txt", "fitness_guide.txt",
+    "project_management.txt", "python_notes.txt", "test.txt"
+]
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+def build_splitters(sizes, overlaps, model_name):
+    """
+    All (name, splitter) configurations to compare
+
+    Overlaps are percentages of the chunk size for the character-based
+    splitters. LangChain splitters are skipped if it isn't installed,
+    its token splitter if tiktoken isn't.
+    """
+    configs = []
+
+    try:
+        from langchain_text_splitters import (
+            CharacterTextSplitter, RecursiveCharacterTextSplitter, TokenTextSplitter
+        )
+    except ImportError:
+        print("⚠️  langchain_text_splitters not installed - LangChain splitters skipped")
+        CharacterTextSplitter = RecursiveCharacterTextSplitter = TokenTextSplitter = None
+
+    # TokenTextSplitter needs tiktoken, which is only imported when one is built
+    if TokenTextSplitter is not None:
+        try:
+            TokenTextSplitter(chunk_size=100, chunk_overlap=0)
+        except ImportError:
+            print("⚠️  tiktoken not installed - LangChain token splitter skipped")
+            TokenTextSplitter = None
+
+    for size in sizes:
+        for overlap_pct in overlaps:
+            overlap = int(size * overlap_pct / 100)
+            suffix = f"{size}/{overlap}"
+
+            if CharacterTextSplitter is not None:
+                configs.append((f"Character {suffix}", CharacterTextSplitter(
+                    separator="\n", chunk_size=size, chunk_overlap=overlap
+                )))
+                configs.append((f"Recursive {suffix}", RecursiveCharacterTextSplitter(
+                    chunk_size=size, chunk_overlap=overlap
+                )))
+            if TokenTextSplitter is not None:
+                # ~4 characters per token
+                configs.append((f"Token {size // 4}/{overlap // 4}", TokenTextSplitter(
+                    chunk_size=size // 4, chunk_overlap=overlap // 4
+                )))
+            configs.append((f"Streaming {suffix}", StreamingChunker(size, overlap)))
+
+    try:
+        configs.append(("Streaming model-tokens", StreamingChunker.for_model(model_name)))
+    except Exception as e:
+        print(f"⚠️  Token-aware chunker skipped: {e}")
+
+    return configs
+
+
+def load_corpus(paths):
+    """Parse every file once: {path: [(text, metadata), ...]}"""
+    crawler = FileCrawler()
+    files = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files.extend(crawler.crawl(path))
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"⚠️  {path} not found - skipped")
+
+    corpus = {}
+    for path in files:
+        try:
+            blocks, _ = UniversalDocumentLoader.load_blocks(path)
+            corpus[str(path)] = list(blocks)
+        except Exception as e:
+            print(f"❌ {path.name}: {e}")
+    return corpus
+
+
+def benchmark_splitter(name, splitter, corpus, questions, model, k=5):
+    """Chunk, embed, index and query the corpus with one splitter"""
+    import chromadb
+
+    # Chunking
+    start = time.time()
+    chunks = []
+    for path, blocks in corpus.items():
+        for chunk, _ in chunk_blocks(iter(blocks), splitter):
+            if chunk.strip():
+                chunks.append((Path(path).name, chunk))
+    chunk_seconds = time.time() - start
+
+    # Embedding
+    texts = [c for _, c in chunks]
+    start = time.time()
+    embeddings = model.encode(texts, batch_size=64, show_progress_bar=False)
+    embed_seconds = time.time() - start
+
+    # Indexing (on disk, so the size is real)
+    db_dir = tempfile.mkdtemp(prefix="paika_bench_")
+    try:
+        client = chromadb.PersistentClient(path=db_dir)
+        collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+        ids = [f"c{i}" for i in range(len(chunks))]
+        for i in range(0, len(chunks), 1000):
+            collection.add(
+                ids=ids[i:i + 1000],
+                documents=texts[i:i + 1000],
+                embeddings=embeddings[i:i + 1000].tolist(),
+                metadatas=[{"filename": f} for f, _ in chunks[i:i + 1000]]
+            )
+        index_bytes = _dir_size(db_dir)
+
+        # Querying
+        hits = 0
+        latencies = []
+        for q in questions:
+            start = time.time()
+            query_embedding = model.encode([q["question"]], show_progress_bar=False)
+            results = collection.query(
+                query_embeddings=query_embedding.tolist(),
+                n_results=min(k, len(chunks))
+            )
+            latencies.append(time.time() - start)
+
+            answer = _normalize(q["answer"])
+            if any(answer in _normalize(doc) for doc in results["documents"][0]):
+                hits += 1
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+    lengths = [len(t) for t in texts] or [0]
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "avg_chars": round(float(np.mean(lengths)), 1),
+        "chunks_per_sec": round(len(chunks) / chunk_seconds, 1) if chunk_seconds > 0 else 0.0,
+        "embed_seconds": round(embed_seconds, 3),
+        "index_mb": round(index_bytes / (1024 * 1024), 2),
+        "query_ms": round(1000 * float(np.mean(latencies)), 2) if latencies else 0.0,
+        "query_p95_ms": round(1000 * float(np.percentile(latencies, 95)), 2) if latencies else 0.0,
+        f"recall@{k}": round(hits / len(questions), 3) if questions else 0.0
+    }
+
+
+def print_results(results, k):
+    recall_key = f"recall@{k}"
+    header = (f"{'Splitter':<26}{'chunks':>8}{'avg len':>9}{'chunks/s':>11}"
+              f"{'embed s':>9}{'index MB':>10}{'query ms':>10}{'p95 ms':>8}{recall_key:>11}")
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['splitter']:<26}{r['chunks']:>8}{r['avg_chars']:>9}{r['chunks_per_sec']:>11}"
+              f"{r['embed_seconds']:>9}{r['index_mb']:>10}{r['query_ms']:>10}"
+              f"{r['query_p95_ms']:>8}{r[recall_key]:>11}")
+
+    best = max(results, key=lambda r: (r[recall_key], -r["chunks"]))
+    print(f"\n🏆 Best recall@{k}: {best['splitter']} "
+          f"({best[recall_key]:.0%} with {best['chunks']} chunks)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunking strategies")
+    parser.add_argument("--corpus", nargs="+", default=DEFAULT_CORPUS,
+                        help="Files or folders to index")
+    parser.add_argument("--questions", default="benchmark_questions.json",
+                        help="JSON list of {question, answer} pairs")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[300, 500, 1000],
+                        help="Chunk sizes in characters")
+    parser.add_argument("--overlaps", nargs="+", type=int, default=[0, 10],
+                        help="Overlaps in percent of the chunk size")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Embedding model")
+    parser.add_argument("-k", type=int, default=5, help="Top-k for recall")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    print("=" * 60)
+    print("CHUNKING BENCHMARK")
+    print("=" * 60 + "\n")
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    corpus = load_corpus(args.corpus)
+    total_chars = sum(len(t) for blocks in corpus.values() for t, _ in blocks)
+    print(f"📚 {len(corpus)} documents, {total_chars} characters | "
+          f"❓ {len(questions)} questions\n")
+
+    model = SentenceTransformer(args.model)
+    splitters = build_splitters(args.sizes, args.overlaps, args.model)
+
+    results = []
+    for name, splitter in splitters:
+        print(f"🔄 {name}...")
+        results.append(benchmark_splitter(name, splitter, corpus, questions, model, args.k))
+
+    print_results(results, args.k)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
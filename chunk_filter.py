@@ -0,0 +1,270 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+# "Introduction ........ 12", "2.3 Training      45"
+_TOC_LINE = re.compile(r"(\.{3,}|…|\s{3,}|\t)\s*\d+\s*$")
+
+
+class ChunkQualityFilter:
+    """
+    Drops (or down-weights) low-information chunks before they are embedded
+
+    PDF extraction produces page numbers, tables of contents, running
+    headers/footers and whitespace fragments. Each would otherwise be
+    embedded and compete in search. Chunks are scored in batches with
+    cheap vectorized statistics:
+
+    - length:    too few non-whitespace characters
+    - alpha:     too few letters and digits (punctuation and symbol debris)
+    - entropy:   too few distinct characters ("-------", ". . . .")
+    - toc:       mostly "Title .... 12" lines
+    - repeated:  mostly lines seen on several other pages of the same
+                 document (running headers and footers). Pages are
+                 counted as the document streams by, so a running header
+                 is only caught from the repeat_pages-th page on; its
+                 first occurrences are kept.
+
+    Table chunks (CSV row batches, HTML/Markdown tables) and email
+    header blocks are always kept: numeric rows and address lines are
+    data, not debris. They are recognized by their block_type, which
+    (unlike the keep_whole flag) is still in the chunk metadata.
+
+    mode="drop" removes junk chunks; mode="downweight" keeps them with a
+    lower 'quality' in the metadata, which HybridSearchEngine multiplies
+    into the score.
+    """
+
+    REASONS = ('length', 'alpha', 'entropy', 'toc', 'repeated')
+
+    # block_type of chunks that are never filtered
+    KEPT_BLOCK_TYPES = ('table', 'headers')
+
+    def __init__(self, min_chars=25, min_alpha_ratio=0.4, min_entropy=3.0,
+                 max_toc_ratio=0.5, max_repeated_ratio=0.6, repeat_pages=3,
+                 mode="drop", downweight=0.3, batch_size=256, keep_examples=3):
+        """
+        Args:
+            min_chars: Min non-whitespace characters
+            min_alpha_ratio: Min share of letters and digits among
+                             non-whitespace characters
+            min_entropy: Min character entropy in bits (English prose is ~4)
+            max_toc_ratio: Max share of table-of-contents lines
+            max_repeated_ratio: Max share of characters in repeated lines
+            repeat_pages: Pages a line must appear on to count as repeated
+            mode: "drop" or "downweight"
+            downweight: 'quality' given to junk chunks in downweight mode
+            batch_size: Chunks scored per vectorized batch
+            keep_examples: Removed chunks kept per reason for the report
+        """
+        if mode not in ("drop", "downweight"):
+            raise ValueError("mode must be 'drop' or 'downweight'")
+
+        self.min_chars = min_chars
+        self.min_alpha_ratio = min_alpha_ratio
+        self.min_entropy = min_entropy
+        self.max_toc_ratio = max_toc_ratio
+        self.max_repeated_ratio = max_repeated_ratio
+        self.repeat_pages = repeat_pages
+        self.mode = mode
+        self.downweight = downweight
+        self.batch_size = batch_size
+        self.keep_examples = keep_examples
+
+        self.chunks_seen = 0
+        self.chars_seen = 0
+        self.chars_removed = 0
+        self.reasons = Counter()
+        self.examples = {}      # reason -> [(source, text), ...]
+
+    # ----- Scoring -----
+
+    @staticmethod
+    def char_stats(texts):
+        """
+        Vectorized per-text character statistics
+
+        Returns:
+            (non-whitespace chars, letter/digit ratio, entropy in bits) arrays
+        """
+        n = len(texts)
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n)
+        codes = np.frombuffer("".join(texts).encode('utf-32-le'), dtype=np.uint32)
+        owner = np.repeat(np.arange(n), lengths)
+
+        visible = ~np.isin(codes, (9, 10, 11, 12, 13, 32, 0xA0))
+        codes, owner = codes[visible], owner[visible]
+        chars = np.bincount(owner, minlength=n)
+
+        # ASCII letters and digits, plus everything above Latin-1 punctuation
+        folded = codes | 0x20
+        letters = ((folded >= 0x61) & (folded <= 0x7A)) | (codes >= 0xC0) | \
+            ((codes >= 0x30) & (codes <= 0x39))
+        alpha_ratio = np.bincount(owner, weights=letters, minlength=n) / np.maximum(chars, 1)
+
+        # Shannon entropy of each text's character distribution
+        _, pair_index, pair_counts = np.unique(
+            owner.astype(np.uint64) << np.uint64(32) | codes.astype(np.uint64),
+            return_index=True, return_counts=True
+        )
+        pair_owner = owner[pair_index]
+        p = pair_counts / np.maximum(chars[pair_owner], 1)
+        entropy = -np.bincount(pair_owner, weights=p * np.log2(p), minlength=n)
+
+        return chars, alpha_ratio, entropy
+
+    def score(self, texts, metadatas, line_pages):
+        """
+        Reason each chunk is junk (None if it is kept)
+
+        Args:
+            texts: Chunk texts
+            metadatas: Chunk metadatas ('page' enables the repetition check)
+            line_pages: {normalized line: set of pages} of the document so far
+        """
+        chars, alpha_ratio, entropy = self.char_stats(texts)
+
+        toc_ratio = np.zeros(len(texts))
+        repeated_ratio = np.zeros(len(texts))
+        chunk_lines = []
+        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+            lines = [line.strip() for line in text.splitlines() if line.strip()]
+            if lines:
+                toc_ratio[i] = sum(bool(_TOC_LINE.search(line)) for line in lines) / len(lines)
+
+            page = metadata.get('page')
+            normalized = []
+            if page is not None:
+                normalized = [_SPACES.sub(" ", _DIGITS.sub("#", line.lower())) for line in lines]
+                for line in normalized:
+                    line_pages.setdefault(line, set()).add(page)
+            chunk_lines.append(normalized)
+
+        for i, normalized in enumerate(chunk_lines):
+            if normalized:
+                total = sum(len(line) for line in normalized)
+                repeated = sum(
+                    len(line) for line in normalized
+                    if len(line_pages[line]) >= self.repeat_pages
+                )
+                repeated_ratio[i] = repeated / max(total, 1)
+
+        checks = [
+            ('length', chars < self.min_chars),
+            ('alpha', alpha_ratio < self.min_alpha_ratio),
+            ('entropy', entropy < self.min_entropy),
+            ('toc', toc_ratio > self.max_toc_ratio),
+            ('repeated', repeated_ratio > self.max_repeated_ratio),
+        ]
+        kept = np.array([
+            metadata.get('block_type') in self.KEPT_BLOCK_TYPES for metadata in metadatas
+        ], dtype=bool)
+
+        reasons = [None] * len(texts)
+        for reason, failed in checks:
+            for i in np.flatnonzero(failed & ~kept):
+                if reasons[i] is None:
+                    reasons[i] = reason
+        return reasons
+
+    # ----- Filtering -----
+
+    def apply(self, chunks, source=None):
+        """
+        Filter one document's (chunk_text, metadata) stream
+
+        Repetition is tracked per call, so pass one document at a time.
+
+        Yields:
+            (chunk_text, metadata) of the chunks that are kept
+        """
+        line_pages = {}
+        batch = []
+
+        def flush():
+            texts = [text for text, _ in batch]
+            metadatas = [metadata for _, metadata in batch]
+            for text, metadata, reason in zip(texts, metadatas, self.score(texts, metadatas, line_pages)):
+                self.chunks_seen += 1
+                self.chars_seen += len(text)
+                if reason is None:
+                    yield text, metadata
+                    continue
+
+                self.reasons[reason] += 1
+                examples = self.examples.setdefault(reason, [])
+                if len(examples) < self.keep_examples:
+                    examples.append((str(source) if source else "", text))
+
+                if self.mode == "downweight":
+                    yield text, {**metadata, 'quality': self.downweight, 'low_info': reason}
+                else:
+                    self.chars_removed += len(text)
+
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                yield from flush()
+                batch = []
+        if batch:
+            yield from flush()
+
+    # ----- Reporting -----
+
+    def get_stats(self):
+        flagged = sum(self.reasons.values())
+        return {
+            'chunks_seen': self.chunks_seen,
+            'low_info': flagged,
+            'low_info_pct': round(100 * flagged / self.chunks_seen, 1) if self.chunks_seen else 0.0,
+            'chars_removed': self.chars_removed,
+            'by_reason': dict(self.reasons)
+        }
+
+    def print_report(self):
+        stats = self.get_stats()
+        action = "dropped" if self.mode == "drop" else "down-weighted"
+        print(f"🧹 {stats['low_info']} of {stats['chunks_seen']} chunks {action} "
+              f"({stats['low_info_pct']}%, {stats['chars_removed']} chars not embedded)")
+        for reason in self.REASONS:
+            if not self.reasons[reason]:
+                continue
+            print(f"   {reason}: {self.reasons[reason]}")
+            for source, text in self.examples.get(reason, []):
+                preview = _SPACES.sub(" ", text)[:70]
+                print(f"      - {preview!r}" + (f" ({source})" if source else ""))
+
+
+# Test
+if __name__ == "__main__":
+    from pathlib import Path
+    from universal_loader import UniversalDocumentLoader
+    from chunking import StreamingChunker
+
+    print("=" * 60)
+    print("LOW-INFORMATION CHUNK FILTER TEST")
+    print("=" * 60 + "\n")
+
+    samples = [
+        ("12", {}),
+        ("   \n\t  ", {}),
+        ("Contents\n1 Introduction ........ 3\n2 Neural Networks ........ 7\n3 CNNs ........ 15", {}),
+        ("--------------------------------------------------", {}),
+        ("A recurrent neural network keeps a hidden state between time steps.", {}),
+    ]
+    chunk_filter = ChunkQualityFilter()
+    kept = list(chunk_filter.apply(samples, source="demo"))
+    print(f"Kept {len(kept)} of {len(samples)} samples: {kept[0][0][:40]}...\n")
+
+    pdf_files = list(Path('.').glob('*.pdf'))
+    if pdf_files:
+        chunker = StreamingChunker(300, 30)
+        blocks, _ = UniversalDocumentLoader.load_blocks(pdf_files[0])
+        chunk_filter = ChunkQualityFilter()
+        kept = sum(1 for _ in chunk_filter.apply(chunker.chunk_blocks(blocks), pdf_files[0].name))
+        print(f"📄 {pdf_files[0].name}: {kept} chunks kept")
+        chunk_filter.print_report()
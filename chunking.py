@@ -0,0 +1,445 @@
+import re
+import zlib
+from functools import lru_cache
+
+
+# Sequence lengths the models were trained with. The tokenizer's
+# model_max_length is often larger, and anything past these limits is
+# silently truncated by the model.
+MODEL_MAX_TOKENS = {
+    "sentence-transformers/all-MiniLM-L6-v2": 256,
+    "cross-encoder/ms-marco-MiniLM-L-6-v2": 512,
+}
+
+# Rough average used to size the streaming buffer in token mode
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer(model_name):
+    """Fast (Rust) tokenizer, loaded once per process"""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name, use_fast=True)
+
+
+def token_counter(model_name):
+    """
+    Batched length function counting tokens with the model's tokenizer
+
+    Returns:
+        callable(list[str]) -> list[int] (special tokens not included)
+    """
+    tokenizer = load_tokenizer(model_name)
+
+    def count(texts):
+        if not texts:
+            return []
+        encoded = tokenizer(list(texts), add_special_tokens=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    return count
+
+
+# Block flags for the chunker only - never stored with a chunk
+BLOCK_FLAGS = ('keep_whole', 'new_section')
+
+
+def strip_block_flags(metadata):
+    return {k: v for k, v in metadata.items() if k not in BLOCK_FLAGS}
+
+
+def chunk_blocks(blocks, text_splitter):
+    """
+    Split (text, metadata) blocks one at a time
+
+    Blocks come from UniversalDocumentLoader.load_blocks (e.g. one per
+    PDF page), so only a single block is ever held in memory. Each chunk
+    keeps the metadata of the block it came from. Blocks marked
+    keep_whole (e.g. CSV row batches) are already chunks and pass through.
+
+    A StreamingChunker chunks across block boundaries instead (overlap
+    carries from one page to the next) and adds source offsets.
+
+    Yields:
+        (chunk_text, block_metadata)
+    """
+    if isinstance(text_splitter, StreamingChunker):
+        yield from text_splitter.chunk_blocks(blocks)
+        return
+
+    for text, metadata in blocks:
+        if metadata.get('keep_whole'):
+            yield text, strip_block_flags(metadata)
+            continue
+
+        metadata = strip_block_flags(metadata)
+        for chunk in text_splitter.split_text(text):
+            yield chunk, metadata
+
+
+class StreamingChunker:
+    """
+    Recursive character chunker that consumes a stream of text blocks
+
+    Splits like RecursiveCharacterTextSplitter (paragraphs, then lines,
+    sentences, words, characters) and packs the pieces into chunks of at
+    most chunk_size with chunk_overlap carried over. Instead of one big
+    string it takes (text, metadata) blocks - pages, paragraphs, rows -
+    and yields chunks as soon as they are complete, holding only a few
+    chunks worth of text at a time.
+
+    Blocks are treated as one document joined by block_separator. Every
+    chunk records start_offset/end_offset into that document, so chunks
+    can be traced back to their source (and overlap works across pages).
+
+    With a length_function (see for_model) sizes are measured in model
+    tokens instead of characters.
+    """
+
+    def __init__(self, chunk_size=500, chunk_overlap=50, separators=None,
+                 block_separator="\n\n", buffer_chunks=4, length_function=None):
+        """
+        Args:
+            chunk_size: Max characters (or tokens) per chunk
+            chunk_overlap: Characters (or tokens) repeated from the previous chunk
+            separators: Split points, tried in order ("" = hard cut)
+            block_separator: Text between two blocks in the document
+            buffer_chunks: Chunks of text buffered before emitting
+            length_function: Optional batched callable(list[str]) -> list[int]
+                             measuring length (default: characters)
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators if separators is not None else ["\n\n", "\n", ". ", " ", ""]
+        self.block_separator = block_separator
+        self.buffer_chunks = buffer_chunks
+        self.length_function = length_function
+
+        # Emit once the buffer holds about buffer_chunks chunks of text
+        self.buffer_chars = chunk_size * buffer_chunks
+        if length_function is not None:
+            self.buffer_chars *= CHARS_PER_TOKEN
+
+    @classmethod
+    def for_model(cls, model_name="sentence-transformers/all-MiniLM-L6-v2",
+                  chunk_overlap=16, max_tokens=None, **kwargs):
+        """
+        Token-aware chunker packing chunks up to the model's sequence length
+
+        Args:
+            model_name: Hugging Face model whose tokenizer measures chunks
+            chunk_overlap: Tokens repeated from the previous chunk
+            max_tokens: Chunk limit (default: MODEL_MAX_TOKENS minus the
+                        [CLS]/[SEP] special tokens)
+        """
+        if max_tokens is None:
+            max_tokens = MODEL_MAX_TOKENS.get(model_name, 256) - 2
+
+        return cls(
+            chunk_size=max_tokens,
+            chunk_overlap=chunk_overlap,
+            length_function=token_counter(model_name),
+            **kwargs
+        )
+
+    # ----- Splitting (works on spans, so offsets stay exact) -----
+
+    def _split_spans(self, text, start, end, separators):
+        """
+        Cut text[start:end] into contiguous spans of at most chunk_size
+
+        Always measured in characters: a token covers at least one
+        character, so this is also a valid bound in token mode (the
+        merge step packs the pieces by their real length).
+        """
+        if end - start <= self.chunk_size:
+            return [(start, end)]
+
+        for i, separator in enumerate(separators):
+            if separator == "":
+                return [
+                    (s, min(s + self.chunk_size, end))
+                    for s in range(start, end, self.chunk_size)
+                ]
+            if text.find(separator, start, end) == -1:
+                continue
+
+            spans = []
+            piece_start = start
+            while piece_start < end:
+                cut = text.find(separator, piece_start, end)
+                # The separator stays at the end of its piece
+                piece_end = end if cut == -1 else cut + len(separator)
+                if piece_end - piece_start > self.chunk_size:
+                    spans.extend(self._split_spans(text, piece_start, piece_end, separators[i + 1:]))
+                else:
+                    spans.append((piece_start, piece_end))
+                piece_start = piece_end
+            return spans
+
+        # No separator left that occurs in the text
+        return [(start, end)]
+
+    def _merge_spans(self, text, spans):
+        """Pack spans into (start, end) chunks with overlap"""
+        if self.length_function is None:
+            lengths = [end - start for start, end in spans]
+        else:
+            # One batched tokenizer call for all pieces. Pieces end at
+            # separators (whitespace), so their token counts add up.
+            lengths = self.length_function([text[start:end] for start, end in spans])
+
+        chunks = []
+        current = []
+        size = 0
+
+        for (start, end), length in zip(spans, lengths):
+            if current and size + length > self.chunk_size:
+                chunks.append((current[0][0], current[-1][1]))
+                # Keep the tail of this chunk as overlap for the next one
+                while current and (size > self.chunk_overlap or size + length > self.chunk_size):
+                    size -= current[0][2]
+                    current.pop(0)
+            current.append((start, end, length))
+            size += length
+
+        if current:
+            chunks.append((current[0][0], current[-1][1]))
+        return chunks
+
+    def _chunk_spans(self, text):
+        return self._merge_spans(text, self._split_spans(text, 0, len(text), self.separators))
+
+    def split_text(self, text):
+        """Drop-in replacement for text_splitter.split_text"""
+        return [chunk for chunk, _ in self.chunk_blocks([(text, {})])]
+
+    # ----- Streaming -----
+
+    def chunk_blocks(self, blocks):
+        """
+        Chunk an iterator of (text, metadata) blocks incrementally
+
+        Each chunk gets the metadata of the block it starts in plus
+        start_offset/end_offset. Blocks marked keep_whole (e.g. CSV row
+        batches) are emitted unchanged and never merged with neighbours.
+        Blocks marked new_section (a heading section, a quoted reply)
+        start a new chunk, without overlap from the previous section.
+
+        Yields:
+            (chunk_text, metadata)
+        """
+        buffer = ""
+        buffer_offset = 0       # document offset of buffer[0]
+        block_starts = []       # (document offset, metadata) of buffered blocks
+        doc_length = 0
+
+        def emit(final, spans=None):
+            """Yield the finished chunks of the buffer (spans: its _chunk_spans, if already known)"""
+            if spans is None:
+                spans = self._chunk_spans(buffer)
+            # The last chunk may still grow with the next block
+            if not final:
+                spans = spans[:-1]
+
+            for start, end in spans:
+                chunk = buffer[start:end]
+                stripped = chunk.strip()
+                if not stripped:
+                    continue
+                start += len(chunk) - len(chunk.lstrip())
+                end = start + len(stripped)
+
+                doc_start = buffer_offset + start
+                metadata = block_starts[0][1]
+                for block_start, block_metadata in block_starts:
+                    if block_start > doc_start:
+                        break
+                    metadata = block_metadata
+
+                yield stripped, {
+                    **metadata,
+                    'start_offset': doc_start,
+                    'end_offset': buffer_offset + end
+                }
+
+        for text, metadata in blocks:
+            if doc_length:
+                # Block boundary counts as a paragraph break
+                buffer += self.block_separator
+                doc_length += len(self.block_separator)
+
+            if metadata.get('keep_whole'):
+                if buffer.strip():
+                    yield from emit(final=True)
+                yield text, {
+                    **strip_block_flags(metadata),
+                    'start_offset': doc_length,
+                    'end_offset': doc_length + len(text)
+                }
+                doc_length += len(text)
+                buffer, buffer_offset, block_starts = "", doc_length, []
+                continue
+
+            if metadata.get('new_section'):
+                if buffer.strip():
+                    yield from emit(final=True)
+                buffer, block_starts = "", []
+                metadata = strip_block_flags(metadata)
+
+            if not buffer:
+                buffer_offset = doc_length
+            block_starts.append((doc_length, metadata))
+            buffer += text
+            doc_length += len(text)
+
+            if len(buffer) > self.buffer_chars:
+                spans = self._chunk_spans(buffer)
+                yield from emit(final=False, spans=spans)
+
+                # Carry the unfinished last chunk (which starts with the
+                # overlap of the previous one) into the next round
+                keep_from = spans[-1][0]
+                buffer = buffer[keep_from:]
+                buffer_offset += keep_from
+                block_starts = [
+                    (start, meta) for i, (start, meta) in enumerate(block_starts)
+                    if i == len(block_starts) - 1 or block_starts[i + 1][0] > buffer_offset
+                ]
+
+        if buffer.strip():
+            yield from emit(final=True)
+
+
+class ContentDefinedChunker(StreamingChunker):
+    """
+    Chunker whose boundaries depend only on the nearby text
+
+    Fixed-size splitting packs chunks from the start of the document, so
+    inserting one paragraph near the top shifts every later boundary.
+    Here a boundary is placed at a natural break (paragraph, line,
+    sentence end) when the hash of the window of text before it hits a
+    divisor - stronger breaks hit more often. Once a chunk passes
+    chunk_size without such a break, it is cut at its strongest break.
+    An edit therefore only changes the chunks around it; the chunker
+    falls back into the old boundaries right after.
+
+    Hashes are only computed at break points (not at every character as
+    a classic Rabin/Gear rolling hash would), which gives the same
+    shift-invariance for a fraction of the work. There is no overlap.
+    Use with IngestPipeline(content_ids=True) so unchanged chunks keep
+    their IDs and are not embedded again.
+    """
+
+    # Break levels: paragraph, line, sentence end, other whitespace
+    BREAKS = re.compile(r"(\n[ \t]*\n\s*)|(\n\s*)|((?<=[.!?:;])[ \t]+)|([ \t]+)")
+    # Cut at 1 in N breaks of each level (word breaks only when forced)
+    DIVISORS = (3, 8, 16)
+
+    def __init__(self, chunk_size=500, min_size=None, window=32,
+                 block_separator="\n\n", buffer_chunks=4):
+        """
+        Args:
+            chunk_size: Max characters per chunk
+            min_size: Min characters before a boundary may be placed
+                      (default: chunk_size / 3)
+            window: Characters hashed before each break
+            block_separator: Text between two blocks in the document
+            buffer_chunks: Chunks of text buffered before emitting
+        """
+        super().__init__(chunk_size, 0, block_separator=block_separator,
+                         buffer_chunks=buffer_chunks)
+        self.min_size = min_size if min_size is not None else chunk_size // 3
+        # The window must fit in the chunk, or it would depend on the
+        # previous chunk's text
+        self.window = max(1, min(window, self.min_size))
+
+    def _is_boundary(self, text, end, level):
+        if level >= len(self.DIVISORS):
+            return False
+        window = text[end - self.window:end].encode('utf-8')
+        return zlib.crc32(window) % self.DIVISORS[level] == 0
+
+    def _chunk_spans(self, text):
+        """
+        Content-defined (start, end) chunks
+
+        A break running up to the end of the text is ignored (the next
+        block may still turn a line break into a paragraph break), so
+        streaming gives the same boundaries as chunking the whole text.
+        """
+        breaks = [
+            (m.start(), m.end(), m.lastindex - 1)
+            for m in self.BREAKS.finditer(text) if m.end() < len(text)
+        ]
+
+        spans = []
+        start = 0
+        i = 0
+        while True:
+            limit = start + self.chunk_size
+            cut = None
+            best = None         # strongest (then latest) break so far
+            while i < len(breaks) and breaks[i][0] <= limit:
+                end, next_start, level = breaks[i]
+                i += 1
+                if end - start < self.min_size:
+                    continue
+                if self._is_boundary(text, end, level):
+                    cut = (end, next_start)
+                    break
+                if best is None or level <= best[2]:
+                    best = (end, next_start, level, i)
+
+            if cut is None:
+                if len(text) - start <= self.chunk_size:
+                    break
+                if best is not None:
+                    cut = best[:2]
+                    i = best[3]
+                else:
+                    cut = (limit, limit)
+
+            spans.append((start, cut[0]))
+            start = cut[1]
+
+        spans.append((start, len(text)))
+        return spans
+
+
+# Test
+if __name__ == "__main__":
+    import sys
+    import time
+    import tracemalloc
+    from universal_loader import UniversalDocumentLoader
+
+    print("=" * 60)
+    print("STREAMING CHUNKER TEST")
+    print("=" * 60 + "\n")
+
+    chunker = StreamingChunker(chunk_size=500, chunk_overlap=50)
+
+    paths = sys.argv[1:]
+    if not paths:
+        print("Usage: python chunking.py <file> [<file> ...]")
+
+    for path in paths:
+        tracemalloc.start()
+        start = time.time()
+
+        blocks, _ = UniversalDocumentLoader.load_blocks(path)
+        n_chunks = 0
+        for chunk, metadata in chunker.chunk_blocks(blocks):
+            if n_chunks < 2:
+                print(f"   [{metadata['start_offset']}:{metadata['end_offset']}] "
+                      f"{chunk[:60].replace(chr(10), ' ')}...")
+            n_chunks += 1
+
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"📄 {path}: {n_chunks} chunks in {time.time() - start:.2f}s | "
+              f"peak {peak / (1024 * 1024):.1f} MB\n")
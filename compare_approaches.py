@@ -2,6 +2,7 @@ import time
 from sentence_transformers import SentenceTransformer
 import chromadb
 import numpy as np
+from vector_index import MatrixVectorIndex
 
 print("="*60)
 print("COMPARING MANUAL SEARCH vs CHROMADB")
@@ -95,6 +96,40 @@ print(f"\n🎯 Top 3 Results:")
 for i, doc in enumerate(results['documents'][0], 1):
     print(f"   {i}. {doc[:50]}...")
 
+# METHOD 3: NumPy matrix index (one matrix product instead of a loop)
+print("\n" + "="*60)
+print("METHOD 3: NUMPY MATRIX INDEX")
+print("="*60)
+
+start = time.time()
+
+# One batched encode, one matrix of normalized rows
+index = MatrixVectorIndex()
+index.add(
+    ids=[f"doc_{i}" for i in range(len(documents))],
+    embeddings=model.encode(documents, batch_size=64),
+    documents=documents
+)
+query_vector = model.encode(query)
+matrix_results = index.query(query_embeddings=[query_vector], n_results=3)
+
+matrix_time = time.time() - start
+
+print(f"⏱️  Time: {matrix_time*1000:.2f}ms")
+print(f"\n🎯 Top 3 Results:")
+for i, (doc, distance) in enumerate(zip(matrix_results['documents'][0], matrix_results['distances'][0]), 1):
+    print(f"   {i}. {doc[:50]}... (sim: {1 - distance:.4f})")
+
+# Search time alone on 100k stored vectors
+big_index = MatrixVectorIndex()
+big_index.add(
+    ids=[f"row_{i}" for i in range(100_000)],
+    embeddings=np.random.RandomState(0).randn(100_000, len(query_vector)).astype(np.float32)
+)
+start = time.time()
+big_index.search(query_vector, k=3)
+print(f"\n⚡ Search over 100,000 vectors: {(time.time() - start)*1000:.2f}ms")
+
 # Comparison
 print("\n" + "="*60)
 print("📊 COMPARISON SUMMARY")
@@ -103,6 +138,7 @@ print("="*60)
 print(f"\n⏱️  SPEED:")
 print(f"   Manual: {manual_time*1000:.2f}ms")
 print(f"   ChromaDB: {chromadb_time*1000:.2f}ms")
+print(f"   NumPy matrix: {matrix_time*1000:.2f}ms")
 if manual_time < chromadb_time:
     print(f"   Winner: Manual (but only with {len(documents)} docs!)")
 else:
@@ -121,6 +157,7 @@ print(f"   Winner: ChromaDB ✅")
 print(f"\n📈 SCALABILITY:")
 print(f"   Manual: O(n) - checks every document")
 print(f"   ChromaDB: O(log n) - uses HNSW index")
+print(f"   NumPy matrix: O(n), but one matrix product - exact and fast up to ~100k+ chunks")
 print(f"   Winner: ChromaDB ✅")
 
 print(f"\n🔧 MAINTENANCE:")
@@ -1,7 +1,6 @@
-import PyPDF2
-import pdfplumber
 from pathlib import Path
-from docx import Document as DocxDocument
+
+from universal_loader import UniversalDocumentLoader
 
 class DocumentLoader:
     """Universal document loader for multiple formats"""
@@ -34,31 +33,10 @@ class DocumentLoader:
     
     @staticmethod
     def load_pdf(filepath):
-        """Load PDF with fallback strategy"""
-        
-        # Try PyPDF2 first (fast)
-        try:
-            with open(filepath, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                # If we got decent text, return it
-                if len(text.strip()) > 100:
-                    return text
-        except:
-            pass
-        
-        # Fallback to pdfplumber (more robust)
+        """Load PDF page by page (PyPDF2, pdfplumber only for weak pages)"""
         try:
-            with pdfplumber.open(filepath) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                return text
+            pages = UniversalDocumentLoader.iter_pdf_pages(filepath)
+            return "\n".join(text for _, text in pages)
         except Exception as e:
             raise Exception(f"Could not extract PDF: {e}")
     
@@ -66,11 +44,7 @@ class DocumentLoader:
     def load_docx(filepath):
         """Load Word document"""
         try:
-            doc = DocxDocument(filepath)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            return UniversalDocumentLoader.load_docx(filepath)
         except Exception as e:
             raise Exception(f"Could not extract DOCX: {e}")
     
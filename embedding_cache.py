@@ -0,0 +1,302 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+
+_KEY_BYTES = 16
+
+
+class EmbeddingCache:
+    """
+    Disk cache of chunk embeddings, shared by every PAiKA front-end
+
+    Vectors are keyed by the model (plus whether they are normalized) and
+    a hash of the chunk text with whitespace normalized, so the same
+    chunk embedded by paika_complete, paika_optimized or the CLI - or
+    uploaded twice - is only run through the model once.
+
+    Layout per model: append-only segments of raw float16 rows
+    (<segment>.f16, memory-mapped for reads) with their 16-byte keys
+    (<segment>.keys). Every process appends to its own segment, so
+    front-ends can share the folder without locking; segments written by
+    other processes are picked up on refresh().
+    """
+
+    # Seconds between directory re-scans for other processes' segments
+    REFRESH_SECONDS = 5.0
+
+    def __init__(self, cache_dir="./paika_embedding_cache", model_key="default"):
+        """
+        Args:
+            cache_dir: Root folder (one subfolder per model)
+            model_key: Model name and settings the vectors belong to
+        """
+        self.dir = Path(cache_dir) / re.sub(r"[^A-Za-z0-9._-]+", "_", model_key)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.model_key = model_key
+        self.dim = None
+        self._read_meta()
+
+        self._lock = threading.Lock()
+        self._index = {}        # key -> (segment name, row)
+        self._segments = {}     # segment name -> [rows loaded, memmap or None]
+        self._writer = None     # (segment name, keys file, vectors file)
+        self._last_refresh = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.refresh()
+
+    @staticmethod
+    def key(text):
+        """16-byte hash of the chunk text (Unicode and whitespace normalized)"""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=_KEY_BYTES).digest()
+
+    # ----- Segments -----
+
+    def _read_meta(self):
+        meta_path = self.dir / "meta.json"
+        if meta_path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.dim = json.load(f)['dim']
+
+    def _write_meta(self):
+        tmp_path = self.dir / f"meta.json.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model_key': self.model_key, 'dim': self.dim}, f)
+        os.replace(tmp_path, self.dir / "meta.json")
+
+    def refresh(self):
+        """Index rows appended (by any process) since the last refresh"""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        self._last_refresh = time.time()
+        if self.dim is None:
+            self._read_meta()
+            if self.dim is None:
+                return
+
+        row_bytes = self.dim * 2
+        own = self._writer[0] if self._writer else None
+        for keys_path in sorted(self.dir.glob("*.keys")):
+            name = keys_path.stem
+            if name == own:
+                continue
+            try:
+                key_bytes = keys_path.stat().st_size
+                vector_bytes = (self.dir / f"{name}.f16").stat().st_size
+            except OSError:
+                continue
+
+            # Keys are written after their vectors; a half-written tail
+            # (crash, or still being appended) is ignored
+            rows = min(key_bytes // _KEY_BYTES, vector_bytes // row_bytes)
+            loaded = self._segments.get(name, [0])[0]
+            if rows <= loaded:
+                continue
+
+            # Only the keys appended since the last refresh are read
+            try:
+                with open(keys_path, 'rb') as f:
+                    f.seek(loaded * _KEY_BYTES)
+                    keys = f.read((rows - loaded) * _KEY_BYTES)
+            except OSError:
+                continue
+            rows = loaded + len(keys) // _KEY_BYTES
+            if rows <= loaded:
+                continue
+
+            for i in range(rows - loaded):
+                self._index.setdefault(keys[i * _KEY_BYTES:(i + 1) * _KEY_BYTES], (name, loaded + i))
+            self._segments[name] = [rows, None]
+
+    def _vectors(self, name):
+        segment = self._segments[name]
+        if segment[1] is None:
+            segment[1] = np.memmap(
+                self.dir / f"{name}.f16", dtype=np.float16, mode='r', shape=(segment[0], self.dim)
+            )
+        return segment[1]
+
+    # ----- Lookup / store -----
+
+    def get_many(self, keys):
+        """
+        Returns:
+            (found, vectors) - bool mask over keys and a float16
+            (len(keys), dim) array (zeros where not found), or
+            (all-False mask, None) while the cache is empty
+        """
+        with self._lock:
+            if time.time() - self._last_refresh > self.REFRESH_SECONDS:
+                self._refresh()
+
+            found = np.zeros(len(keys), dtype=bool)
+            if self.dim is None:
+                self.misses += len(keys)
+                return found, None
+
+            vectors = np.zeros((len(keys), self.dim), dtype=np.float16)
+            by_segment = {}
+            for i, key in enumerate(keys):
+                location = self._index.get(key)
+                if location is not None:
+                    by_segment.setdefault(location[0], []).append((i, location[1]))
+
+            for name, pairs in by_segment.items():
+                positions, rows = (np.array(column) for column in zip(*pairs))
+                # One fancy-indexed read per segment
+                vectors[positions] = self._vectors(name)[rows]
+                found[positions] = True
+
+            hits = int(found.sum())
+            self.hits += hits
+            self.misses += len(keys) - hits
+            return found, vectors
+
+    def put_many(self, keys, vectors):
+        """Append vectors (converted to float16) for keys not cached yet"""
+        vectors = np.asarray(vectors, dtype=np.float16)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding size {vectors.shape[1]} != cached size {self.dim}")
+
+            new = [i for i, key in enumerate(keys) if key not in self._index]
+            # Duplicates within this call are stored once
+            new = list({keys[i]: i for i in new}.values())
+            if not new:
+                return
+
+            if self._writer is None:
+                name = f"{time.time_ns()}-{os.getpid()}"
+                self._writer = (
+                    name,
+                    open(self.dir / f"{name}.keys", 'ab'),
+                    open(self.dir / f"{name}.f16", 'ab')
+                )
+                self._segments[name] = [0, None]
+            name, keys_file, vectors_file = self._writer
+
+            vectors_file.write(np.ascontiguousarray(vectors[new]).tobytes())
+            vectors_file.flush()
+            keys_file.write(b"".join(keys[i] for i in new))
+            keys_file.flush()
+
+            segment = self._segments[name]
+            for offset, i in enumerate(new):
+                self._index[keys[i]] = (name, segment[0] + offset)
+            segment[0] += len(new)
+            segment[1] = None
+
+    # ----- Housekeeping -----
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer[1].close()
+                self._writer[2].close()
+                self._writer = None
+            for segment in self._segments.values():
+                segment[1] = None
+
+    def compact(self):
+        """
+        Merge all segments into one (run while no other process is
+        writing to this cache)
+        """
+        with self._lock:
+            if self.dim is None or not self._index:
+                return
+            keys = list(self._index)
+            vectors = np.empty((len(keys), self.dim), dtype=np.float16)
+            for i, key in enumerate(keys):
+                name, row = self._index[key]
+                vectors[i] = self._vectors(name)[row]
+
+            name = f"{time.time_ns()}-{os.getpid()}-compact"
+            with open(self.dir / f"{name}.f16", 'wb') as f:
+                f.write(vectors.tobytes())
+            with open(self.dir / f"{name}.keys", 'wb') as f:
+                f.write(b"".join(keys))
+
+            if self._writer is not None:
+                self._writer[1].close()
+                self._writer[2].close()
+                self._writer = None
+            old = list(self._segments)
+            self._segments = {name: [len(keys), None]}
+            self._index = {key: (name, row) for row, key in enumerate(keys)}
+            for segment_name in old:
+                for suffix in (".keys", ".f16"):
+                    try:
+                        (self.dir / f"{segment_name}{suffix}").unlink()
+                    except OSError:
+                        pass
+
+    def clear(self):
+        self.close()
+        with self._lock:
+            for path in list(self.dir.glob("*.keys")) + list(self.dir.glob("*.f16")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._index = {}
+            self._segments = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def get_stats(self):
+        size = sum(path.stat().st_size for path in self.dir.glob("*.f16") if path.exists())
+        return {
+            'vectors': len(self._index),
+            'segments': len(self._segments),
+            'size_mb': round(size / (1024 * 1024), 2),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+
+    print("=" * 60)
+    print("EMBEDDING CACHE TEST")
+    print("=" * 60 + "\n")
+
+    rng = np.random.RandomState(0)
+    texts = [f"Chunk number {i} of a document about vector databases." for i in range(20000)]
+    vectors = rng.randn(len(texts), 384).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(tmp, "demo-model")
+        keys = [EmbeddingCache.key(t) for t in texts]
+
+        start = time.time()
+        cache.put_many(keys, vectors)
+        print(f"💾 Stored {len(texts)} vectors in {time.time() - start:.2f}s")
+
+        # A second front-end (fresh process) sees the same vectors
+        other = EmbeddingCache(tmp, "demo-model")
+        start = time.time()
+        found, cached = other.get_many([EmbeddingCache.key("  " + t) for t in texts])
+        print(f"⚡ {found.sum()} hits in {(time.time() - start) * 1000:.1f}ms "
+              f"(max error {np.abs(cached.astype(np.float32) - vectors).max():.4f})")
+        print(f"📊 {other.get_stats()}")
+        cache.close()
+        other.close()
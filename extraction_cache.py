@@ -0,0 +1,191 @@
+import os
+import json
+import zlib
+import hashlib
+from pathlib import Path
+
+from universal_loader import UniversalDocumentLoader
+
+
+class ExtractionCache:
+    """
+    Disk-backed cache of extracted document text
+
+    Entries are keyed by the file's content hash, what was extracted
+    (kind) and UniversalDocumentLoader.PARSER_VERSION, and are stored
+    zlib-compressed. The cache survives restarts and is shared by every
+    PAiKA entry point, so re-processing the same bytes skips parsing.
+
+    When the cache grows past max_bytes the least recently used entries
+    are evicted. Each process (e.g. an ingest worker holding a pickled
+    copy) only counts what it wrote itself, so the cap is enforced per
+    process; call trim() in the parent afterwards to apply it to the
+    whole folder.
+    """
+
+    # Cheaper to read again than to cache
+    SKIP_FORMATS = {'.txt', '.md'}
+
+    def __init__(self, cache_dir="./paika_extraction_cache", max_bytes=512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Folder for cache entries
+            max_bytes: Size cap (compressed) before LRU eviction kicks in
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def content_hash(data):
+        """sha256 of raw file bytes"""
+        return hashlib.sha256(data).hexdigest()
+
+    def _entry_path(self, content_hash, ext, kind):
+        name = f"{content_hash}_{kind}_{ext.lstrip('.')}_v{UniversalDocumentLoader.PARSER_VERSION}.json.z"
+        # Two-level layout keeps directories small
+        return self.cache_dir / content_hash[:2] / name
+
+    def _scan(self):
+        entries = []
+        for path in self.cache_dir.glob("*/*.json.z"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def get(self, content_hash, ext, kind="blocks"):
+        """Return the cached value, or None on a miss"""
+        if ext in self.SKIP_FORMATS:
+            return None
+
+        path = self._entry_path(content_hash, ext, kind)
+        try:
+            with open(path, 'rb') as f:
+                value = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Corrupt entry - drop it and re-extract
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # mtime doubles as "last used" for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return value
+
+    def put(self, content_hash, ext, value, kind="blocks"):
+        """Store a JSON-serializable value (text or list of blocks)"""
+        if ext in self.SKIP_FORMATS:
+            return
+
+        path = self._entry_path(content_hash, ext, kind)
+        path.parent.mkdir(exist_ok=True)
+        data = zlib.compress(json.dumps(value).encode('utf-8'), 6)
+
+        # An overwritten entry no longer counts
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+
+        # Write atomically - several processes may share the cache
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._size += len(data) - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def get_or_extract(self, content_hash, ext, extract, kind="blocks"):
+        """Return the cached value or run extract() and cache its result"""
+        value = self.get(content_hash, ext, kind)
+        if value is None:
+            value = extract()
+            if value:
+                self.put(content_hash, ext, value, kind)
+        return value
+
+    def evict(self):
+        """Delete least recently used entries until 90% of the cap"""
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+
+        self._size = total
+
+    def trim(self):
+        """Re-measure the folder (other processes may have written to it) and evict if over the cap"""
+        self._size = sum(size for _, size, _ in self._scan())
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def clear(self):
+        for _, _, path in self._scan():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def get_stats(self):
+        return {
+            'entries': len(self._scan()),
+            'size_mb': round(self._size / (1024 * 1024), 2),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Test
+if __name__ == "__main__":
+    import time
+    import tempfile
+
+    print("=" * 60)
+    print("EXTRACTION CACHE TEST")
+    print("=" * 60 + "\n")
+
+    pdf_files = list(Path('.').glob('*.pdf'))
+    if not pdf_files:
+        print("⚠️  No PDF found to test with!")
+    else:
+        pdf = pdf_files[0]
+        data = pdf.read_bytes()
+        content_hash = ExtractionCache.content_hash(data)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ExtractionCache(tmp)
+
+            for attempt in ("cold", "warm"):
+                start = time.time()
+                text = cache.get_or_extract(
+                    content_hash, '.pdf',
+                    lambda: UniversalDocumentLoader.load_pdf(data),
+                    kind="text"
+                )
+                print(f"{attempt}: {len(text)} chars in {(time.time() - start) * 1000:.1f}ms")
+
+            print(f"\n📊 {cache.get_stats()}")
+
+    print("\n✅ Extraction cache working!")
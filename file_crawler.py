@@ -0,0 +1,136 @@
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+
+from universal_loader import UniversalDocumentLoader
+
+
+class FileCrawler:
+    """
+    Lazily walks directory trees and yields ingestible files
+
+    Paths are yielded as soon as they are found (os.scandir, no lists),
+    so the ingest pipeline starts working before the crawl finishes.
+
+    Patterns are shell globs. A pattern containing "/" is matched against
+    the path relative to the root, otherwise against the file or folder
+    name. Excluded folders are not descended into.
+    """
+
+    # Office lock files, editor backups and partial downloads
+    TEMP_PATTERNS = ["~$*", ".~lock*", "*~", "*.tmp", "*.part", "*.crdownload"]
+
+    # Never worth crawling
+    DEFAULT_EXCLUDES = ["__pycache__", "venv", ".venv", "node_modules"]
+
+    def __init__(self, include=None, exclude=None, max_size=None, extensions=None,
+                 skip_hidden=True, recursive=True):
+        """
+        Args:
+            include: Only yield files matching one of these patterns
+            exclude: Skip files/folders matching these patterns
+            max_size: Skip files larger than this many bytes
+            extensions: File types to yield (default: all supported)
+            skip_hidden: Skip dot-files and dot-folders
+            recursive: Descend into subfolders
+        """
+        self.include = list(include or [])
+        self.exclude = self.DEFAULT_EXCLUDES + list(exclude or [])
+        self.max_size = max_size
+        self.extensions = set(extensions or UniversalDocumentLoader.get_supported_formats())
+        self.skip_hidden = skip_hidden
+        self.recursive = recursive
+
+    @staticmethod
+    def _matches(name, rel_path, patterns):
+        for pattern in patterns:
+            target = rel_path if '/' in pattern else name
+            if fnmatch(target, pattern):
+                return True
+        return False
+
+    def _skip_dir(self, name, rel_path):
+        if self.skip_hidden and name.startswith('.'):
+            return True
+        return self._matches(name, rel_path, self.exclude)
+
+    def _skip_file(self, name, rel_path, size):
+        if self.skip_hidden and name.startswith('.'):
+            return True
+        if Path(name).suffix.lower() not in self.extensions:
+            return True
+        if self._matches(name, rel_path, self.TEMP_PATTERNS + self.exclude):
+            return True
+        if self.include and not self._matches(name, rel_path, self.include):
+            return True
+        if self.max_size is not None and size > self.max_size:
+            return True
+        return False
+
+    def crawl(self, roots):
+        """
+        Yield Path objects for every matching file under roots
+
+        Args:
+            roots: A folder or a list of folders
+        """
+        if isinstance(roots, (str, Path)):
+            roots = [roots]
+
+        for root in roots:
+            root = Path(root)
+            stack = [(root, "")]
+
+            while stack:
+                folder, rel_folder = stack.pop()
+                try:
+                    entries = os.scandir(folder)
+                except OSError:
+                    continue
+
+                with entries:
+                    for entry in entries:
+                        rel_path = f"{rel_folder}{entry.name}"
+                        try:
+                            # Don't follow symlinked folders (loops)
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.recursive and not self._skip_dir(entry.name, rel_path):
+                                    stack.append((entry.path, rel_path + "/"))
+                                continue
+
+                            if not entry.is_file():
+                                continue
+                            size = entry.stat().st_size
+                        except OSError:
+                            continue
+
+                        if not self._skip_file(entry.name, rel_path, size):
+                            yield Path(entry.path)
+
+
+# Test
+if __name__ == "__main__":
+    import sys
+    import time
+
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+
+    print("=" * 60)
+    print("FILE CRAWLER TEST")
+    print("=" * 60 + "\n")
+
+    crawler = FileCrawler(max_size=100 * 1024 * 1024)
+
+    start = time.time()
+    first_at = None
+    count = 0
+    for path in crawler.crawl(root):
+        if first_at is None:
+            first_at = time.time() - start
+        count += 1
+        if count <= 10:
+            print(f"📄 {path}")
+
+    print(f"\n✅ {count} files found in {time.time() - start:.2f}s")
+    if first_at is not None:
+        print(f"⚡ First file after {first_at * 1000:.1f}ms")
@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+
+def file_sha256(filepath, block_size=1 << 20):
+    """Hash a file in 1 MB blocks so big files never sit in memory"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileManifest:
+    """
+    Persistent record of every ingested file:
+    path -> size, mtime, sha256 and the chunk IDs it produced
+
+    Used to re-index incrementally: unchanged files are skipped,
+    changed files have their old chunks replaced and removed files
+    have their chunks deleted.
+    """
+
+    def __init__(self, manifest_path):
+        self.manifest_path = Path(manifest_path)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def key(filepath):
+        """Manifest key for a file (absolute path)"""
+        return str(Path(filepath).resolve())
+
+    def load(self):
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        else:
+            self.entries = {}
+
+    def save(self):
+        """
+        Write atomically so a crash never leaves a half-written manifest
+
+        Each save gets its own temp file, so a watcher and a manual
+        load saving at the same time never clobber each other's write.
+        """
+        with self._lock:
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.manifest_path.parent,
+                                             prefix=self.manifest_path.name, suffix='.tmp',
+                                             delete=False) as f:
+                json.dump(self.entries, f)
+        try:
+            os.replace(f.name, self.manifest_path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    def get(self, filepath):
+        return self.entries.get(self.key(filepath))
+
+    def is_unchanged(self, filepath):
+        """
+        Cheap check using size + mtime only (no hashing)
+
+        Returns True only when the file certainly hasn't changed.
+        """
+        entry = self.get(filepath)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return False
+        return stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']
+
+    def record(self, filepath, size, mtime, sha256, chunk_ids):
+        with self._lock:
+            self.entries[self.key(filepath)] = {
+                'size': size,
+                'mtime': mtime,
+                'sha256': sha256,
+                'chunk_ids': list(chunk_ids)
+            }
+
+    def invalidate(self, filepath):
+        """Force the file to be parsed again (its chunk IDs are kept so they get replaced)"""
+        with self._lock:
+            entry = self.entries.get(self.key(filepath))
+            if entry is not None:
+                entry['size'] = -1
+                entry['sha256'] = None
+
+    def touch(self, filepath, size, mtime):
+        """File content is the same but its stat changed (e.g. copied over)"""
+        with self._lock:
+            entry = self.entries.get(self.key(filepath))
+            if entry is not None:
+                entry['size'] = size
+                entry['mtime'] = mtime
+
+    def forget(self, filepath):
+        """Drop a file and return the chunk IDs it owned"""
+        with self._lock:
+            entry = self.entries.pop(self.key(filepath), None)
+        return entry['chunk_ids'] if entry else []
+
+    def removed_paths(self):
+        """Manifest entries whose file no longer exists on disk"""
+        return [path for path in list(self.entries) if not os.path.exists(path)]
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+        self.save()
+
+    def get_stats(self):
+        return {
+            'files': len(self.entries),
+            'chunks': sum(len(e['chunk_ids']) for e in self.entries.values())
+        }
+
+
+# Test
+if __name__ == "__main__":
+    print("=" * 60)
+    print("FILE MANIFEST TEST")
+    print("=" * 60 + "\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        doc = Path(tmp) / "notes.txt"
+        doc.write_text("PAiKA keeps a manifest of ingested files.")
+
+        manifest = FileManifest(Path(tmp) / "manifest.json")
+        stat = doc.stat()
+        manifest.record(doc, stat.st_size, stat.st_mtime, file_sha256(doc), ["a_0"])
+        manifest.save()
+
+        reloaded = FileManifest(Path(tmp) / "manifest.json")
+        print(f"Unchanged after reload: {reloaded.is_unchanged(doc)}")
+
+        doc.write_text("PAiKA keeps a manifest of ingested files. Edited!")
+        print(f"Unchanged after edit:   {reloaded.is_unchanged(doc)}")
+
+        doc.unlink()
+        print(f"Removed paths:          {len(reloaded.removed_paths())}")
+        print(f"Stale chunks:           {reloaded.forget(reloaded.removed_paths()[0])}")
+
+    print("\n✅ Manifest working!")
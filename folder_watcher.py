@@ -0,0 +1,198 @@
+import os
+import time
+import threading
+from pathlib import Path
+
+from file_crawler import FileCrawler
+from ingest_pipeline import IngestPipeline
+
+
+class FolderWatcher:
+    """
+    Watches folders for created, modified and deleted documents
+
+    Uses periodic stat snapshots (no extra dependencies). Changes are
+    debounced: a file is only reported once it has stopped changing for
+    `debounce` seconds, so a burst of saves or a large copy triggers a
+    single re-ingest.
+    """
+
+    def __init__(self, roots, callback, interval=2.0, debounce=1.5, crawler=None):
+        """
+        Args:
+            roots: Folders to watch
+            callback: Called as callback(changed_paths, deleted_paths)
+            interval: Seconds between scans
+            debounce: Quiet period before a change is reported
+            crawler: FileCrawler deciding which files are watched
+                     (default: all supported files, recursively)
+        """
+        self.roots = [Path(r) for r in roots]
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.crawler = crawler or FileCrawler()
+
+        # Empty snapshot: the first scan reports every file, which lets the
+        # manifest catch up on anything that changed while we were offline
+        self.snapshot = {}
+        self.pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def scan(self):
+        """Current {path: (size, mtime)} for all watched files"""
+        snapshot = {}
+        for path in self.crawler.crawl(self.roots):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[str(path)] = (stat.st_size, stat.st_mtime)
+        return snapshot
+
+    def poll(self):
+        """
+        Scan once and return the changes whose debounce period is over
+
+        Returns:
+            (changed_paths, deleted_paths)
+        """
+        now = time.time()
+        current = self.scan()
+
+        for path in set(current) | set(self.snapshot):
+            if current.get(path) != self.snapshot.get(path):
+                self.pending[path] = now
+        self.snapshot = current
+
+        ready = [p for p, t in self.pending.items() if now - t >= self.debounce]
+        for path in ready:
+            del self.pending[path]
+
+        changed = [p for p in ready if p in current]
+        deleted = [p for p in ready if p not in current]
+        return changed, deleted
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                changed, deleted = self.poll()
+                if changed or deleted:
+                    self.callback(changed, deleted)
+            except Exception as e:
+                print(f"❌ Watcher error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Watch in a background thread (queries keep being served)"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+def make_ingest_callback(collection, text_splitter, manifest, extraction_cache=None,
+                         dedup=None, parent_store=None, chunk_filter=None, content_ids=False,
+                         embedding_function=None, lock=None, on_update=None):
+    """
+    Build a FolderWatcher callback that re-ingests only the affected files
+
+    Changed files go through the ingest pipeline (the manifest skips the
+    ones whose content didn't really change); chunks of deleted files -
+    including files deleted while nothing was watching - are pruned.
+
+    Args:
+        text_splitter: Splitter, or a zero-argument callable that builds
+                       it on the first change (defers loading a tokenizer)
+        lock: Optional lock shared with other ingest paths
+        on_update: Called after the collection changed (e.g. rebuild BM25)
+    """
+    lock = lock or threading.Lock()
+    splitter = [text_splitter]
+
+    def callback(changed, deleted):
+        with lock:
+            if not hasattr(splitter[0], 'split_text'):
+                splitter[0] = splitter[0]()
+            pipeline = IngestPipeline(
+                collection, splitter[0],
+                manifest=manifest, extraction_cache=extraction_cache,
+                dedup=dedup, parent_store=parent_store, chunk_filter=chunk_filter,
+                content_ids=content_ids, embedding_function=embedding_function,
+                batch_size=getattr(embedding_function, 'batch_size', 64)
+            )
+            pipeline.run(changed, prune_removed=True)
+
+            # A changed file that now yields no chunks still had its old
+            # chunks deleted, so any processed file or deletion counts
+            processed = pipeline.counters['parse'].items or pipeline.counters['chunk'].items
+            if processed or pipeline.removed or pipeline.deleted:
+                print(f"🔄 Watcher: {len(changed)} changed, {len(deleted)} deleted files synced")
+                if on_update is not None:
+                    on_update()
+
+    return callback
+
+
+# Daemon mode: keep ./paika_v1_db in sync with one or more folders
+if __name__ == "__main__":
+    import sys
+    import chromadb
+    from chunking import StreamingChunker, ContentDefinedChunker
+    from file_manifest import FileManifest
+    from extraction_cache import ExtractionCache
+    from near_dedup import NearDuplicateIndex
+    from parent_child import ParentChildChunker, ParentStore
+    from chunk_filter import ChunkQualityFilter
+    from embeddings import get_embedding_function
+
+    roots = sys.argv[1:] or ["."]
+
+    print("=" * 60)
+    print("PAiKA FOLDER WATCHER")
+    print("=" * 60 + "\n")
+
+    client = chromadb.PersistentClient(path="./paika_v1_db")
+    embedder = get_embedding_function()
+    collection = client.get_or_create_collection(
+        name="paika_v1",
+        metadata={"description": "PAiKA v1.0 Production"},
+        embedding_function=embedder
+    )
+    # Built on the first change, so the watcher is up before the tokenizer loads
+    def splitter():
+        return ParentChildChunker(
+            StreamingChunker.for_model("sentence-transformers/all-MiniLM-L6-v2"),
+            parent_chunker=ContentDefinedChunker(2000)
+        )
+
+    watcher = FolderWatcher(roots, make_ingest_callback(
+        collection, splitter,
+        manifest=FileManifest("./paika_v1_db/ingest_manifest.json"),
+        extraction_cache=ExtractionCache(),
+        dedup=NearDuplicateIndex("./paika_v1_db/near_dup_index.npz"),
+        parent_store=ParentStore("./paika_v1_db/parents.db"),
+        chunk_filter=ChunkQualityFilter(),
+        content_ids=True,
+        embedding_function=embedder
+    ))
+
+    print(f"👀 Watching: {', '.join(roots)} (Ctrl+C to stop)\n")
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+        print("\n👋 Watcher stopped")
@@ -1,4 +1,3 @@
-import chromadb
 from rank_bm25 import BM25Okapi
 import numpy as np
 from pathlib import Path
@@ -6,13 +5,40 @@ from pathlib import Path
 class HybridSearchEngine:
     """
     Combines semantic search (ChromaDB) with keyword search (BM25)
+
+    The *_batch methods take many queries at once (evaluation runs, query
+    expansion, bulk QA): queries are embedded in one call per batch and
+    BM25 is scored for the whole batch with array operations.
     """
+
+    # Queries scored together by the batch methods
+    QUERY_BATCH_SIZE = 64
+
+    # Max cells of one (queries, chunks) BM25 score matrix (32 MB of
+    # float64) - big collections score fewer queries at a time
+    BM25_BATCH_CELLS = 4_000_000
     
-    def __init__(self, chroma_collection):
+    def __init__(self, chroma_collection, document_store=None):
+        """
+        Args:
+            chroma_collection: Collection to search
+            document_store: Optional DocumentStore for chunks stored as
+                            offsets instead of text (see offset_store.py)
+        """
         self.collection = chroma_collection
+        self.document_store = document_store
         self.bm25 = None
         self.doc_ids = []
-        self.tokenized_docs = []
+        self.quality = {}
+        self._postings = None
+
+    def _chunk_texts(self, data):
+        """Chunk texts of a collection.get() result"""
+        documents = data.get('documents') or [None] * len(data['ids'])
+        if self.document_store is None:
+            return documents
+        resolved = self.document_store.resolve(data['metadatas'])
+        return [doc if doc is not None else text for doc, text in zip(documents, resolved)]
         
     def index_documents(self):
         """Build BM25 index from ChromaDB collection"""
@@ -24,16 +50,21 @@ class HybridSearchEngine:
         print(f"🔄 Building BM25 index for {self.collection.count()} chunks...")
         
         # Get all documents from ChromaDB
-        all_data = self.collection.get()
+        all_data = self.collection.get(include=['documents', 'metadatas'])
         
-        documents = all_data['documents']
+        documents = self._chunk_texts(all_data)
         self.doc_ids = all_data['ids']
+        # Chunks down-weighted at ingest by ChunkQualityFilter
+        self.quality = {
+            doc_id: metadata['quality']
+            for doc_id, metadata in zip(self.doc_ids, all_data['metadatas'])
+            if metadata and 'quality' in metadata
+        }
         
-        # Tokenize documents for BM25
-        self.tokenized_docs = [doc.lower().split() for doc in documents]
-        
-        # Create BM25 index
-        self.bm25 = BM25Okapi(self.tokenized_docs)
+        # Tokenize lazily - BM25 keeps only term frequencies, so no
+        # tokenized copy of the corpus stays in memory
+        self.bm25 = BM25Okapi(doc.lower().split() for doc in documents)
+        self._postings = None
         
         print(f"✅ BM25 index built with {len(documents)} documents\n")
     
@@ -75,12 +106,180 @@ class HybridSearchEngine:
         for doc_id, score in zip(self.doc_ids, normalized_scores):
             scores[doc_id] = score
         
-        # Get top N
-        top_indices = np.argsort(bm25_scores)[::-1][:n_results]
+        # Get top N (equal scores keep index order, as in keyword_search_batch)
+        top_indices = np.argsort(-bm25_scores, kind='stable')[:n_results]
         top_scores = {self.doc_ids[i]: normalized_scores[i] for i in top_indices}
         
         return top_scores
     
+    def _build_postings(self):
+        """
+        BM25 term weights as flat postings arrays (CSR layout), so a batch
+        of queries is scored with one bincount instead of per-term loops
+        """
+        bm25 = self.bm25
+        vocab = {}
+        term_ids, doc_rows, tfs = [], [], []
+        for row, freqs in enumerate(bm25.doc_freqs):
+            for term, tf in freqs.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_rows.append(row)
+                tfs.append(tf)
+
+        term_ids = np.array(term_ids, dtype=np.int64)
+        doc_rows = np.array(doc_rows, dtype=np.int64)
+        tfs = np.array(tfs, dtype=np.float64)
+        idf = np.array([bm25.idf.get(term) or 0 for term in vocab], dtype=np.float64)
+        doc_len = np.array(bm25.doc_len, dtype=np.float64)[doc_rows]
+
+        # Same formula as BM25Okapi.get_scores
+        weights = idf[term_ids] * (tfs * (bm25.k1 + 1) / (
+            tfs + bm25.k1 * (1 - bm25.b + bm25.b * doc_len / bm25.avgdl)
+        ))
+
+        order = np.argsort(term_ids, kind='stable')
+        pointers = np.zeros(len(vocab) + 1, dtype=np.int64)
+        pointers[1:] = np.cumsum(np.bincount(term_ids, minlength=len(vocab)))
+        self._postings = (vocab, pointers, doc_rows[order], weights[order])
+
+    def _bm25_scores_batch(self, queries):
+        """(queries, chunks) BM25 score matrix, equal to get_scores per query"""
+        if self._postings is None:
+            self._build_postings()
+        vocab, pointers, doc_rows, weights = self._postings
+        n_docs = len(self.doc_ids)
+
+        # (query, term) pairs - repeated query terms count again, as in BM25Okapi
+        query_rows, terms = [], []
+        for i, query in enumerate(queries):
+            for token in query.lower().split():
+                term = vocab.get(token)
+                if term is not None:
+                    query_rows.append(i)
+                    terms.append(term)
+        if not terms:
+            return np.zeros((len(queries), n_docs))
+
+        terms = np.array(terms)
+        starts = pointers[terms]
+        lengths = pointers[terms + 1] - starts
+        # Positions of every posting of every (query, term) pair
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        cells = np.repeat(np.array(query_rows), lengths) * n_docs + doc_rows[positions]
+        scores = np.bincount(cells, weights=weights[positions], minlength=len(queries) * n_docs)
+        return scores.reshape(len(queries), n_docs)
+
+    def semantic_search_batch(self, queries, n_results=10):
+        """Semantic search for many queries (one collection.query per batch)"""
+        queries = list(queries)
+        scores = []
+        for start in range(0, len(queries), self.QUERY_BATCH_SIZE):
+            results = self.collection.query(
+                query_texts=queries[start:start + self.QUERY_BATCH_SIZE],
+                n_results=n_results
+            )
+            for ids, distances in zip(results['ids'], results['distances']):
+                scores.append({doc_id: 1 - distance for doc_id, distance in zip(ids, distances)})
+        return scores
+
+    def keyword_search_batch(self, queries, n_results=10):
+        """
+        BM25 search for many queries
+
+        Returns one {doc_id: normalized score} dict per query, the same
+        as keyword_search would
+        """
+        queries = list(queries)
+        k = min(n_results, len(self.doc_ids))
+        if self.bm25 is None or k <= 0:
+            return [{} for _ in queries]
+
+        batch_size = max(1, min(self.QUERY_BATCH_SIZE, self.BM25_BATCH_CELLS // len(self.doc_ids)))
+        scores = []
+        for start in range(0, len(queries), batch_size):
+            bm25_scores = self._bm25_scores_batch(queries[start:start + batch_size])
+            kth = -np.partition(-bm25_scores, k - 1, axis=1)[:, k - 1]
+
+            for raw, threshold in zip(bm25_scores, kth):
+                # Everything above the k-th score, then its ties in index
+                # order - what a stable sort of the whole row would keep
+                above = np.flatnonzero(raw > threshold)
+                top = np.concatenate([above, np.flatnonzero(raw == threshold)[:k - len(above)]])
+                top = top[np.argsort(-raw[top], kind='stable')]
+                maximum = raw.max()
+                normalized = raw[top] / maximum if maximum > 0 else raw[top]
+                scores.append({
+                    self.doc_ids[row]: float(score) for row, score in zip(top, normalized)
+                })
+        return scores
+
+    def _combine(self, semantic_scores, keyword_scores, n_results, semantic_weight):
+        """Weighted score fusion -> [(doc_id, combined score)], best first"""
+        keyword_weight = 1 - semantic_weight
+        combined_scores = {}
+        for doc_id in set(semantic_scores) | set(keyword_scores):
+            combined_scores[doc_id] = (
+                semantic_weight * semantic_scores.get(doc_id, 0.0) +
+                keyword_weight * keyword_scores.get(doc_id, 0.0)
+            ) * self.quality.get(doc_id, 1.0)
+        return sorted(combined_scores.items(), key=lambda x: x[1], reverse=True)[:n_results]
+
+    def _fetch(self, doc_ids):
+        """doc_id -> (content, metadata) with one collection.get"""
+        if not doc_ids:
+            return {}
+        doc_data = self.collection.get(ids=list(doc_ids))
+        return {
+            doc_id: (content, metadata)
+            for doc_id, content, metadata in zip(
+                doc_data['ids'], self._chunk_texts(doc_data), doc_data['metadatas']
+            )
+        }
+
+    def _results(self, ranked, semantic_scores, keyword_scores, fetched):
+        results = []
+        for doc_id, combined_score in ranked:
+            if doc_id in fetched:
+                content, metadata = fetched[doc_id]
+                results.append({
+                    'id': doc_id,
+                    'content': content,
+                    'metadata': metadata,
+                    'semantic_score': semantic_scores.get(doc_id, 0.0),
+                    'keyword_score': keyword_scores.get(doc_id, 0.0),
+                    'combined_score': combined_score
+                })
+        return results
+
+    def hybrid_search_batch(self, queries, n_results=5, semantic_weight=0.5):
+        """
+        Hybrid search for many queries
+
+        Returns:
+            One result list per query, with the same dicts as hybrid_search
+        """
+        queries = list(queries)
+        if n_results <= 0:
+            return [[] for _ in queries]
+
+        all_results = []
+        for start in range(0, len(queries), self.QUERY_BATCH_SIZE):
+            batch = queries[start:start + self.QUERY_BATCH_SIZE]
+            semantic = self.semantic_search_batch(batch, n_results=n_results * 2)
+            keyword = self.keyword_search_batch(batch, n_results=n_results * 2)
+
+            ranked = [
+                self._combine(sem, key, n_results, semantic_weight)
+                for sem, key in zip(semantic, keyword)
+            ]
+            # One get for the whole batch's result chunks
+            fetched = self._fetch({doc_id for ranking in ranked for doc_id, _ in ranking})
+            all_results.extend(
+                self._results(ranking, sem, key, fetched)
+                for ranking, sem, key in zip(ranked, semantic, keyword)
+            )
+        return all_results
+
     def hybrid_search(self, query, n_results=5, semantic_weight=0.5):
         """
         Hybrid search combining semantic and keyword
@@ -105,46 +304,11 @@ class HybridSearchEngine:
         print(f"📊 Semantic search found: {len(semantic_scores)} results")
         print(f"📊 Keyword search found: {len(keyword_scores)} results\n")
         
-        # Combine scores
-        combined_scores = {}
-        
-        # Get all unique doc IDs
-        all_doc_ids = set(semantic_scores.keys()) | set(keyword_scores.keys())
+        # Combine scores and get the full documents (one get for all)
+        sorted_ids = self._combine(semantic_scores, keyword_scores, n_results, semantic_weight)
+        fetched = self._fetch([doc_id for doc_id, _ in sorted_ids])
         
-        for doc_id in all_doc_ids:
-            sem_score = semantic_scores.get(doc_id, 0.0)
-            key_score = keyword_scores.get(doc_id, 0.0)
-            
-            # Weighted combination
-            combined_scores[doc_id] = (
-                semantic_weight * sem_score + 
-                keyword_weight * key_score
-            )
-        
-        # Sort by combined score
-        sorted_ids = sorted(
-            combined_scores.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:n_results]
-        
-        # Get full documents
-        results = []
-        for doc_id, combined_score in sorted_ids:
-            # Get document from ChromaDB
-            doc_data = self.collection.get(ids=[doc_id])
-            
-            if doc_data['documents']:
-                results.append({
-                    'id': doc_id,
-                    'content': doc_data['documents'][0],
-                    'metadata': doc_data['metadatas'][0],
-                    'semantic_score': semantic_scores.get(doc_id, 0.0),
-                    'keyword_score': keyword_scores.get(doc_id, 0.0),
-                    'combined_score': combined_score
-                })
-        
-        return results
+        return self._results(sorted_ids, semantic_scores, keyword_scores, fetched)
 
 # Test the hybrid search
 if __name__ == "__main__":
@@ -152,6 +316,8 @@ if __name__ == "__main__":
     print("HYBRID SEARCH ENGINE TEST")
     print("="*60 + "\n")
     
+    import chromadb
+
     # Create test ChromaDB collection
     client = chromadb.Client()
     collection = client.create_collection("test_hybrid")
@@ -207,6 +373,15 @@ if __name__ == "__main__":
         print(f"   Semantic: {result['semantic_score']:.3f} | Keyword: {result['keyword_score']:.3f} | Combined: {result['combined_score']:.3f}")
         print()
     
+    print("METHOD 4: Batch (all queries at once)")
+    print("-"*60)
+    queries = [query, "vector databases for semantic search", "machine learning engineer"]
+    for q, results in zip(queries, hybrid_engine.hybrid_search_batch(queries, n_results=2)):
+        print(f"{q}")
+        for result in results:
+            print(f"   - {result['content'][:60]}... ({result['combined_score']:.3f})")
+        print()
+    
     print("="*60)
     print("✅ HYBRID SEARCH WORKING!")
     print("="*60)
@@ -0,0 +1,896 @@
+import os
+import time
+import hashlib
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+
+from universal_loader import UniversalDocumentLoader
+from file_manifest import file_sha256
+from chunking import chunk_blocks
+from parent_child import ParentChildChunker
+
+# Marks the end of the stream between stages
+_DONE = object()
+
+
+def _parse_file(filepath, known_sha256=None, extraction_cache=None, pdf_workers=1):
+    """
+    Hash and parse one file in a worker process
+    (must stay module-level to pickle)
+
+    If the content hash matches known_sha256 the file is not parsed.
+    Streamed files (CSVs, large PDFs) are only hashed here; the chunk
+    stage reads them lazily so they never have to fit in memory. With an
+    ExtractionCache, files parsed before are not parsed again. Large
+    PDFs are split over pdf_workers extra processes.
+    """
+    start = time.time()
+    ext = Path(filepath).suffix.lower()
+    result = {
+        'path': str(filepath),
+        'blocks': None,
+        'file_type': ext,
+        'error': None,
+        'unchanged': False,
+        'cache_hit': False,
+        'parser': None,
+        'strategy_seconds': 0.0,
+        'streamed': False
+    }
+
+    try:
+        stat = os.stat(filepath)
+        result['size'] = stat.st_size
+        result['mtime'] = stat.st_mtime
+        result['sha256'] = file_sha256(filepath)
+
+        if result['sha256'] == known_sha256:
+            result['unchanged'] = True
+        elif UniversalDocumentLoader.is_streamed(filepath):
+            result['streamed'] = True
+        else:
+            if extraction_cache is not None:
+                result['blocks'] = extraction_cache.get(result['sha256'], ext)
+                result['cache_hit'] = result['blocks'] is not None
+
+            if result['blocks'] is None:
+                blocks, result['file_type'] = UniversalDocumentLoader.load_blocks(filepath, pdf_workers)
+                result['blocks'] = list(blocks)
+                if result['blocks']:
+                    # e.g. the PDF extractor picked by choose_pdf_strategy
+                    result['parser'] = result['blocks'][0][1].get('pdf_parser')
+                    result['strategy_seconds'] = result['blocks'][0][1].get('pdf_strategy_seconds', 0.0)
+                if extraction_cache is not None and result['blocks']:
+                    extraction_cache.put(result['sha256'], ext, result['blocks'])
+    except Exception as e:
+        result['error'] = str(e)
+
+    result['seconds'] = time.time() - start
+    return result
+
+
+def make_chunk_id(filepath, sha256, index):
+    """
+    Chunk ID tied to the file's location and content, so re-runs never
+    collide with (or duplicate) chunks of an earlier version
+    """
+    path_key = hashlib.sha1(str(Path(filepath).resolve()).encode('utf-8')).hexdigest()[:8]
+    return f"{Path(filepath).name}_{path_key}_{sha256[:12]}_{index}"
+
+
+def make_source_chunk_id(source, text):
+    """
+    Chunk ID tied to a source identity (file path, uploaded file name,
+    URL, ...) and the chunk's own text
+    """
+    source_key = hashlib.sha1(str(source).encode('utf-8')).hexdigest()[:8]
+    text_key = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+    return f"{Path(str(source)).name}_{source_key}_c{text_key}"
+
+
+def make_content_chunk_id(filepath, text):
+    """
+    Chunk ID tied to the file's location and the chunk's own text, so a
+    chunk keeps its ID when other parts of the file are edited
+    """
+    return make_source_chunk_id(Path(filepath).resolve(), text)
+
+
+def persist_collection(collection):
+    """
+    In-process indexes (vector_index.MatrixVectorIndex) are written to
+    disk once per batch of writes; Chroma collections persist on their own
+    """
+    persist = getattr(collection, 'persist', None)
+    if callable(persist):
+        persist()
+
+
+# Chunks per update/delete call (nothing is embedded, so batches can be large)
+METADATA_BATCH_SIZE = 1000
+
+
+def upsert_document(collection, source, chunks, metadatas=None, source_field="filename",
+                    batch_size=64, embedding_function=None, ignore_fields=()):
+    """
+    Idempotently write all chunks of one document (e.g. an uploaded file)
+
+    Chunk IDs come from the source and each chunk's text, so writing the
+    same document again only costs one collection.get:
+    - chunks already stored are not embedded again (their metadata is
+      rewritten only if it changed)
+    - new chunks are added in batches of batch_size
+    - stored chunks of the source that are not in this version (older
+      edits, or copies uploaded under other IDs) are deleted
+
+    Args:
+        collection: ChromaDB collection (or MatrixVectorIndex)
+        source: Source identity, e.g. the uploaded file name
+        chunks: Chunk texts of the whole document
+        metadatas: One metadata dict per chunk (source_field is set to source)
+        source_field: Metadata field holding the source
+        batch_size: Chunks per add call - use the embedder's batch size
+        embedding_function: Optional callable(list[str]) -> embeddings.
+                            If None, ChromaDB embeds inside add().
+        ignore_fields: Metadata fields whose change alone doesn't trigger
+                       an update (e.g. "upload_date")
+
+    Returns:
+        {'added': n, 'updated': n, 'unchanged': n, 'deleted': n}
+    """
+    chunks = list(chunks)
+    metadatas = [{**(m or {}), source_field: str(source)} for m in (metadatas or [{}] * len(chunks))]
+
+    ids = []
+    occurrences = {}
+    for text in chunks:
+        chunk_id = make_source_chunk_id(source, text)
+        # Repeated text within the document gets numbered
+        occurrence = occurrences.get(chunk_id, 0)
+        occurrences[chunk_id] = occurrence + 1
+        ids.append(f"{chunk_id}_{occurrence}" if occurrence else chunk_id)
+
+    stored = collection.get(where={source_field: str(source)}, include=['metadatas'])
+    stored = dict(zip(stored['ids'], stored['metadatas']))
+
+    def relevant(metadata):
+        return {k: v for k, v in (metadata or {}).items() if k not in ignore_fields}
+
+    new = [i for i, chunk_id in enumerate(ids) if chunk_id not in stored]
+    changed = [
+        i for i, chunk_id in enumerate(ids)
+        if chunk_id in stored and relevant(stored[chunk_id]) != relevant(metadatas[i])
+    ]
+    current = set(ids)
+    stale = [chunk_id for chunk_id in stored if chunk_id not in current]
+
+    for start in range(0, len(new), batch_size):
+        batch = new[start:start + batch_size]
+        kwargs = {
+            'ids': [ids[i] for i in batch],
+            'documents': [chunks[i] for i in batch],
+            'metadatas': [metadatas[i] for i in batch]
+        }
+        if embedding_function is not None:
+            kwargs['embeddings'] = embedding_function(kwargs['documents'])
+        collection.add(**kwargs)
+
+    for start in range(0, len(changed), METADATA_BATCH_SIZE):
+        batch = changed[start:start + METADATA_BATCH_SIZE]
+        collection.update(ids=[ids[i] for i in batch], metadatas=[metadatas[i] for i in batch])
+
+    for start in range(0, len(stale), METADATA_BATCH_SIZE):
+        collection.delete(ids=stale[start:start + METADATA_BATCH_SIZE])
+
+    persist_collection(collection)
+
+    return {
+        'added': len(new),
+        'updated': len(changed),
+        'unchanged': len(ids) - len(new) - len(changed),
+        'deleted': len(stale)
+    }
+
+
+class StageCounter:
+    """Thread-safe throughput counter for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, items, seconds):
+        with self._lock:
+            if self.started is None:
+                self.started = time.time() - seconds
+            self.items += items
+            self.busy_seconds += seconds
+            self.finished = time.time()
+
+    def get_stats(self):
+        """Return items, busy time and wall-clock throughput"""
+        wall = (self.finished - self.started) if self.started else 0.0
+        return {
+            'stage': self.name,
+            'items': self.items,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'wall_seconds': round(wall, 3),
+            'items_per_sec': round(self.items / wall, 2) if wall > 0 else 0.0
+        }
+
+
+class IngestPipeline:
+    """
+    Pipelined multi-file ingestion:
+
+    1. Parse  - files are parsed in a process pool (CPU-bound)
+    2. Chunk  - parsed documents are split into chunks
+    3. Embed  - chunks are embedded and written with batched collection.add
+
+    Stages are connected by bounded queues, so a slow stage applies
+    back-pressure instead of letting memory grow.
+
+    With a FileManifest, unchanged files are skipped, changed files have
+    their old chunks replaced and removed files have their chunks deleted.
+    """
+
+    def __init__(self, collection, text_splitter, workers=None, queue_size=64,
+                 batch_size=64, embedding_function=None, manifest=None,
+                 extraction_cache=None, dedup=None, parent_store=None,
+                 document_store=None, chunk_filter=None, content_ids=False):
+        """
+        Args:
+            collection: ChromaDB collection to write into
+            text_splitter: StreamingChunker, or any splitter with a
+                           split_text(text) method
+            workers: Parser processes (default: all cores)
+            queue_size: Max items waiting between two stages
+            batch_size: Chunks per collection.add call
+            embedding_function: Optional callable(list[str]) -> embeddings.
+                                If None, ChromaDB embeds inside add().
+            manifest: Optional FileManifest for incremental re-indexing
+            extraction_cache: Optional ExtractionCache shared with the workers
+            dedup: Optional NearDuplicateIndex - near-duplicate chunks are
+                   not embedded or stored
+            parent_store: ParentStore for the parents, required when
+                          text_splitter is a ParentChildChunker
+            document_store: Optional DocumentStore - documents are stored
+                            once and chunks only as offsets into them
+                            (needs embedding_function and a StreamingChunker
+                            or ParentChildChunker)
+            chunk_filter: Optional ChunkQualityFilter - low-information
+                          chunks are dropped (or down-weighted) before
+                          they are embedded
+            content_ids: Derive chunk IDs from the chunk text instead of
+                         the file version. Chunks whose text survived an
+                         edit keep their ID and only get their metadata
+                         updated - no re-embedding. Pays off with
+                         ContentDefinedChunker, whose boundaries don't
+                         shift when text is inserted.
+        """
+        if isinstance(text_splitter, ParentChildChunker) and parent_store is None:
+            raise ValueError("ParentChildChunker needs a parent_store")
+        if document_store is not None:
+            if embedding_function is None:
+                raise ValueError("Offset storage needs an embedding_function (chunks are stored without text)")
+            if not hasattr(text_splitter, 'block_separator'):
+                raise ValueError("Offset storage needs a chunker that records offsets")
+
+        self.collection = collection
+        self.text_splitter = text_splitter
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.embedding_function = embedding_function
+        self.manifest = manifest
+        self.extraction_cache = extraction_cache
+        self.dedup = dedup
+        self.parent_store = parent_store
+        self.document_store = document_store
+        self.chunk_filter = chunk_filter
+        self.content_ids = content_ids
+
+        self.counters = {
+            name: StageCounter(name) for name in ('parse', 'chunk', 'embed')
+        }
+        self.failed = []
+        self.skipped = 0
+        self.cache_hits = 0
+        self.parser_stats = {}
+        self.removed = 0
+        self.deleted = 0
+        self.duplicates = 0
+        self.low_info = 0
+        self.unchanged = 0
+        self._pending_entries = []
+        self._orphaned = set()
+        self._dedup_exclude = set()
+        self._abort = threading.Event()
+
+    # ----- Queue helpers (give up as soon as any stage fails) -----
+
+    def _put(self, q, item):
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _iter_queue(self, q):
+        while not self._abort.is_set():
+            try:
+                item = q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    # ----- Stage 1: parse -----
+
+    def _parse_stage(self, files, out_queue):
+        max_in_flight = self.workers * 2
+        # Cores the file pool leaves idle go to page-parallel PDF
+        # extraction (none when every core already parses a file)
+        pdf_workers = max(1, (os.cpu_count() or 1) // self.workers)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+
+            for filepath in files:
+                if self._abort.is_set():
+                    break
+
+                known_sha256 = None
+                if self.manifest is not None:
+                    if self.manifest.is_unchanged(filepath):
+                        self.skipped += 1
+                        continue
+                    entry = self.manifest.get(filepath)
+                    known_sha256 = entry['sha256'] if entry else None
+
+                pending.add(pool.submit(
+                    _parse_file, filepath, known_sha256, self.extraction_cache, pdf_workers
+                ))
+
+                # Don't read further ahead than the pool can chew
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._emit_parsed(future.result(), out_queue)
+
+            for future in pending:
+                if self._abort.is_set():
+                    future.cancel()
+                    continue
+                self._emit_parsed(future.result(), out_queue)
+
+        self._put(out_queue, _DONE)
+
+    def _emit_parsed(self, result, out_queue):
+        self.counters['parse'].record(1, result['seconds'])
+
+        if result['unchanged']:
+            # Same bytes, new mtime - just refresh the stat info
+            self.manifest.touch(result['path'], result['size'], result['mtime'])
+            self.skipped += 1
+            return
+
+        if result['cache_hit']:
+            self.cache_hits += 1
+
+        if result['parser']:
+            self._record_parser(result['parser'], result['seconds'], result['strategy_seconds'])
+
+        if result['error'] or not (result['streamed'] or result['blocks']):
+            name = Path(result['path']).name
+            self.failed.append((name, result['error'] or 'empty document'))
+            print(f"❌ {name}: {result['error'] or 'empty document'}")
+            return
+
+        self._put(out_queue, result)
+
+    def _record_parser(self, parser, seconds, strategy_seconds):
+        stats = self.parser_stats.setdefault(
+            parser, {'files': 0, 'seconds': 0.0, 'strategy_seconds': 0.0}
+        )
+        stats['files'] += 1
+        stats['seconds'] += seconds
+        stats['strategy_seconds'] += strategy_seconds
+
+    # ----- Stage 2: chunk -----
+
+    def _chunk_stage(self, in_queue, out_queue):
+        upload_date = datetime.now().strftime("%Y-%m-%d")
+
+        for doc in self._iter_queue(in_queue):
+            created = set()
+            try:
+                self._chunk_document(doc, upload_date, out_queue, created)
+            except Exception as e:
+                # One unreadable file must not abort the whole run
+                name = Path(doc['path']).name
+                self.failed.append((name, str(e)))
+                print(f"❌ {name}: {e}")
+                self._discard_document(doc, created, out_queue)
+
+        self._put(out_queue, _DONE)
+
+    def _chunk_document(self, doc, upload_date, out_queue, created):
+        """
+        Chunk one document and forward its records to the embed stage
+
+        Every ID the new version creates is added to created, so a
+        document that fails halfway can be rolled back.
+        """
+        start = doc_start = time.time()
+        filename = Path(doc['path']).name
+
+        first_metadata = {}
+        if doc['streamed']:
+            blocks, _ = UniversalDocumentLoader.load_blocks(doc['path'])
+            blocks = self._peek_metadata(blocks, first_metadata)
+        else:
+            blocks = doc['blocks']
+
+        # Chunks of the previous version of this file are now stale
+        stale_ids = []
+        if self.manifest is not None:
+            entry = self.manifest.get(doc['path'])
+            stale_ids = entry['chunk_ids'] if entry else self._legacy_ids(filename)
+
+        # IDs owned by this file that aren't stored in the collection
+        # (dedup aliases, parents) - recorded so they get cleaned up too
+        owned_ids = []
+
+        # Drop the version of this file being replaced before the new
+        # one comes in (re-parsed identical content reuses the same IDs)
+        if self.parent_store is not None and stale_ids:
+            self.parent_store.delete(stale_ids)
+        if self.document_store is not None and stale_ids:
+            self.document_store.delete(stale_ids)
+
+        # Old IDs this version doesn't produce again. With content IDs
+        # the old chunks are only deleted from the collection at the end.
+        # New chunks are never folded into the version being replaced.
+        stale_pending = set(stale_ids)
+        dedup_exclude = stale_pending | self._dedup_exclude
+        if self.content_ids:
+            stale_ids = []
+
+        # The document text is written once while it streams past the
+        # chunker; chunks then only keep (doc_id, start, end)
+        doc_writer = None
+        if self.document_store is not None:
+            doc_id = make_chunk_id(doc['path'], doc['sha256'], "doc")
+            doc_writer = self.document_store.writer(doc_id)
+            owned_ids.append(doc_id)
+            created.add(doc_id)
+            blocks = self._tee_blocks(blocks, doc_writer)
+
+        if isinstance(self.text_splitter, ParentChildChunker):
+            chunks = self._parent_child_chunks(doc, blocks, owned_ids, stale_pending, created)
+        else:
+            chunks = chunk_blocks(blocks, self.text_splitter)
+
+        # Low-information chunks never get an ID, so nothing to clean up
+        if self.chunk_filter is not None:
+            low_info_before = sum(self.chunk_filter.reasons.values())
+            chunks = self.chunk_filter.apply(chunks, doc['path'])
+
+        records = []
+        n_chunks = 0
+        n_duplicates = 0
+        occurrences = {}
+        for chunk, block_metadata in chunks:
+            if self.content_ids:
+                chunk_id = make_content_chunk_id(doc['path'], chunk)
+                # Repeated text within the file gets numbered
+                occurrence = occurrences.get(chunk_id, 0)
+                occurrences[chunk_id] = occurrence + 1
+                if occurrence:
+                    chunk_id = f"{chunk_id}_{occurrence}"
+            else:
+                chunk_id = make_chunk_id(doc['path'], doc['sha256'], n_chunks)
+            stale_pending.discard(chunk_id)
+            created.add(chunk_id)
+            n_chunks += 1
+
+            if (self.dedup is not None
+                    and self.dedup.add(chunk_id, chunk, doc['path'], dedup_exclude) is not None):
+                owned_ids.append(chunk_id)
+                n_duplicates += 1
+                continue
+
+            records.append((chunk, chunk_id, {
+                "filename": filename,
+                "file_type": doc['file_type'],
+                "chunk_index": n_chunks - 1,
+                "upload_date": upload_date,
+                **block_metadata
+            }))
+            if doc_writer is not None:
+                records[-1][2]["doc_id"] = doc_writer.doc_id
+
+            # Streamed files are forwarded in slices to keep memory flat
+            if doc['streamed'] and len(records) >= self.batch_size:
+                self.counters['chunk'].record(len(records), time.time() - start)
+                self._put(out_queue, {
+                    'records': records, 'owned_ids': list(owned_ids),
+                    'stale_ids': stale_ids, 'doc': doc, 'final': False
+                })
+                records, stale_ids = [], []
+                owned_ids.clear()
+                start = time.time()
+
+        if doc_writer is not None:
+            doc_writer.close()
+
+        # Streamed PDFs are extracted here; their time includes chunking
+        if first_metadata.get('pdf_parser'):
+            self._record_parser(first_metadata['pdf_parser'], time.time() - doc_start,
+                                first_metadata.get('pdf_strategy_seconds', 0.0))
+
+        # Only now that the new chunks are indexed, so aliases of
+        # chunks this version reproduces are not orphaned
+        if self.dedup is not None and stale_pending:
+            self._orphaned |= self.dedup.remove(stale_pending)
+        if self.content_ids:
+            stale_ids = list(stale_pending)
+
+        # total_chunks is only known up front for materialized documents
+        if not doc['streamed']:
+            for record in records:
+                record[2]["total_chunks"] = n_chunks
+
+        self.counters['chunk'].record(len(records), time.time() - start)
+        self.duplicates += n_duplicates
+        notes = []
+        if n_duplicates:
+            notes.append(f"{n_duplicates} near-duplicates skipped")
+        if self.chunk_filter is not None:
+            n_low_info = sum(self.chunk_filter.reasons.values()) - low_info_before
+            self.low_info += n_low_info
+            if n_low_info:
+                action = "dropped" if self.chunk_filter.mode == "drop" else "down-weighted"
+                notes.append(f"{n_low_info} low-information {action}")
+        print(f"✅ {filename}: {n_chunks} chunks" + (f" ({', '.join(notes)})" if notes else ""))
+
+        self._put(out_queue, {
+            'records': records, 'owned_ids': owned_ids,
+            'stale_ids': stale_ids, 'doc': doc, 'final': True
+        })
+
+    def _discard_document(self, doc, created, out_queue):
+        """
+        Roll back a document that failed halfway: the IDs its new version
+        created are removed, its old version and manifest entry are kept
+        """
+        entry = self.manifest.get(doc['path']) if self.manifest is not None else None
+        new_ids = list(created.difference(entry['chunk_ids'] if entry else ()))
+        if self.dedup is not None and new_ids:
+            self._orphaned |= self.dedup.remove(new_ids)
+        if self.parent_store is not None and new_ids:
+            self.parent_store.delete(new_ids)
+        if self.document_store is not None and new_ids:
+            self.document_store.delete(new_ids)
+
+        # Records of it already forwarded are dropped by the embed stage
+        self._put(out_queue, {
+            'records': [], 'owned_ids': [], 'stale_ids': [], 'doc': doc,
+            'final': True, 'discard_ids': new_ids
+        })
+
+    def _legacy_ids(self, filename):
+        """
+        Chunks a file got before the manifest existed ("<filename>_<i>" or
+        "<filename>_chunk_<i>"), so the first manifest run replaces them
+        instead of duplicating them
+        """
+        prefix = f"{filename}_"
+        stored = self.collection.get(where={"filename": filename}, include=[])['ids']
+        return [chunk_id for chunk_id in stored
+                if chunk_id.startswith(prefix)
+                and chunk_id[len(prefix):].removeprefix("chunk_").isdigit()]
+
+    @staticmethod
+    def _peek_metadata(blocks, first_metadata):
+        """Pass blocks through, copying the first block's metadata into first_metadata"""
+        for text, metadata in blocks:
+            if not first_metadata:
+                first_metadata.update(metadata)
+            yield text, metadata
+
+    def _tee_blocks(self, blocks, doc_writer):
+        """Pass blocks through, writing the document text the chunk offsets refer to"""
+        separator = self.text_splitter.block_separator
+        for text, metadata in blocks:
+            if doc_writer.length:
+                doc_writer.write(separator)
+            doc_writer.write(text)
+            yield text, metadata
+
+    def _parent_child_chunks(self, doc, blocks, owned_ids, stale_pending, created):
+        """Store parents as they come and yield their children tagged with parent_id"""
+        parents = []
+        occurrences = {}
+        for i, (parent, parent_metadata, children) in enumerate(self.text_splitter.iter_families(blocks)):
+            # A parent that is its own only child (e.g. CSV rows) isn't stored twice
+            if len(children) == 1 and children[0][0] == parent:
+                yield children[0]
+                continue
+
+            if self.content_ids:
+                # Unchanged parents keep their ID, so their children do too
+                parent_id = make_content_chunk_id(doc['path'], f"parent:{parent}")
+                occurrence = occurrences.get(parent_id, 0)
+                occurrences[parent_id] = occurrence + 1
+                if occurrence:
+                    parent_id = f"{parent_id}_{occurrence}"
+            else:
+                parent_id = make_chunk_id(doc['path'], doc['sha256'], f"p{i}")
+            stale_pending.discard(parent_id)
+            created.add(parent_id)
+            if self.document_store is not None:
+                # Parent text is rebuilt from the document store too
+                parents.append((parent_id, "", {
+                    **parent_metadata, 'doc_id': make_chunk_id(doc['path'], doc['sha256'], "doc")
+                }))
+            else:
+                parents.append((parent_id, parent, parent_metadata))
+            owned_ids.append(parent_id)
+            if len(parents) >= self.batch_size:
+                self.parent_store.put_many(parents)
+                parents = []
+
+            for child, child_metadata in children:
+                yield child, {**child_metadata, 'parent_id': parent_id}
+
+        if parents:
+            self.parent_store.put_many(parents)
+
+    # ----- Stage 3: embed + write -----
+
+    def _write_batch(self, batch):
+        start = time.time()
+        if self.content_ids:
+            batch = self._update_unchanged(batch)
+            if not batch:
+                return
+
+        documents = [r[0] for r in batch]
+        kwargs = {
+            'ids': [r[1] for r in batch],
+            'metadatas': [r[2] for r in batch]
+        }
+        # With offset storage the text lives in the DocumentStore only
+        if self.document_store is None:
+            kwargs['documents'] = documents
+        if self.embedding_function is not None:
+            kwargs['embeddings'] = self.embedding_function(documents)
+
+        self.collection.add(**kwargs)
+        self.counters['embed'].record(len(batch), time.time() - start)
+
+    def _update_unchanged(self, batch):
+        """
+        Chunks already stored under their content ID only get their
+        metadata (offsets, index) refreshed; returns the ones to embed
+        """
+        existing = set(self.collection.get(ids=[r[1] for r in batch], include=[])['ids'])
+        if not existing:
+            return batch
+
+        unchanged = [r for r in batch if r[1] in existing]
+        self.collection.update(
+            ids=[r[1] for r in unchanged],
+            metadatas=[r[2] for r in unchanged]
+        )
+        self.unchanged += len(unchanged)
+        return [r for r in batch if r[1] not in existing]
+
+    def _embed_stage(self, in_queue):
+        batch = []
+        written_ids = {}
+
+        for item in self._iter_queue(in_queue):
+            doc = item['doc']
+            if 'discard_ids' in item:
+                # Failed document - no manifest entry, forwarded chunks go
+                discard = set(item['discard_ids']) & set(written_ids.pop(doc['path'], ()))
+                pending = {r[1] for r in batch}
+                batch = [r for r in batch if r[1] not in discard]
+                self._delete_ids([chunk_id for chunk_id in discard if chunk_id not in pending])
+                continue
+
+            if item['stale_ids']:
+                self._delete_ids(item['stale_ids'])
+
+            ids = written_ids.setdefault(doc['path'], [])
+            ids.extend(r[1] for r in item['records'])
+            ids.extend(item['owned_ids'])
+
+            if item['final']:
+                self._pending_entries.append((
+                    doc['path'], doc['size'], doc['mtime'], doc['sha256'],
+                    written_ids.pop(doc['path'])
+                ))
+
+            batch.extend(item['records'])
+            while len(batch) >= self.batch_size:
+                self._write_batch(batch[:self.batch_size])
+                batch = batch[self.batch_size:]
+
+        if batch and not self._abort.is_set():
+            self._write_batch(batch)
+
+    def _delete_ids(self, ids):
+        self.deleted += len(ids)
+        for i in range(0, len(ids), self.batch_size):
+            self.collection.delete(ids=ids[i:i + self.batch_size])
+
+    # ----- Driver -----
+
+    def run(self, files, prune_removed=True):
+        """
+        Ingest an iterable of file paths
+
+        Args:
+            files: Iterable of file paths
+            prune_removed: With a manifest, delete chunks of files that
+                           no longer exist on disk
+
+        Returns:
+            Dict of per-stage throughput stats
+        """
+        parsed_queue = queue.Queue(maxsize=self.queue_size)
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        self._abort = threading.Event()
+        self._pending_entries = []
+        errors = []
+
+        # Chunks of deleted files are pruned after this run - don't fold
+        # new chunks (e.g. of the same file moved elsewhere) into them
+        self._dedup_exclude = set()
+        if self.dedup is not None and self.manifest is not None and prune_removed:
+            for path in self.manifest.removed_paths():
+                self._dedup_exclude.update(self.manifest.get(path)['chunk_ids'])
+
+        def guarded(stage, *args):
+            try:
+                stage(*args)
+            except Exception as e:
+                errors.append(e)
+                self._abort.set()
+
+        chunker = threading.Thread(
+            target=guarded, args=(self._chunk_stage, parsed_queue, chunk_queue), daemon=True
+        )
+        writer = threading.Thread(
+            target=guarded, args=(self._embed_stage, chunk_queue), daemon=True
+        )
+        chunker.start()
+        writer.start()
+
+        guarded(self._parse_stage, files, parsed_queue)
+
+        chunker.join()
+        writer.join()
+
+        # Workers each enforced the size cap on their own copy of the cache
+        if self.extraction_cache is not None:
+            self.extraction_cache.trim()
+
+        if errors:
+            raise errors[0]
+
+        if self.manifest is not None:
+            self._update_manifest(prune_removed)
+        else:
+            persist_collection(self.collection)
+            if self.dedup is not None:
+                self.dedup.save()
+
+        return self.get_stats()
+
+    def _update_manifest(self, prune_removed):
+        """Record what was written (only after every stage succeeded)"""
+        for path, size, mtime, sha256, chunk_ids in self._pending_entries:
+            self.manifest.record(path, size, mtime, sha256, chunk_ids)
+
+        if prune_removed:
+            for path in self.manifest.removed_paths():
+                stale_ids = self.manifest.forget(path)
+                self._delete_ids(stale_ids)
+                if self.dedup is not None:
+                    self._orphaned |= self.dedup.remove(stale_ids)
+                if self.parent_store is not None:
+                    self.parent_store.delete(stale_ids)
+                if self.document_store is not None:
+                    self.document_store.delete(stale_ids)
+                self.removed += 1
+                print(f"🗑️ {Path(path).name}: removed {len(stale_ids)} chunks")
+
+        # Files whose duplicates pointed at chunks that are gone now must
+        # be parsed again on the next run to get their text stored
+        for path in self._orphaned:
+            if self.manifest.get(path) is not None:
+                self.manifest.invalidate(path)
+                print(f"🔁 {Path(path).name}: queued for re-ingest (canonical chunks removed)")
+        self._orphaned = set()
+
+        # The manifest must never list chunks the index hasn't saved
+        persist_collection(self.collection)
+        self.manifest.save()
+        if self.dedup is not None:
+            self.dedup.save()
+
+    def get_stats(self):
+        """Per-stage throughput counters"""
+        return {name: counter.get_stats() for name, counter in self.counters.items()}
+
+    def print_stats(self):
+        print("\n📊 Pipeline throughput:")
+        for stats in self.get_stats().values():
+            print(f"   {stats['stage']:>6}: {stats['items']} items | "
+                  f"{stats['items_per_sec']}/s | busy {stats['busy_seconds']}s")
+        if self.manifest is not None:
+            print(f"   ⏭️ {self.skipped} unchanged files skipped | "
+                  f"🗑️ {self.removed} removed files pruned")
+        if self.extraction_cache is not None:
+            print(f"   💾 {self.cache_hits} files served from the extraction cache")
+        for parser, stats in self.parser_stats.items():
+            print(f"   📄 {parser}: {stats['files']} PDFs in {stats['seconds']:.2f}s "
+                  f"({stats['strategy_seconds']:.2f}s choosing the parser)")
+        if self.dedup is not None:
+            stats = self.dedup.get_stats()
+            print(f"   ♻️ {self.duplicates} near-duplicate chunks not stored | "
+                  f"{stats['canonical_chunks']} canonical, {stats['aliases']} aliases indexed")
+        if self.content_ids:
+            print(f"   🧩 {self.unchanged} unchanged chunks kept without re-embedding")
+        if self.chunk_filter is not None:
+            action = "dropped" if self.chunk_filter.mode == "drop" else "down-weighted"
+            print(f"   🧹 {self.low_info} low-information chunks {action} "
+                  f"(see chunk_filter.print_report())")
+        if self.document_store is not None:
+            stats = self.document_store.get_stats()
+            print(f"   🗜️ {stats['documents']} documents stored once as chunk offsets "
+                  f"({stats['stored_mb']} MB, {stats['compression']}x compressed)")
+        if self.failed:
+            print(f"   ⚠️ {len(self.failed)} files failed")
+        print()
+
+
+# Test
+if __name__ == "__main__":
+    print("=" * 60)
+    print("INGEST PIPELINE TEST")
+    print("=" * 60 + "\n")
+
+    import chromadb
+    from chunking import StreamingChunker
+
+    client = chromadb.Client()
+    collection = client.create_collection("test_pipeline")
+    splitter = StreamingChunker(chunk_size=500, chunk_overlap=50)
+
+    files = [
+        f for f in Path('.').iterdir()
+        if f.suffix.lower() in UniversalDocumentLoader.get_supported_formats()
+        and not f.name.startswith("~$")
+    ]
+
+    pipeline = IngestPipeline(collection, splitter)
+    pipeline.run(files)
+    pipeline.print_stats()
+
+    print(f"✅ Collection now holds {collection.count()} chunks")
+    client.delete_collection("test_pipeline")
@@ -0,0 +1,297 @@
+import os
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+
+_WORDS = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH index for spotting near-identical chunks at ingest time
+
+    Chunks are reduced to word shingles (case, punctuation and email
+    quote markers ignored) and a MinHash signature. Banded LSH buckets
+    find candidates in O(1); candidates are confirmed by the estimated
+    Jaccard similarity.
+
+    A duplicate is either dropped (mode="drop") or remembered as an alias
+    of its canonical chunk (mode="alias"), so the sources it came from
+    are still known. Only canonical chunks get embedded and stored.
+    """
+
+    def __init__(self, index_path=None, threshold=0.85, num_perm=128, bands=16,
+                 shingle_size=3, mode="alias", seed=1):
+        """
+        Args:
+            index_path: Optional .npz file to persist the index in
+            threshold: Min estimated Jaccard similarity for a duplicate
+            num_perm: MinHash permutations (signature length)
+            bands: LSH bands (num_perm must be divisible by bands)
+            shingle_size: Words per shingle
+            mode: "alias" (remember duplicates) or "drop"
+            seed: Seed for the hash permutations
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        if mode not in ("alias", "drop"):
+            raise ValueError("mode must be 'alias' or 'drop'")
+
+        self.index_path = Path(index_path) if index_path else None
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.mode = mode
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self.signatures = {}    # canonical chunk id -> signature
+        self.aliases = {}       # duplicate chunk id -> (canonical id, source path)
+        self._buckets = {}      # (band, band bytes) -> set of chunk ids
+
+        self.duplicates = 0
+        self.chars_saved = 0
+        self.chars_seen = 0
+
+        if self.index_path is not None and self.index_path.exists():
+            self.load()
+
+    # ----- MinHash -----
+
+    def shingles(self, text):
+        words = _WORDS.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {
+            " ".join(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, text):
+        """MinHash signature (uint32 array of length num_perm)"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        # (a * h + b) mod p for every permutation at once
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(sig_a == sig_b))
+
+    def _band_keys(self, signature):
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    # ----- Index -----
+
+    def find(self, text=None, signature=None, exclude=()):
+        """Return the id of a near-duplicate canonical chunk (not in exclude), or None"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best_id, best_score = None, self.threshold
+        for chunk_id in candidates.difference(exclude):
+            score = self.similarity(signature, self.signatures[chunk_id])
+            if score >= best_score:
+                best_id, best_score = chunk_id, score
+        return best_id
+
+    def add(self, chunk_id, text, source=None, exclude=()):
+        """
+        Index a chunk, unless it is a near-duplicate of one already indexed
+
+        Args:
+            chunk_id: ID the chunk would be stored under
+            text: Chunk text
+            source: Path of the file the chunk came from
+            exclude: Canonical IDs that must not be matched (e.g. chunks
+                     of the file version being replaced)
+
+        Returns:
+            The canonical chunk ID if this chunk is a duplicate, else None
+        """
+        self.chars_seen += len(text)
+        # Re-ingested chunk that is already canonical under the same ID
+        if chunk_id in self.signatures:
+            return None
+
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        canonical = self.find(signature=signature, exclude=exclude)
+        if canonical is not None:
+            self.duplicates += 1
+            self.chars_saved += len(text)
+            if self.mode == "alias":
+                self.aliases[chunk_id] = (canonical, str(source) if source else "")
+            return canonical
+
+        self.signatures[chunk_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(chunk_id)
+        return None
+
+    def remove(self, chunk_ids):
+        """
+        Forget chunks (e.g. of a changed or deleted file)
+
+        Returns:
+            Source paths of aliases whose canonical chunk was removed -
+            those files need to be ingested again to get their text back
+        """
+        removed = set()
+        for chunk_id in chunk_ids:
+            self.aliases.pop(chunk_id, None)
+            signature = self.signatures.pop(chunk_id, None)
+            if signature is None:
+                continue
+            removed.add(chunk_id)
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(chunk_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+        orphaned = set()
+        if removed:
+            for alias_id, (canonical, source) in list(self.aliases.items()):
+                if canonical in removed:
+                    del self.aliases[alias_id]
+                    if source:
+                        orphaned.add(source)
+        return orphaned
+
+    def aliases_of(self, canonical_id):
+        """Duplicate chunk IDs folded into a canonical chunk"""
+        return [a for a, (c, _) in self.aliases.items() if c == canonical_id]
+
+    def sources_of(self, canonical_id):
+        """Source paths of the duplicates folded into a canonical chunk"""
+        return sorted({s for c, s in self.aliases.values() if c == canonical_id and s})
+
+    # ----- Persistence -----
+
+    def save(self):
+        """Write atomically (ids, signatures and aliases in one .npz)"""
+        if self.index_path is None:
+            return
+
+        ids = list(self.signatures)
+        signatures = (
+            np.stack([self.signatures[i] for i in ids])
+            if ids else np.zeros((0, self.num_perm), dtype=np.uint32)
+        )
+        alias_ids = list(self.aliases)
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                ids=np.array(ids, dtype=str),
+                signatures=signatures,
+                alias_ids=np.array(alias_ids, dtype=str),
+                alias_canonical=np.array([self.aliases[a][0] for a in alias_ids], dtype=str),
+                alias_sources=np.array([self.aliases[a][1] for a in alias_ids], dtype=str)
+            )
+        os.replace(tmp_path, self.index_path)
+
+    def load(self):
+        with np.load(self.index_path, allow_pickle=False) as data:
+            if data['signatures'].shape[1:] not in ((self.num_perm,), (0,)):
+                # Saved with other settings - start over
+                return
+            self.signatures = {}
+            self._buckets = {}
+            for chunk_id, signature in zip(data['ids'].tolist(), data['signatures']):
+                self.signatures[chunk_id] = signature
+                for key in self._band_keys(signature):
+                    self._buckets.setdefault(key, set()).add(chunk_id)
+            self.aliases = {
+                a: (c, s) for a, c, s in zip(
+                    data['alias_ids'].tolist(),
+                    data['alias_canonical'].tolist(),
+                    data['alias_sources'].tolist()
+                )
+            }
+
+    def clear(self):
+        self.signatures = {}
+        self.aliases = {}
+        self._buckets = {}
+        if self.index_path is not None:
+            self.index_path.unlink(missing_ok=True)
+
+    def get_stats(self):
+        return {
+            'canonical_chunks': len(self.signatures),
+            'aliases': len(self.aliases),
+            'duplicates': self.duplicates,
+            'chars_saved': self.chars_saved,
+            'saved_pct': round(100 * self.chars_saved / self.chars_seen, 1) if self.chars_seen else 0.0
+        }
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    print("=" * 60)
+    print("NEAR-DUPLICATE DETECTION TEST")
+    print("=" * 60 + "\n")
+
+    chunks = [
+        ("a", "PAiKA indexes your documents and answers questions about them."),
+        ("b", "PAiKA indexes your documents, and answers questions about them!"),
+        ("c", "> PAiKA indexes your documents and answers questions about them."),
+        ("d", "BM25 and semantic scores are combined before re-ranking."),
+    ]
+
+    index = NearDuplicateIndex()
+    for chunk_id, text in chunks:
+        canonical = index.add(chunk_id, text, source="demo.txt")
+        status = f"duplicate of {canonical}" if canonical else "new"
+        print(f"   {chunk_id}: {status}")
+
+    # Throughput on a synthetic corpus with repeated boilerplate
+    rng = np.random.RandomState(0)
+    vocab = [f"w{i}" for i in range(5000)]
+    footer = "Confidential - do not forward. Sent from the PAiKA mail gateway."
+    texts = [" ".join(rng.choice(vocab, 80)) for _ in range(2000)]
+    texts += [footer] * 500
+
+    index = NearDuplicateIndex()
+    start = time.time()
+    for i, text in enumerate(texts):
+        index.add(f"chunk_{i}", text)
+    elapsed = time.time() - start
+
+    print(f"\n⚡ {len(texts)} chunks in {elapsed:.2f}s ({len(texts) / elapsed:.0f}/s)")
+    print(f"📊 {index.get_stats()}")
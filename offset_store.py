@@ -0,0 +1,231 @@
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class DocumentWriter:
+    """Appends one document's text to a DocumentStore, segment by segment"""
+
+    def __init__(self, store, doc_id):
+        self.store = store
+        self.doc_id = doc_id
+        self.length = 0
+        self._parts = []
+        self._part_chars = 0
+        self._segment_start = 0
+
+    def write(self, text):
+        if not text:
+            return
+        self._parts.append(text)
+        self._part_chars += len(text)
+        self.length += len(text)
+        if self._part_chars >= self.store.segment_chars:
+            self._flush()
+
+    def _flush(self):
+        if not self._parts:
+            return
+        text = "".join(self._parts)
+        self.store._put_segment(self.doc_id, self._segment_start, text)
+        self._segment_start += len(text)
+        self._parts = []
+        self._part_chars = 0
+
+    def close(self):
+        self._flush()
+        self.store._commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DocumentStore:
+    """
+    Every source document stored once, compressed, in a SQLite file
+
+    Chunks no longer carry their own text: they are (doc_id, start, end)
+    character offsets into the stored document (what StreamingChunker
+    records as start_offset/end_offset), and their text is rebuilt on
+    demand. Overlapping chunks share the same stored characters.
+
+    Documents are split into independently compressed segments, so a
+    lookup decompresses only the segments the chunk spans - even for a
+    multi-GB CSV - and recently used segments stay in a small LRU cache.
+    """
+
+    def __init__(self, db_path="./paika_documents.db", segment_chars=256 * 1024,
+                 cache_segments=64, level=6):
+        """
+        Args:
+            db_path: SQLite file
+            segment_chars: Characters per compressed segment
+            cache_segments: Decompressed segments kept in memory
+            level: zlib compression level
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.segment_chars = segment_chars
+        self.cache_segments = cache_segments
+        self.level = level
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "doc_id TEXT, seg_start INTEGER, seg_end INTEGER, data BLOB, "
+                "PRIMARY KEY (doc_id, seg_start))"
+            )
+            self._conn.commit()
+
+    # ----- Writing -----
+
+    def writer(self, doc_id):
+        """Stream a document in (replaces any earlier version of doc_id)"""
+        self.delete([doc_id])
+        return DocumentWriter(self, doc_id)
+
+    def put(self, doc_id, text):
+        with self.writer(doc_id) as writer:
+            writer.write(text)
+
+    def _put_segment(self, doc_id, seg_start, text):
+        data = zlib.compress(text.encode('utf-8'), self.level)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?)",
+                (doc_id, seg_start, seg_start + len(text), data)
+            )
+
+    def _commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    # ----- Reading -----
+
+    def _segments(self, doc_id, start, end):
+        """Decompressed (seg_start, text) segments overlapping [start, end)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seg_start FROM segments "
+                "WHERE doc_id = ? AND seg_end > ? AND seg_start < ? ORDER BY seg_start",
+                (doc_id, start, end)
+            ).fetchall()
+
+            segments = []
+            for (seg_start,) in rows:
+                key = (doc_id, seg_start)
+                text = self._cache.get(key)
+                if text is None:
+                    (data,) = self._conn.execute(
+                        "SELECT data FROM segments WHERE doc_id = ? AND seg_start = ?", key
+                    ).fetchone()
+                    text = zlib.decompress(data).decode('utf-8')
+                    self._cache[key] = text
+                    if len(self._cache) > self.cache_segments:
+                        self._cache.popitem(last=False)
+                else:
+                    self._cache.move_to_end(key)
+                segments.append((seg_start, text))
+        return segments
+
+    def chunk_text(self, doc_id, start, end):
+        """Text of one chunk (only the chunk itself is copied)"""
+        parts = [
+            text[max(start - seg_start, 0):end - seg_start]
+            for seg_start, text in self._segments(doc_id, start, end)
+        ]
+        return parts[0] if len(parts) == 1 else "".join(parts)
+
+    def resolve(self, metadatas):
+        """
+        Chunk texts for a list of chunk metadatas
+
+        Metadatas without a doc_id (chunks stored with their text) map to None.
+        """
+        return [
+            self.chunk_text(m['doc_id'], m['start_offset'], m['end_offset'])
+            if m and 'doc_id' in m else None
+            for m in metadatas
+        ]
+
+    def document_text(self, doc_id):
+        return "".join(text for _, text in self._segments(doc_id, 0, 1 << 62))
+
+    # ----- Housekeeping -----
+
+    def delete(self, doc_ids):
+        doc_ids = list(doc_ids)
+        with self._lock:
+            for i in range(0, len(doc_ids), 500):
+                batch = doc_ids[i:i + 500]
+                self._conn.execute(
+                    f"DELETE FROM segments WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+                )
+            self._conn.commit()
+            removed = set(doc_ids)
+            for key in [k for k in self._cache if k[0] in removed]:
+                del self._cache[key]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM segments")
+            self._conn.commit()
+            self._cache.clear()
+
+    def get_stats(self):
+        with self._lock:
+            docs, chars, stored = self._conn.execute(
+                "SELECT COUNT(DISTINCT doc_id), COALESCE(SUM(seg_end - seg_start), 0), "
+                "COALESCE(SUM(LENGTH(data)), 0) FROM segments"
+            ).fetchone()
+        return {
+            'documents': docs,
+            'chars': chars,
+            'stored_bytes': stored,
+            'stored_mb': round(stored / (1024 * 1024), 2),
+            'compression': round(chars / stored, 2) if stored else 0.0
+        }
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+    from universal_loader import UniversalDocumentLoader
+    from chunking import StreamingChunker
+
+    print("=" * 60)
+    print("OFFSET-BASED CHUNK STORAGE TEST")
+    print("=" * 60 + "\n")
+
+    pdf_files = list(Path('.').glob('*.pdf'))
+    if not pdf_files:
+        print("⚠️  No PDF found to test with!")
+    else:
+        chunker = StreamingChunker(500, 50)
+        blocks, _ = UniversalDocumentLoader.load_blocks(pdf_files[0])
+        blocks = list(blocks)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = DocumentStore(Path(tmp) / "documents.db")
+            store.put("doc", chunker.block_separator.join(text for text, _ in blocks))
+
+            chunks = list(chunker.chunk_blocks(iter(blocks)))
+            rebuilt = store.resolve([{**m, 'doc_id': 'doc'} for _, m in chunks])
+            assert rebuilt == [text for text, _ in chunks]
+
+            chunk_chars = sum(len(text) for text, _ in chunks)
+            stats = store.get_stats()
+            print(f"📄 {pdf_files[0].name}: {len(chunks)} chunks")
+            print(f"   Chunk text stored per chunk: {chunk_chars / 1024:.1f} KB")
+            print(f"   Document stored once:        {stats['stored_bytes'] / 1024:.1f} KB "
+                  f"(compressed {stats['compression']}x)")
+
+    print("\n✅ Offset storage working!")
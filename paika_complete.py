@@ -18,9 +18,10 @@ import logging
 import traceback
 
 # Document loaders
-import PyPDF2
-from docx import Document as DocxDocument
-from io import BytesIO
+from universal_loader import UniversalDocumentLoader
+from extraction_cache import ExtractionCache
+from embeddings import get_embedding_function
+from ingest_pipeline import upsert_document
 
 load_dotenv()
 
@@ -113,10 +114,19 @@ def load_groq_client():
     return Groq(api_key=api_key)
 
 
+@st.cache_resource(show_spinner=False)
+def load_embedding_function():
+    """Shared embedding model for uploads and queries (PAIKA_EMBED_* settings)"""
+    return get_embedding_function()
+
 @st.cache_resource(show_spinner=False)
 def load_reranker_model():
     return CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
 
+@st.cache_resource(show_spinner=False)
+def load_extraction_cache():
+    return ExtractionCache()
+
 @st.cache_resource(show_spinner=False)
 def load_text_splitter():
     return RecursiveCharacterTextSplitter(
@@ -135,12 +145,11 @@ def process_file_content(file_bytes, filename):
         if ext in ['.txt', '.md']:
             return file_bytes.decode('utf-8'), ext
         elif ext == '.pdf':
-            pdf = PyPDF2.PdfReader(BytesIO(file_bytes))
-            content = "\n".join([page.extract_text() for page in pdf.pages])
+            # Large PDFs are split across worker processes page-parallel
+            content = UniversalDocumentLoader.load_pdf(file_bytes)
             return content, ext
         elif ext == '.docx':
-            doc = DocxDocument(BytesIO(file_bytes))
-            content = "\n".join([p.text for p in doc.paragraphs])
+            content = UniversalDocumentLoader.load_docx(file_bytes)
             return content, ext
     except Exception as e:
         logger.error(f"Error processing {filename}: {e}")
@@ -148,6 +157,21 @@ def process_file_content(file_bytes, filename):
     
     return None, None
 
+def process_file_cached(file_bytes, filename):
+    """Skip parsing for files seen before (disk cache keyed by content hash)"""
+    ext = Path(filename).suffix.lower()
+    content_hash = ExtractionCache.content_hash(file_bytes)
+
+    content = extraction_cache.get(content_hash, ext, kind="text")
+    if content is not None:
+        st.session_state.performance_stats['cache_hits'] += 1
+        return content, ext
+
+    content, file_type = process_file_content(file_bytes, filename)
+    if content:
+        extraction_cache.put(content_hash, ext, content, kind="text")
+    return content, file_type
+
 def load_usage_log():
     try:
         with open('./usage_log.json', 'r') as f:
@@ -165,11 +189,14 @@ chroma_client = load_chroma_client()
 groq_client = load_groq_client()
 reranker = load_reranker_model()
 text_splitter = load_text_splitter()
+extraction_cache = load_extraction_cache()
+
+embedder = load_embedding_function()
 
 try:
-    collection = chroma_client.get_collection("paika_complete")
+    collection = chroma_client.get_collection("paika_complete", embedding_function=embedder)
 except:
-    collection = chroma_client.create_collection("paika_complete")
+    collection = chroma_client.create_collection("paika_complete", embedding_function=embedder)
 
 # Session state
 if 'messages' not in st.session_state:
@@ -244,29 +271,30 @@ with st.sidebar:
                     status.info(f"⚙️ Processing {file.name}...")
                     
                     file_bytes = file.read()
-                    content, file_type = process_file_content(file_bytes, file.name)
+                    content, file_type = process_file_cached(file_bytes, file.name)
                     
                     if content and len(content.strip()) > 0:
                         chunks = text_splitter.split_text(content)
                         
-                        timestamp = datetime.now().timestamp()
-                        chunk_ids = [f"{file.name}_{timestamp}_{j}" for j in range(len(chunks))]
                         metadatas = [{
-                            "filename": file.name,
                             "file_type": file_type,
                             "chunk_index": j,
                             "total_chunks": len(chunks),
                             "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                         } for j in range(len(chunks))]
                         
-                        collection.add(
-                            documents=chunks,
-                            ids=chunk_ids,
-                            metadatas=metadatas
+                        # Content-derived IDs: re-uploading a file only
+                        # embeds new chunks and drops the ones that are gone
+                        written = upsert_document(
+                            collection, file.name, chunks, metadatas,
+                            batch_size=embedder.batch_size, ignore_fields=("upload_date",)
                         )
                         
                         success_count += 1
-                        status.success(f"✅ {file.name} ({len(chunks)} chunks)")
+                        status.success(
+                            f"✅ {file.name} ({len(chunks)} chunks, {written['added']} new, "
+                            f"{written['deleted']} removed)"
+                        )
                     else:
                         error_count += 1
                         status.error(f"❌ {file.name} is empty")
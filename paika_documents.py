@@ -10,6 +10,9 @@ import PyPDF2
 from docx import Document as DocxDocument
 from io import BytesIO
 
+from embeddings import get_embedding_function
+from ingest_pipeline import upsert_document
+
 load_dotenv()
 
 # Page config
@@ -60,11 +63,19 @@ class DocumentManager:
 if 'chroma_client' not in st.session_state:
     st.session_state.chroma_client = chromadb.PersistentClient(path="./paika_docs_db")
 
+# Shared embedding model for uploads and queries (PAIKA_EMBED_* settings)
+if 'embedder' not in st.session_state:
+    st.session_state.embedder = get_embedding_function()
+
 if 'collection' not in st.session_state:
     try:
-        st.session_state.collection = st.session_state.chroma_client.get_collection("paika_docs")
+        st.session_state.collection = st.session_state.chroma_client.get_collection(
+            "paika_docs", embedding_function=st.session_state.embedder
+        )
     except:
-        st.session_state.collection = st.session_state.chroma_client.create_collection("paika_docs")
+        st.session_state.collection = st.session_state.chroma_client.create_collection(
+            "paika_docs", embedding_function=st.session_state.embedder
+        )
 
 if 'text_splitter' not in st.session_state:
     st.session_state.text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
@@ -131,11 +142,8 @@ with tab1:
                     # Chunk
                     chunks = st.session_state.text_splitter.split_text(content)
                     
-                    # Add to collection
-                    chunk_ids = [f"{file.name}_{datetime.now().timestamp()}_{j}" 
-                                for j in range(len(chunks))]
+                    # Upsert (same file again = no new chunks)
                     metadatas = [{
-                        "filename": file.name,
                         "file_type": file_type,
                         "chunk_index": j,
                         "total_chunks": len(chunks),
@@ -143,13 +151,17 @@ with tab1:
                         "file_size": len(content)
                     } for j in range(len(chunks))]
                     
-                    st.session_state.collection.add(
-                        documents=chunks,
-                        ids=chunk_ids,
-                        metadatas=metadatas
+                    written = upsert_document(
+                        st.session_state.collection, file.name, chunks, metadatas,
+                        batch_size=st.session_state.embedder.batch_size,
+                        ignore_fields=("upload_date",)
                     )
                     
-                    # Save file info
+                    # Save file info (replacing an earlier upload of it)
+                    st.session_state.uploaded_files_info = [
+                        info for info in st.session_state.uploaded_files_info
+                        if info['filename'] != file.name
+                    ]
                     st.session_state.uploaded_files_info.append({
                         'filename': file.name,
                         'file_type': file_type,
@@ -158,7 +170,7 @@ with tab1:
                         'upload_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     })
                     
-                    status.success(f"✅ {file.name} ({len(chunks)} chunks)")
+                    status.success(f"✅ {file.name} ({len(chunks)} chunks, {written['added']} new)")
                 else:
                     status.error(f"❌ Failed to process {file.name}")
                 
@@ -13,9 +13,10 @@ import time
 import hashlib
 
 # Document loaders
-import PyPDF2
-from docx import Document as DocxDocument
-from io import BytesIO
+from universal_loader import UniversalDocumentLoader
+from extraction_cache import ExtractionCache
+from embeddings import get_embedding_function
+from ingest_pipeline import upsert_document
 
 load_dotenv()
 
@@ -99,6 +100,11 @@ def load_groq_client():
     """Cache Groq client"""
     return Groq(api_key=os.getenv("GROQ_API_KEY"))
 
+@st.cache_resource(show_spinner=False)
+def load_embedding_function():
+    """Shared embedding model for uploads and queries (PAIKA_EMBED_* settings)"""
+    return get_embedding_function()
+
 @st.cache_resource(show_spinner=False)
 def load_reranker_model():
     """Cache cross-encoder model - expensive to load"""
@@ -113,11 +119,26 @@ def load_text_splitter():
         separators=["\n\n", "\n", ". ", " ", ""]
     )
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
+def load_extraction_cache():
+    """Disk cache of extracted text - survives restarts, shared with the CLI"""
+    return ExtractionCache()
+
 def process_file_cached(file_bytes, filename):
-    """Cache file processing based on content hash"""
-    # This prevents re-processing the same file
-    return process_file_content(file_bytes, filename)
+    """Cache file processing on disk based on content hash"""
+    # This prevents re-processing the same file, even after a restart
+    ext = Path(filename).suffix.lower()
+    content_hash = ExtractionCache.content_hash(file_bytes)
+
+    content = extraction_cache.get(content_hash, ext, kind="text")
+    if content is not None:
+        st.session_state.performance_stats['cache_hits'] += 1
+        return content, ext
+
+    content, file_type = process_file_content(file_bytes, filename)
+    if content:
+        extraction_cache.put(content_hash, ext, content, kind="text")
+    return content, file_type
 
 def process_file_content(file_bytes, filename):
     """Process file and return content"""
@@ -127,12 +148,11 @@ def process_file_content(file_bytes, filename):
         if ext == '.txt' or ext == '.md':
             return file_bytes.decode('utf-8'), ext
         elif ext == '.pdf':
-            pdf = PyPDF2.PdfReader(BytesIO(file_bytes))
-            content = "\n".join([page.extract_text() for page in pdf.pages])
+            # Large PDFs are split across worker processes page-parallel
+            content = UniversalDocumentLoader.load_pdf(file_bytes)
             return content, ext
         elif ext == '.docx':
-            doc = DocxDocument(BytesIO(file_bytes))
-            content = "\n".join([p.text for p in doc.paragraphs])
+            content = UniversalDocumentLoader.load_docx(file_bytes)
             return content, ext
     except Exception as e:
         st.error(f"Error processing {filename}: {e}")
@@ -146,12 +166,15 @@ chroma_client = load_chroma_client()
 groq_client = load_groq_client()
 reranker = load_reranker_model()
 text_splitter = load_text_splitter()
+extraction_cache = load_extraction_cache()
 
 # Collection
+embedder = load_embedding_function()
+
 try:
-    collection = chroma_client.get_collection("paika_opt")
+    collection = chroma_client.get_collection("paika_opt", embedding_function=embedder)
 except:
-    collection = chroma_client.create_collection("paika_opt")
+    collection = chroma_client.create_collection("paika_opt", embedding_function=embedder)
 
 # Session state
 if 'messages' not in st.session_state:
@@ -225,25 +248,24 @@ with st.sidebar:
                     # Chunk
                     chunks = text_splitter.split_text(content)
                     
-                    # Add to collection
-                    timestamp = datetime.now().timestamp()
-                    chunk_ids = [f"{file.name}_{timestamp}_{j}" for j in range(len(chunks))]
+                    # Upsert: unchanged chunks are skipped, new ones
+                    # embedded, chunks no longer in the file deleted
                     metadatas = [{
-                        "filename": file.name,
                         "file_type": file_type,
                         "chunk_index": j,
                         "total_chunks": len(chunks),
                         "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     } for j in range(len(chunks))]
                     
-                    collection.add(
-                        documents=chunks,
-                        ids=chunk_ids,
-                        metadatas=metadatas
+                    written = upsert_document(
+                        collection, file.name, chunks, metadatas,
+                        batch_size=embedder.batch_size, ignore_fields=("upload_date",)
                     )
                     
                     st.session_state.performance_stats['total_files_processed'] += 1
-                    status_placeholder.success(f"✅ {file.name} ({len(chunks)} chunks)")
+                    status_placeholder.success(
+                        f"✅ {file.name} ({len(chunks)} chunks, {written['added']} new)"
+                    )
                 else:
                     status_placeholder.error(f"❌ Failed: {file.name}")
                 
@@ -1,10 +1,7 @@
 import os
+import threading
 from pathlib import Path
-from datetime import datetime
 from collections import deque
-import csv
-import email
-from email import policy
 
 import chromadb
 from groq import Groq
@@ -13,12 +10,13 @@ from dotenv import load_dotenv
 import numpy as np
 from rank_bm25 import BM25Okapi
 from sentence_transformers import CrossEncoder
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-import PyPDF2
-import pdfplumber
-from docx import Document as DocxDocument
-from bs4 import BeautifulSoup
+from embeddings import get_embedding_function
+from parent_child import ParentStore, expand_to_parents
+
+# Indexing modules (pipeline, manifest, caches, dedup, filter, watcher,
+# tokenizer) are imported on first ingest - see ingest_components() -
+# so starting PAiKA to ask questions stays fast
 
 # ======================================================
 # ENV + CLIENT SETUP
@@ -34,114 +32,107 @@ print()
 
 print("🔄 Initializing components...")
 chroma_client = chromadb.PersistentClient(path="./paika_v1_db")
+
+# Vector backend: "chroma" (HNSW), "numpy" (exact search over an
+# in-memory matrix - fastest for corpora up to a few hundred thousand
+# chunks), or "int8" / "binary" (4x / 32x smaller in-memory codes,
+# candidates rescored against float32 vectors on disk)
+VECTOR_BACKEND = os.getenv("PAIKA_VECTOR_BACKEND", "chroma").lower()
+
+# One embedding model for ingest and queries - batch size, worker
+# processes, threads and precision come from PAIKA_EMBED_* in .env
+embedder = get_embedding_function()
+
+# Parent sections (pages, heading sections) handed to the LLM; only their
+# small child chunks are embedded, searched and reranked
+parent_store = ParentStore("./paika_v1_db/parents.db")
 reranker_model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
 print("✅ All systems ready!\n")
 
 collection = None
 bm25_index = None
+watcher = None
+ingest_lock = threading.Lock()
 doc_ids_list = []
 conversation_history = deque(maxlen=10)
-
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=50,
-    separators=["\n\n", "\n", ". ", " ", ""]
-)
-
-# ======================================================
-# DOCUMENT LOADER
-# ======================================================
-class UniversalDocumentLoader:
-    """Universal multi-format document loader"""
-
-    @staticmethod
-    def load_text(fp):
-        try:
-            return open(fp, "r", encoding="utf-8").read()
-        except:
-            return open(fp, "r", encoding="latin-1").read()
-
-    @staticmethod
-    def load_pdf(fp):
-        try:
-            with open(fp, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() or ""
-                if text.strip():
-                    return text
-        except:
-            pass
-
-        with pdfplumber.open(fp) as pdf:
-            return "\n".join(p.extract_text() or "" for p in pdf.pages)
-
-    @staticmethod
-    def load_docx(fp):
-        doc = DocxDocument(fp)
-        return "\n".join(p.text for p in doc.paragraphs)
-
-    @staticmethod
-    def load_eml(fp):
-        with open(fp, "r", encoding="utf-8") as f:
-            msg = email.message_from_file(f, policy=policy.default)
-        return f"From: {msg.get('From')}\nSubject: {msg.get('Subject')}\n\n{msg.get_content()}"
-
-    @staticmethod
-    def load_csv(fp):
-        with open(fp, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            rows = []
-            for i, row in enumerate(reader, 1):
-                rows.append(
-                    f"Row {i}: " + ", ".join(f"{k}={v}" for k, v in row.items())
-                )
-        return "\n".join(rows)
-
-    @staticmethod
-    def load_html(fp):
-        with open(fp, "r", encoding="utf-8") as f:
-            soup = BeautifulSoup(f.read(), "html.parser")
-        for tag in soup(["script", "style"]):
-            tag.decompose()
-        return soup.get_text()
-
-    @classmethod
-    def load(cls, fp):
-        ext = Path(fp).suffix.lower()
-        loaders = {
-            ".txt": cls.load_text,
-            ".md": cls.load_text,
-            ".pdf": cls.load_pdf,
-            ".docx": cls.load_docx,
-            ".eml": cls.load_eml,
-            ".csv": cls.load_csv,
-            ".html": cls.load_html,
-            ".htm": cls.load_html,
+text_splitter = None
+_ingest = None
+
+def get_text_splitter():
+    """Child/parent splitter, built (and its tokenizer loaded) on first ingest"""
+    global text_splitter
+    if text_splitter is None:
+        from chunking import StreamingChunker, ContentDefinedChunker
+        from parent_child import ParentChildChunker
+
+        # Child chunks for retrieval sized to the embedding model's limit
+        # (MODEL_MAX_TOKENS of Chroma's default all-MiniLM-L6-v2, minus its
+        # special tokens) so none gets truncated, plus ~2000 character parent
+        # sections for context
+        text_splitter = ParentChildChunker(
+            StreamingChunker.for_model("sentence-transformers/all-MiniLM-L6-v2"),
+            # Content-defined parents: an edit only re-embeds the children around it
+            parent_chunker=ContentDefinedChunker(2000)
+        )
+    return text_splitter
+
+def ingest_components():
+    """Manifest, caches, dedup index, chunk filter and crawler (loaded on first use)"""
+    global _ingest
+    if _ingest is None:
+        from file_manifest import FileManifest
+        from extraction_cache import ExtractionCache
+        from near_dedup import NearDuplicateIndex
+        from chunk_filter import ChunkQualityFilter
+        from file_crawler import FileCrawler
+
+        _ingest = {
+            'manifest': FileManifest("./paika_v1_db/ingest_manifest.json"),
+            'extraction_cache': ExtractionCache(),
+            # Near-identical chunks (repeated headers, quoted email chains) are stored once
+            'dedup': NearDuplicateIndex("./paika_v1_db/near_dup_index.npz"),
+            # Page numbers, tables of contents and running headers are never embedded
+            'chunk_filter': ChunkQualityFilter(),
+            # Which files get ingested: all supported types, recursively, no
+            # temp or hidden files, nothing over 100 MB
+            'crawler': FileCrawler(max_size=100 * 1024 * 1024),
         }
-        if ext not in loaders:
-            raise ValueError(f"Unsupported file: {ext}")
-        return loaders[ext](fp), ext
+    return _ingest
 
-# ======================================================
-# DB SETUP
-# ======================================================
 def get_or_create_collection():
     global collection
+    if VECTOR_BACKEND == "numpy":
+        from vector_index import MatrixVectorIndex
+
+        collection = MatrixVectorIndex(
+            "./paika_v1_db/matrix_index", embedding_function=embedder, name="paika_v1"
+        )
+        print(f"📂 Loaded matrix index: {collection.count()} chunks\n")
+        return
+    if VECTOR_BACKEND in ("int8", "binary"):
+        from vector_index import QuantizedVectorIndex
+
+        collection = QuantizedVectorIndex(
+            f"./paika_v1_db/{VECTOR_BACKEND}_index", embedding_function=embedder,
+            quantization=VECTOR_BACKEND, name="paika_v1"
+        )
+        print(f"📂 Loaded {VECTOR_BACKEND} index: {collection.count()} chunks\n")
+        return
     try:
-        collection = chroma_client.get_collection("paika_v1")
+        collection = chroma_client.get_collection("paika_v1", embedding_function=embedder)
         print(f"📂 Loaded collection: {collection.count()} chunks\n")
     except:
         collection = chroma_client.create_collection(
             name="paika_v1",
-            metadata={"description": "PAiKA v1.0 Production"}
+            metadata={"description": "PAiKA v1.0 Production"},
+            embedding_function=embedder
         )
         print("✅ Created new collection\n")
 
 def build_bm25_index():
     global bm25_index, doc_ids_list
     if collection.count() == 0:
+        bm25_index, doc_ids_list = None, []
         return
     data = collection.get()
     doc_ids_list = data["ids"]
@@ -149,58 +140,73 @@ def build_bm25_index():
     bm25_index = BM25Okapi(tokenized)
 
 # ======================================================
-# DOCUMENT INGESTION (MEMORY SAFE)
+# DOCUMENT INGESTION (PIPELINED)
 # ======================================================
-def load_all_documents():
-    supported = [".txt", ".md", ".pdf", ".docx", ".eml", ".csv", ".html"]
-    files = []
-    for ext in supported:
-        files.extend(Path(".").glob(f"*{ext}"))
-
-    if not files:
-        print("⚠️ No files found\n")
-        return
-
-    chunks, ids, metas = [], [], []
-    upload_date = datetime.now().strftime("%Y-%m-%d")
-
-    for file in files:
-        if file.name.startswith("~$"):
-            print(f"⚠️ Skipping temp file: {file.name}")
-            continue
-        try:
-            content, ftype = UniversalDocumentLoader.load(file)
-            split = text_splitter.split_text(content)
-            for i, ch in enumerate(split):
-                chunks.append(ch)
-                ids.append(f"{file.name}_{i}")
-                metas.append({
-                    "filename": file.name,
-                    "file_type": ftype,
-                    "chunk_index": i,
-                    "total_chunks": len(split),
-                    "upload_date": upload_date
-                })
-            print(f"✅ {file.name}: {len(split)} chunks")
-        except Exception as e:
-            print(f"❌ {file.name}: {e}")
-
-    if not chunks:
-        return
-
-    print("\n🔄 Adding chunks safely (batched)...")
-    BATCH = 32
-    for i in range(0, len(chunks), BATCH):
-        collection.add(
-            documents=chunks[i:i+BATCH],
-            ids=ids[i:i+BATCH],
-            metadatas=metas[i:i+BATCH]
+def load_all_documents(folder="."):
+    from ingest_pipeline import IngestPipeline
+
+    components = ingest_components()
+
+    # Files are streamed from the crawler straight into the pipeline
+    crawled = [0]
+
+    def files():
+        for path in components['crawler'].crawl(folder):
+            crawled[0] += 1
+            yield path
+
+    # Parse in a process pool, chunk + embed in pipelined stages.
+    # The manifest skips unchanged files and replaces stale chunks.
+    with ingest_lock:
+        pipeline = IngestPipeline(
+            collection, get_text_splitter(), batch_size=embedder.batch_size,
+            embedding_function=embedder, manifest=components['manifest'],
+            extraction_cache=components['extraction_cache'], dedup=components['dedup'],
+            parent_store=parent_store, chunk_filter=components['chunk_filter'],
+            content_ids=True
         )
-        print(f"   ➕ Batch {(i//BATCH)+1}")
+        pipeline.run(files())
 
-    build_bm25_index()
+        # Chunks written or deleted (incl. pruned files): BM25 must follow
+        if pipeline.counters['chunk'].items or pipeline.removed or pipeline.deleted:
+            build_bm25_index()
+
+        if not crawled[0]:
+            print("⚠️ No files found\n")
+            return
+        pipeline.print_stats()
     print("✅ Ingestion complete!\n")
 
+def toggle_folder_watch():
+    """Start/stop background ingestion of new, changed and deleted files"""
+    global watcher
+
+    if watcher is not None and watcher.is_running():
+        watcher.stop()
+        print("⏹️ Folder watch stopped\n")
+        return
+
+    from folder_watcher import FolderWatcher, make_ingest_callback
+
+    components = ingest_components()
+    watcher = FolderWatcher(
+        ["."],
+        make_ingest_callback(
+            collection, get_text_splitter, components['manifest'],
+            extraction_cache=components['extraction_cache'],
+            dedup=components['dedup'],
+            parent_store=parent_store,
+            chunk_filter=components['chunk_filter'],
+            content_ids=True,
+            embedding_function=embedder,
+            lock=ingest_lock,
+            on_update=build_bm25_index
+        ),
+        crawler=components['crawler']
+    )
+    watcher.start()
+    print("👀 Watching current folder - changes are ingested in the background\n")
+
 # ======================================================
 # SEARCH + RERANK  ✅ FIXED
 # ======================================================
@@ -224,7 +230,10 @@ def advanced_search(query, file_type_filter=None, k=5):
     }
 
     top = sorted(combined, key=combined.get, reverse=True)[:20]
-    docs = [collection.get(ids=[i]) for i in top]
+    # BM25 may still list chunks deleted by a concurrent ingest
+    docs = [d for d in (collection.get(ids=[i]) for i in top) if d["ids"]]
+    if not docs:
+        return []
 
     pairs = [(query, d["documents"][0]) for d in docs]
     rerank_scores = reranker_model.predict(pairs)
@@ -244,9 +253,13 @@ def advanced_search(query, file_type_filter=None, k=5):
 def ask_with_memory(q, ftype=None):
     res = advanced_search(q, ftype)
 
+    # Children were ranked; the LLM gets their (unique) parent sections
+    ranked = [(score, d['documents'][0], d['metadatas'][0]) for score, d in res]
+    sections = expand_to_parents(ranked, parent_store)
+
     context = ""
-    for i, (_, d) in enumerate(res, 1):
-        context += f"\n[Source {i}] {d['documents'][0]}"
+    for i, (_, text, _) in enumerate(sections, 1):
+        context += f"\n[Source {i}] {text}"
 
     prompt = f"""{context}
 
@@ -265,7 +278,7 @@ Answer:"""
     return ans
 
 # ======================================================
-# MAIN MENU (ALL 7 OPTIONS)
+# MAIN MENU (ALL 8 OPTIONS)
 # ======================================================
 def main():
     get_or_create_collection()
@@ -279,12 +292,14 @@ def main():
         print("5. Clear memory")
         print("6. Reset database")
         print("7. Quit")
+        print("8. Watch folder (auto-ingest on/off)")
         print("-" * 60)
 
         ch = input("> ").strip()
 
         if ch == "1":
-            load_all_documents()
+            folder = input("Folder (Enter = current folder): ").strip()
+            load_all_documents(folder or ".")
 
         elif ch == "2":
             q = input("Question: ")
@@ -304,13 +319,27 @@ def main():
             print("✅ Memory cleared")
 
         elif ch == "6":
-            chroma_client.delete_collection("paika_v1")
+            if watcher is not None:
+                watcher.stop()
+            if VECTOR_BACKEND != "chroma":
+                collection.clear()
+            else:
+                chroma_client.delete_collection("paika_v1")
+            components = ingest_components()
+            components['manifest'].clear()
+            components['dedup'].clear()
+            parent_store.clear()
             get_or_create_collection()
 
         elif ch == "7":
+            if watcher is not None:
+                watcher.stop()
             print("👋 Exiting PAiKA")
             break
 
+        elif ch == "8":
+            toggle_folder_watch()
+
 if __name__ == "__main__":
     main()
 
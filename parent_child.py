@@ -0,0 +1,225 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from chunking import StreamingChunker, strip_block_flags
+
+
+class ParentStore:
+    """
+    SQLite table of parent sections (id -> text, metadata)
+
+    Parents are never embedded - they are only looked up, in one batch,
+    for the children that made it through ranking.
+    """
+
+    def __init__(self, db_path="./paika_parents.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the ingest pipeline's threads
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parents (id TEXT PRIMARY KEY, text TEXT, metadata TEXT)"
+            )
+            self._conn.commit()
+
+    def put_many(self, records):
+        """Store (parent_id, text, metadata) records"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO parents VALUES (?, ?, ?)",
+                [(pid, text, json.dumps(metadata)) for pid, text, metadata in records]
+            )
+            self._conn.commit()
+
+    def get_many(self, parent_ids):
+        """Returns {parent_id: (text, metadata)} for the ids that exist"""
+        parent_ids = list(dict.fromkeys(parent_ids))
+        found = {}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(parent_ids), 500):
+                batch = parent_ids[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, text, metadata FROM parents WHERE id IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for pid, text, metadata in rows:
+                    found[pid] = (text, json.loads(metadata))
+        return found
+
+    def delete(self, parent_ids):
+        parent_ids = list(parent_ids)
+        with self._lock:
+            for i in range(0, len(parent_ids), 500):
+                batch = parent_ids[i:i + 500]
+                self._conn.execute(
+                    f"DELETE FROM parents WHERE id IN ({','.join('?' * len(batch))})", batch
+                )
+            self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM parents")
+            self._conn.commit()
+
+
+class ParentChildChunker:
+    """
+    Two-level chunking: small children for retrieval, parents for context
+
+    Every block (PDF page, email body, ...) is cut into parent sections
+    of up to parent_size characters, preferring paragraph breaks, so a
+    parent is a page or a heading section. Each parent is then cut into
+    children. Only children are embedded, searched and reranked; after
+    ranking the unique parents are fetched for the LLM prompt.
+    """
+
+    def __init__(self, child_chunker=None, parent_size=2000, parent_chunker=None):
+        """
+        Args:
+            child_chunker: StreamingChunker for the children
+                           (default: 300 characters, 30 overlap)
+            parent_size: Max characters per parent section
+            parent_chunker: Chunker for the parents (default: a
+                            StreamingChunker of parent_size, no overlap).
+                            A ContentDefinedChunker keeps parents - and so
+                            their children - stable when the file is edited.
+        """
+        self.child_chunker = child_chunker or StreamingChunker(300, 30)
+        self.parent_chunker = parent_chunker or StreamingChunker(parent_size, 0)
+
+    @property
+    def block_separator(self):
+        return self.child_chunker.block_separator
+
+    def iter_families(self, blocks):
+        """
+        Yields:
+            (parent_text, parent_metadata, [(child_text, child_metadata), ...])
+
+        Offsets of parents and children refer to the whole document (the
+        blocks joined by block_separator), like StreamingChunker's.
+        Blocks marked keep_whole (CSV row batches) are their own only child.
+        """
+        doc_length = 0
+        for text, metadata in blocks:
+            if doc_length:
+                doc_length += len(self.block_separator)
+            block_start = doc_length
+            doc_length += len(text)
+
+            if metadata.get('keep_whole'):
+                metadata = {**strip_block_flags(metadata), 'start_offset': block_start, 'end_offset': doc_length}
+                yield text, metadata, [(text, metadata)]
+                continue
+
+            for parent_text, parent_metadata in self.parent_chunker.chunk_blocks([(text, metadata)]):
+                parent_start = block_start + parent_metadata['start_offset']
+                parent_metadata = {
+                    **parent_metadata,
+                    'start_offset': parent_start,
+                    'end_offset': block_start + parent_metadata['end_offset']
+                }
+                children = [
+                    (child_text, {
+                        **child_metadata,
+                        'start_offset': parent_start + child_metadata['start_offset'],
+                        'end_offset': parent_start + child_metadata['end_offset']
+                    })
+                    for child_text, child_metadata in self.child_chunker.chunk_blocks([(parent_text, metadata)])
+                ]
+                yield parent_text, parent_metadata, children
+
+    def split_text(self, text):
+        """Children only (for code paths without a ParentStore)"""
+        return [
+            child for _, _, children in self.iter_families([(text, {})])
+            for child, _ in children
+        ]
+
+
+def expand_to_parents(ranked, parent_store, k=None, document_store=None):
+    """
+    Replace ranked children by their parents, best first
+
+    Args:
+        ranked: List of (score, child_text, child_metadata), best first
+        parent_store: ParentStore with the parents
+        k: Max number of parents to return
+        document_store: DocumentStore for parents stored as offsets
+
+    Returns:
+        List of (score, text, metadata) - one entry per unique parent
+        (with its best child's score); children without a parent are
+        kept as they are
+    """
+    parent_ids = [m.get('parent_id') for _, _, m in ranked if m.get('parent_id')]
+    parents = parent_store.get_many(parent_ids)
+
+    expanded = []
+    seen = set()
+    for score, text, metadata in ranked:
+        parent_id = metadata.get('parent_id')
+        if parent_id in seen:
+            continue
+        if parent_id in parents:
+            seen.add(parent_id)
+            parent_text, parent_metadata = parents[parent_id]
+            if not parent_text and document_store is not None and 'doc_id' in parent_metadata:
+                parent_text = document_store.chunk_text(
+                    parent_metadata['doc_id'], parent_metadata['start_offset'], parent_metadata['end_offset']
+                )
+            expanded.append((score, parent_text, {**metadata, **parent_metadata}))
+        else:
+            expanded.append((score, text, metadata))
+
+        if k is not None and len(expanded) >= k:
+            break
+    return expanded
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+    from universal_loader import UniversalDocumentLoader
+
+    print("=" * 60)
+    print("PARENT / CHILD CHUNKING TEST")
+    print("=" * 60 + "\n")
+
+    pdf_files = list(Path('.').glob('*.pdf'))
+    if not pdf_files:
+        print("⚠️  No PDF found to test with!")
+    else:
+        chunker = ParentChildChunker()
+        blocks, _ = UniversalDocumentLoader.load_blocks(pdf_files[0])
+        families = list(chunker.iter_families(blocks))
+
+        n_children = sum(len(children) for _, _, children in families)
+        child_chars = sum(len(c) for _, _, children in families for c, _ in children)
+        print(f"📄 {pdf_files[0].name}: {len(families)} parents, {n_children} children")
+        print(f"   Avg child: {child_chars / max(n_children, 1):.0f} chars | "
+              f"avg parent: {sum(len(p) for p, _, _ in families) / max(len(families), 1):.0f} chars")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ParentStore(Path(tmp) / "parents.db")
+            store.put_many((f"p{i}", p, m) for i, (p, m, _) in enumerate(families))
+
+            # Pretend the first children of two parents ranked best
+            ranked = [
+                (0.9, families[1][2][0][0], {'parent_id': 'p1'}),
+                (0.8, families[1][2][1][0], {'parent_id': 'p1'}),
+                (0.7, families[0][2][0][0], {'parent_id': 'p0'}),
+            ]
+            for score, text, metadata in expand_to_parents(ranked, store):
+                print(f"   {score:.1f} -> parent of {len(text)} chars (page {metadata.get('page')})")
+
+    print("\n✅ Parent/child chunking working!")
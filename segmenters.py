@@ -0,0 +1,322 @@
+import re
+from pathlib import Path
+
+
+# Metadata flag: the chunker starts a fresh chunk (no overlap) at this block
+NEW_SECTION = 'new_section'
+
+_MD_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_MD_FENCE = re.compile(r'^\s*(```|~~~)')
+_HTML_HEADINGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_HTML_BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'header', 'footer', 'main', 'nav', 'aside',
+    'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'pre', 'blockquote', 'br', 'hr',
+    'figure', 'figcaption', 'form', 'address'
+}
+_HTML_SKIP_TAGS = {'script', 'style', 'noscript', 'head', 'template', 'svg'}
+_REPLY_HEADER = re.compile(
+    r'^(On .+ wrote:|-{2,}\s*Original Message\s*-{2,}|_{5,}|From: .+)$', re.IGNORECASE
+)
+
+# Table rows per block (the header row is repeated in every block)
+TABLE_ROWS_PER_BLOCK = 10
+
+
+class SectionPath:
+    """Heading stack -> "Title > Section > Subsection" """
+
+    def __init__(self, root=None):
+        self.root = root
+        self.stack = []
+
+    def enter(self, level, title):
+        while self.stack and self.stack[-1][0] >= level:
+            self.stack.pop()
+        self.stack.append((level, title))
+
+    def __str__(self):
+        titles = ([self.root] if self.root else []) + [t for _, t in self.stack]
+        return " > ".join(titles)
+
+
+def _clean_lines(text):
+    lines = (re.sub(r'[ \t\xa0]+', ' ', line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _table_blocks(header, rows, section, rows_per_block=TABLE_ROWS_PER_BLOCK):
+    """Table rows as self-describing keep_whole blocks (like CSV row batches)"""
+    for start in range(0, len(rows), rows_per_block):
+        lines = []
+        for i, row in enumerate(rows[start:start + rows_per_block], start + 1):
+            if header and len(header) == len(row):
+                cells = [f"{h}={v}" for h, v in zip(header, row) if v]
+            else:
+                cells = [v for v in row if v]
+            lines.append(f"Row {i}: " + ", ".join(cells))
+
+        text = (f"Table in {section}\n" if section else "") + \
+            (f"Columns: {', '.join(header)}\n\n" if header else "") + "\n".join(lines)
+        yield text, {
+            'section': section,
+            'row_start': start + 1,
+            'row_end': start + len(lines),
+            'block_type': 'table',
+            'keep_whole': True
+        }
+
+
+# ======================================================
+# HTML
+# ======================================================
+def segment_html(html):
+    """
+    Split an HTML page along its headings
+
+    Yields one block per heading section (section path in the metadata,
+    e.g. "Q1 Strategy Meeting > Key Discussion Points > 1. Product
+    Roadmap"). Lists keep their bullets; tables become row blocks with
+    the column names repeated.
+    """
+    from bs4 import BeautifulSoup, NavigableString, Comment
+
+    soup = BeautifulSoup(html, 'html.parser')
+    path = SectionPath()
+    parts = []
+    blocks = []
+
+    def flush():
+        text = _clean_lines("".join(parts))
+        parts.clear()
+        if text:
+            blocks.append((text, {'section': str(path), NEW_SECTION: True}))
+
+    def table(node):
+        rows = []
+        header = None
+        for tr in node.find_all('tr'):
+            # Skip rows of nested tables (they are part of their cell's text)
+            if tr.find_parent('table') is not node:
+                continue
+            cells = [c.get_text(" ", strip=True) for c in tr.find_all(['th', 'td'], recursive=False)]
+            if not any(cells):
+                continue
+            if header is None and tr.find('th', recursive=False) is not None:
+                header = cells
+            else:
+                rows.append(cells)
+        blocks.extend(_table_blocks(header, rows, str(path)))
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, Comment):
+                continue
+            if isinstance(child, NavigableString):
+                parts.append(str(child))
+                continue
+
+            name = child.name
+            if name in _HTML_SKIP_TAGS:
+                continue
+            if name in _HTML_HEADINGS:
+                flush()
+                title = child.get_text(" ", strip=True)
+                if title:
+                    path.enter(_HTML_HEADINGS[name], title)
+                    parts.append(title + "\n")
+                continue
+            if name == 'table':
+                flush()
+                table(child)
+                continue
+
+            if name in _HTML_BLOCK_TAGS:
+                parts.append("\n- " if name == 'li' else "\n")
+                walk(child)
+                parts.append("\n")
+            else:
+                walk(child)
+
+    walk(soup.body or soup)
+    flush()
+    return blocks
+
+
+# ======================================================
+# MARKDOWN
+# ======================================================
+def segment_markdown(text):
+    """
+    Split Markdown along its ATX headings (# ... ######)
+
+    Headings inside fenced code blocks are ignored. Pipe tables become
+    row blocks like HTML tables.
+    """
+    path = SectionPath()
+    lines = []
+    table_lines = []
+    in_fence = False
+
+    def flush():
+        content = "\n".join(lines).strip()
+        lines.clear()
+        if content:
+            yield content, {'section': str(path), NEW_SECTION: True}
+
+    def flush_table():
+        rows = [
+            [cell.strip() for cell in line.strip().strip('|').split('|')]
+            for line in table_lines
+        ]
+        table_lines.clear()
+        # Second line is the |---|---| separator
+        if len(rows) >= 2 and all(re.fullmatch(r':?-{3,}:?', c) for c in rows[1] if c):
+            yield from _table_blocks(rows[0], rows[2:], str(path))
+        else:
+            lines.extend("| " + " | ".join(r) + " |" for r in rows)
+
+    for line in text.splitlines():
+        if _MD_FENCE.match(line):
+            in_fence = not in_fence
+
+        if not in_fence and line.lstrip().startswith('|'):
+            table_lines.append(line)
+            continue
+        if table_lines:
+            yield from flush()
+            yield from flush_table()
+
+        match = None if in_fence else _MD_HEADING.match(line)
+        if match:
+            yield from flush()
+            path.enter(len(match.group(1)), match.group(2))
+        lines.append(line)
+
+    if table_lines:
+        yield from flush()
+        yield from flush_table()
+    yield from flush()
+
+
+# ======================================================
+# EMAIL
+# ======================================================
+def _quote_depth(line):
+    depth = 0
+    stripped = line.lstrip()
+    while stripped.startswith('>'):
+        depth += 1
+        stripped = stripped[1:].lstrip()
+    return depth, stripped
+
+
+def segment_email_message(msg):
+    """
+    Split a parsed email (email.message.EmailMessage)
+
+    Yields the headers as one block, then the new message text and each
+    quoted reply (">" quoting or "On ... wrote:" / "Original Message"
+    separators) as separate sections.
+    """
+    subject = msg.get('Subject', 'No Subject')
+    headers = (
+        f"Email\nFrom: {msg.get('From', 'Unknown')}\nTo: {msg.get('To', 'Unknown')}\n"
+        f"Subject: {subject}\nDate: {msg.get('Date', 'Unknown')}"
+    )
+    yield headers, {'section': f"{subject} > Headers", 'block_type': 'headers', 'keep_whole': True}
+
+    body = ""
+    if msg.is_multipart():
+        html_body = None
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            if content_type == 'text/plain' and part.get_content_disposition() != 'attachment':
+                body = part.get_content()
+                break
+            if content_type == 'text/html' and html_body is None:
+                html_body = part.get_content()
+        if not body and html_body:
+            import html2text
+            body = html2text.HTML2Text().handle(html_body)
+    else:
+        body = msg.get_content()
+
+    # Runs of lines at the same quoting level; a reply header line starts
+    # the quoted part of clients that don't use ">"
+    sections = []
+    current, current_quoted = [], False
+    outlook_quote = False
+    for line in body.splitlines():
+        depth, content = _quote_depth(line)
+        if not depth and _REPLY_HEADER.match(line.strip()) and current_quoted is False \
+                and any(l.strip() for l in current):
+            sections.append((current_quoted, current))
+            current, current_quoted = [], True
+            outlook_quote = True
+        quoted = bool(depth) or outlook_quote
+        if quoted != current_quoted and any(l.strip() for l in current):
+            sections.append((current_quoted, current))
+            current = []
+        current_quoted = quoted
+        current.append(content if depth else line)
+    sections.append((current_quoted, current))
+
+    reply = 0
+    for quoted, section_lines in sections:
+        text = "\n".join(section_lines).strip()
+        if not text:
+            continue
+        if quoted:
+            reply += 1
+            yield text, {'section': f"{subject} > Quoted reply {reply}", 'quoted': True, NEW_SECTION: True}
+        else:
+            yield text, {'section': f"{subject} > Message", NEW_SECTION: True}
+
+
+def _read_text(filepath):
+    """File text as UTF-8, falling back to latin-1 (like UniversalDocumentLoader.load_text)"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        with open(filepath, 'r', encoding='latin-1') as f:
+            return f.read()
+
+
+def segment_email(filepath):
+    import email
+    from email import policy
+
+    msg = email.message_from_string(_read_text(filepath), policy=policy.default)
+    return list(segment_email_message(msg))
+
+
+# Extension -> callable(filepath) -> [(text, metadata), ...]
+SEGMENTERS = {
+    '.html': lambda path: segment_html(_read_text(path)),
+    '.htm': lambda path: segment_html(_read_text(path)),
+    '.md': lambda path: list(segment_markdown(_read_text(path))),
+    '.eml': segment_email,
+}
+
+
+def segment_file(filepath):
+    """Structure-aware (text, metadata) blocks of a file, or None if its format has no segmenter"""
+    segmenter = SEGMENTERS.get(Path(filepath).suffix.lower())
+    return segmenter(filepath) if segmenter else None
+
+
+# Test
+if __name__ == "__main__":
+    print("=" * 60)
+    print("STRUCTURE-AWARE SEGMENTERS TEST")
+    print("=" * 60 + "\n")
+
+    for path in ["sample_meeting_notes.html", "README.md", "sample_email.eml"]:
+        if not Path(path).exists():
+            continue
+        blocks = segment_file(path)
+        print(f"📄 {path}: {len(blocks)} sections")
+        for text, metadata in blocks[:6]:
+            print(f"   [{metadata['section']}] {text[:50].replace(chr(10), ' ')}...")
+        print()
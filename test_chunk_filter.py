@@ -0,0 +1,61 @@
+import tempfile
+from pathlib import Path
+
+from chunk_filter import ChunkQualityFilter
+from chunking import StreamingChunker, chunk_blocks
+from universal_loader import UniversalDocumentLoader
+
+
+def numeric_csv_chunks(rows=50):
+    """Chunks of a CSV that holds nothing but numbers"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "measurements.csv"
+        lines = ["id,x,y,z"] + [f"{i},{i * 0.5:.2f},{i * 1.25:.2f},{i * 7 % 13}" for i in range(rows)]
+        path.write_text("\n".join(lines), encoding='utf-8')
+
+        blocks, _ = UniversalDocumentLoader.load_blocks(path)
+        return list(chunk_blocks(blocks, StreamingChunker(500, 50)))
+
+
+def test_numeric_csv_survives():
+    chunks = numeric_csv_chunks()
+    assert chunks
+
+    chunk_filter = ChunkQualityFilter()
+    kept = list(chunk_filter.apply(chunks, "measurements.csv"))
+    assert len(kept) == len(chunks)
+    assert chunk_filter.get_stats()['low_info'] == 0
+
+
+def test_numeric_text_is_informative():
+    # A table flattened into PDF text: digits count as content
+    text = "2019 2020 2021 2022\n14.2 15.8 17.1 19.4\n3.1 3.3 3.9 4.2\n0.81 0.84 0.87 0.90"
+    kept = list(ChunkQualityFilter().apply([(text, {'page': 1})]))
+    assert len(kept) == 1
+
+
+def test_email_headers_survive():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "note.eml"
+        path.write_text("From: a@b.io\nTo: c@d.io\nSubject: Q3\nDate: 1 Oct 2024\n\nSee attached.\n",
+                        encoding='utf-8')
+        blocks, _ = UniversalDocumentLoader.load_blocks(path)
+        chunks = list(chunk_blocks(blocks, StreamingChunker(500, 50)))
+
+    # Strict enough that the short header block fails on length alone
+    kept = list(ChunkQualityFilter(min_chars=200).apply(chunks, "note.eml"))
+    assert [text for text, _ in kept] == [chunks[0][0]]
+    assert kept[0][0].startswith("Email\nFrom: a@b.io")
+
+
+def test_debris_is_still_dropped():
+    samples = [("12", {}), ("--------------------------------------------------", {})]
+    assert list(ChunkQualityFilter().apply(samples)) == []
+
+
+if __name__ == "__main__":
+    test_numeric_csv_survives()
+    test_numeric_text_is_informative()
+    test_email_headers_survive()
+    test_debris_is_still_dropped()
+    print("✅ Chunk filter tests passed")
@@ -0,0 +1,94 @@
+import tempfile
+from pathlib import Path
+
+from universal_loader import UniversalDocumentLoader
+
+
+def replaced_loader(ext, filename, content):
+    """Blocks of a file whose built-in loader was swapped for a plugin"""
+    saved = (dict(UniversalDocumentLoader.LOADERS),
+             set(UniversalDocumentLoader.STREAMED_FORMATS),
+             set(UniversalDocumentLoader.SEGMENTED_FORMATS))
+    try:
+        UniversalDocumentLoader.register_loader(ext, lambda filepath: f"plugin:{Path(filepath).name}")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / filename
+            path.write_bytes(content)
+            blocks, file_type = UniversalDocumentLoader.load_blocks(path)
+            return list(blocks), file_type
+    finally:
+        UniversalDocumentLoader.LOADERS.clear()
+        UniversalDocumentLoader.LOADERS.update(saved[0])
+        UniversalDocumentLoader.STREAMED_FORMATS.clear()
+        UniversalDocumentLoader.STREAMED_FORMATS.update(saved[1])
+        UniversalDocumentLoader.SEGMENTED_FORMATS.clear()
+        UniversalDocumentLoader.SEGMENTED_FORMATS.update(saved[2])
+        UniversalDocumentLoader._resolved_loaders.clear()
+
+
+def test_replaced_csv_loader_is_used():
+    blocks, file_type = replaced_loader('.csv', "data.csv", b"a,b\n1,2\n")
+    assert blocks == [("plugin:data.csv", {})]
+    assert file_type == '.csv'
+
+
+def test_replaced_pdf_loader_is_used():
+    blocks, _ = replaced_loader('.pdf', "scan.pdf", b"%PDF-1.4 not really a pdf")
+    assert blocks == [("plugin:scan.pdf", {})]
+
+
+def test_replacing_drops_streaming():
+    saved = set(UniversalDocumentLoader.STREAMED_FORMATS)
+    loader = UniversalDocumentLoader.LOADERS['.csv']
+    try:
+        UniversalDocumentLoader.register_loader('.csv', lambda filepath: "")
+        assert '.csv' not in UniversalDocumentLoader.STREAMED_FORMATS
+    finally:
+        UniversalDocumentLoader.register_loader('.csv', loader)
+        UniversalDocumentLoader.STREAMED_FORMATS.update(saved)
+
+
+def test_builtin_csv_still_streams():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "data.csv"
+        path.write_text("a,b\n1,2\n", encoding='utf-8')
+        blocks, _ = UniversalDocumentLoader.load_blocks(path)
+        (text, metadata), = list(blocks)
+    assert metadata['keep_whole'] and "Row 1: a=1, b=2" in text
+
+
+def test_latin1_csv_streams():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "export.csv"
+        path.write_bytes('city,note\r\nZürich,"two\r\nlines"\r\nCafé,ok\r\n'.encode('utf-8')
+                         + "Málaga,crème\r\n".encode('latin-1'))
+        blocks, _ = UniversalDocumentLoader.load_blocks(path)
+        (text, _), = list(blocks)
+    assert "city=Zürich, note=two\r\nlines" in text
+    assert "city=Málaga, note=crème" in text
+
+
+def test_only_large_pdfs_stream():
+    pdf = Path(__file__).parent / "dl1.pdf"
+    n_pages = UniversalDocumentLoader.count_pdf_pages(pdf)
+    saved = UniversalDocumentLoader.STREAMED_PDF_MIN_PAGES
+    try:
+        UniversalDocumentLoader.STREAMED_PDF_MIN_PAGES = n_pages
+        assert UniversalDocumentLoader.is_streamed(pdf)
+        UniversalDocumentLoader.STREAMED_PDF_MIN_PAGES = n_pages + 1
+        assert not UniversalDocumentLoader.is_streamed(pdf)
+        UniversalDocumentLoader.STREAMED_PDF_MIN_PAGES = 0
+        assert not UniversalDocumentLoader.is_streamed(pdf)
+    finally:
+        UniversalDocumentLoader.STREAMED_PDF_MIN_PAGES = saved
+    assert UniversalDocumentLoader.is_streamed("export.csv")
+
+
+if __name__ == "__main__":
+    test_replaced_csv_loader_is_used()
+    test_replaced_pdf_loader_is_used()
+    test_replacing_drops_streaming()
+    test_builtin_csv_still_streams()
+    test_latin1_csv_streams()
+    test_only_large_pdfs_stream()
+    print("✅ Universal loader tests passed")
@@ -1,13 +1,34 @@
-import PyPDF2
-import pdfplumber
-from docx import Document as DocxDocument
-import email
-from email import policy
-import html2text
-from bs4 import BeautifulSoup
 import csv
+import os
+import math
+import importlib
+from io import BytesIO
 from pathlib import Path
 
+# Parser libraries (PyPDF2, pdfplumber, python-docx, html2text, bs4) and
+# other heavy imports (email.policy, process pools) happen inside the
+# loaders that need them, so importing this module - and starting an app
+# that only ever sees .txt files - stays cheap
+
+# Set per worker process by the page-parallel PDF pool
+_worker_pdf_source = None
+_worker_pdf_parser = None
+
+
+def _init_pdf_worker(source, parser):
+    global _worker_pdf_source, _worker_pdf_parser
+    _worker_pdf_source = source
+    _worker_pdf_parser = parser
+
+
+def _extract_pdf_range(page_range):
+    """Extract one (first_page, last_page) range inside a worker process"""
+    first_page, last_page = page_range
+    return list(UniversalDocumentLoader.iter_pdf_pages(
+        _worker_pdf_source, first_page, last_page, _worker_pdf_parser
+    ))
+
+
 class UniversalDocumentLoader:
     """
     Universal document loader supporting:
@@ -17,7 +38,43 @@ class UniversalDocumentLoader:
     - Emails (.eml)
     - CSV files (.csv)
     - HTML files (.html)
+
+    Formats live in a registry (LOADERS). Other extensions can be added
+    with register_loader(), either as a callable or as a
+    "module:function" string that is only imported when a file of that
+    type is first loaded.
     """
+
+    # Extension -> loader (callable or "module:function"), see register_loader
+    LOADERS = {}
+    _resolved_loaders = {}
+
+    # Bump whenever extraction output changes - invalidates ExtractionCache
+    PARSER_VERSION = 5
+
+    # Pages with less text than this are retried with pdfplumber
+    PDF_PAGE_MIN_CHARS = 50
+
+    # PDFs with at least this many pages are extracted page-parallel
+    # (set to 0 to disable). Workers default to all cores.
+    PARALLEL_PDF_MIN_PAGES = 100
+    PARALLEL_PDF_WORKERS = None
+
+    # CSV rows per chunk (the header is repeated in every chunk)
+    CSV_ROWS_PER_CHUNK = 10
+
+    # Formats read lazily by the ingest process instead of being parsed
+    # up front, so a multi-GB CSV export is never held in memory
+    STREAMED_FORMATS = {'.csv'}
+
+    # PDFs with at least this many pages are streamed the same way (set
+    # to 0 to disable). Smaller PDFs are parsed up front, where they can
+    # be served from the ExtractionCache.
+    STREAMED_PDF_MIN_PAGES = 100
+
+    # Formats load_blocks splits along headings / quoted replies
+    # (segmenters.py); load() still returns their plain text
+    SEGMENTED_FORMATS = {'.html', '.htm', '.md', '.eml'}
     
     @staticmethod
     def load_text(filepath):
@@ -28,38 +85,152 @@ class UniversalDocumentLoader:
             return open(filepath, 'r', encoding='latin-1').read()
     
     @staticmethod
-    def load_pdf(filepath):
-        """Load PDF with fallback"""
-        # Try PyPDF2
+    def _open_pdf(source):
+        """PDF source can be a path or the raw file bytes (uploads)"""
+        if isinstance(source, (bytes, bytearray)):
+            return BytesIO(source)
+        return open(source, 'rb')
+
+    @classmethod
+    def count_pdf_pages(cls, source):
+        import PyPDF2
         try:
-            with open(filepath, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                if len(text.strip()) > 100:
-                    return text
-        except:
-            pass
-        
-        # Fallback to pdfplumber
-        with pdfplumber.open(filepath) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            return text
+            with cls._open_pdf(source) as file:
+                return len(PyPDF2.PdfReader(file).pages)
+        except Exception:
+            return 0
+
+    @classmethod
+    def iter_pdf_pages(cls, source, first_page=1, last_page=None, parser="pypdf2"):
+        """
+        Yield (page_number, text) one page at a time
+
+        With parser="pypdf2", pdfplumber is only opened for the pages
+        where PyPDF2 returns (almost) nothing. With parser="pdfplumber"
+        (see choose_pdf_strategy) PyPDF2 is skipped entirely.
+
+        Args:
+            source: PDF path or raw bytes
+            first_page, last_page: 1-based inclusive page range
+            parser: "pypdf2" or "pdfplumber"
+        """
+        import PyPDF2
+        import pdfplumber
+
+        plumber = None
+        plumber_file = None
+        try:
+            with cls._open_pdf(source) as file:
+                pages = None
+                if parser != "pdfplumber":
+                    try:
+                        pages = PyPDF2.PdfReader(file).pages
+                    except Exception:
+                        pages = None
+
+                # pdfplumber chosen up front, or PyPDF2 can't read the file
+                if pages is None:
+                    plumber_file = cls._open_pdf(source)
+                    plumber = pdfplumber.open(plumber_file)
+                    pages = plumber.pages
+                    last = min(last_page or len(pages), len(pages))
+                    for page_number in range(first_page, last + 1):
+                        yield page_number, pages[page_number - 1].extract_text() or ""
+                    return
+
+                last = min(last_page or len(pages), len(pages))
+                for page_number in range(first_page, last + 1):
+                    try:
+                        text = pages[page_number - 1].extract_text() or ""
+                    except Exception:
+                        text = ""
+
+                    if len(text.strip()) < cls.PDF_PAGE_MIN_CHARS:
+                        if plumber is None:
+                            plumber_file = cls._open_pdf(source)
+                            plumber = pdfplumber.open(plumber_file)
+                        fallback = plumber.pages[page_number - 1].extract_text() or ""
+                        if len(fallback.strip()) > len(text.strip()):
+                            text = fallback
+
+                    yield page_number, text
+        finally:
+            # pdfplumber leaves a file object it was handed open
+            if plumber is not None:
+                plumber.close()
+            if plumber_file is not None:
+                plumber_file.close()
+
+    @classmethod
+    def iter_pdf_pages_parallel(cls, source, workers=None, n_pages=None, parser="pypdf2"):
+        """
+        Same output as iter_pdf_pages, but the pages are split into ranges
+        and extracted by a pool of worker processes. Ranges come back in
+        page order.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = workers or cls.PARALLEL_PDF_WORKERS or os.cpu_count() or 1
+        n_pages = n_pages or cls.count_pdf_pages(source)
+
+        if workers < 2 or n_pages < 2:
+            yield from cls.iter_pdf_pages(source, parser=parser)
+            return
+
+        # Several small ranges per worker keep all cores busy until the end
+        step = max(1, math.ceil(n_pages / (workers * 4)))
+        ranges = [
+            (first, min(first + step - 1, n_pages))
+            for first in range(1, n_pages + 1, step)
+        ]
+
+        # Each worker receives the source once, not once per range
+        if isinstance(source, Path):
+            source = str(source)
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(ranges)),
+            initializer=_init_pdf_worker,
+            initargs=(source, parser)
+        ) as pool:
+            for pages in pool.map(_extract_pdf_range, ranges):
+                yield from pages
+
+    @classmethod
+    def load_pdf(cls, source, workers=None):
+        """
+        Load PDF (path or raw bytes) page by page with the extractor
+        picked by choose_pdf_strategy. Large PDFs are extracted
+        page-parallel.
+        """
+        from advanced_pdf_features import choose_pdf_strategy
+
+        strategy = choose_pdf_strategy(source)
+        n_pages = strategy['pages']
+
+        if cls.PARALLEL_PDF_MIN_PAGES and n_pages >= cls.PARALLEL_PDF_MIN_PAGES:
+            pages = cls.iter_pdf_pages_parallel(source, workers, n_pages, strategy['parser'])
+        else:
+            pages = cls.iter_pdf_pages(source, parser=strategy['parser'])
+
+        return "\n".join(text for _, text in pages)
     
     @staticmethod
-    def load_docx(filepath):
-        """Load Word document"""
-        doc = DocxDocument(filepath)
+    def load_docx(source):
+        """Load Word document (path or raw bytes)"""
+        from docx import Document as DocxDocument
+
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        doc = DocxDocument(source)
         return "\n".join([p.text for p in doc.paragraphs])
     
     @staticmethod
     def load_eml(filepath):
         """Load email file"""
+        import email
+        from email import policy
+
         with open(filepath, 'r', encoding='utf-8') as f:
             msg = email.message_from_file(f, policy=policy.default)
         
@@ -79,6 +250,7 @@ class UniversalDocumentLoader:
                     break
                 elif content_type == 'text/html' and not body:
                     html_content = part.get_content()
+                    import html2text
                     h = html2text.HTML2Text()
                     body = h.handle(html_content)
         else:
@@ -94,10 +266,23 @@ Date: {date}
 {body}"""
     
     @staticmethod
-    def load_csv(filepath):
+    def _decode_lines(f):
+        """
+        Lines of a binary file as text: UTF-8, or latin-1 for lines that
+        aren't (Windows-1252 exports). Works while streaming, unlike a
+        retry of the whole file.
+        """
+        for line in f:
+            try:
+                yield line.decode('utf-8')
+            except UnicodeDecodeError:
+                yield line.decode('latin-1')
+
+    @classmethod
+    def load_csv(cls, filepath):
         """Load CSV and convert to searchable text"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        with open(filepath, 'rb') as f:
+            reader = csv.DictReader(cls._decode_lines(f))
             headers = reader.fieldnames
             
             text_parts = [f"CSV Data from {Path(filepath).name}\n"]
@@ -110,9 +295,45 @@ Date: {date}
             
             return "\n".join(text_parts)
     
+    @classmethod
+    def iter_csv_blocks(cls, filepath, rows_per_chunk=None):
+        """
+        Stream a CSV in row batches
+
+        Each block is one self-describing chunk: the file name and
+        columns are repeated, and the row range goes into the metadata.
+        Blocks are marked keep_whole so the chunker never cuts a row.
+        """
+        rows_per_chunk = rows_per_chunk or cls.CSV_ROWS_PER_CHUNK
+        name = Path(filepath).name
+
+        with open(filepath, 'rb') as f:
+            reader = csv.DictReader(cls._decode_lines(f))
+            header = f"CSV Data from {name}\nColumns: {', '.join(reader.fieldnames or [])}\n\n"
+
+            rows = []
+            row_start = 1
+            for i, row in enumerate(reader, 1):
+                rows.append(f"Row {i}: " + ", ".join(f"{k}={v}" for k, v in row.items() if v))
+
+                if len(rows) == rows_per_chunk:
+                    yield header + "\n".join(rows), {
+                        'row_start': row_start, 'row_end': i, 'block_type': 'table', 'keep_whole': True
+                    }
+                    rows = []
+                    row_start = i + 1
+
+            if rows:
+                yield header + "\n".join(rows), {
+                    'row_start': row_start, 'row_end': row_start + len(rows) - 1,
+                    'block_type': 'table', 'keep_whole': True
+                }
+    
     @staticmethod
     def load_html(filepath):
         """Load HTML and extract text"""
+        from bs4 import BeautifulSoup
+
         with open(filepath, 'r', encoding='utf-8') as f:
             html_content = f.read()
         
@@ -138,28 +359,137 @@ Date: {date}
             raise FileNotFoundError(f"File not found: {filepath}")
         
         ext = filepath.suffix.lower()
-        
-        loaders = {
-            '.txt': cls.load_text,
-            '.md': cls.load_text,
-            '.pdf': cls.load_pdf,
-            '.docx': cls.load_docx,
-            '.eml': cls.load_eml,
-            '.csv': cls.load_csv,
-            '.html': cls.load_html,
-            '.htm': cls.load_html
-        }
-        
-        if ext in loaders:
-            content = loaders[ext](filepath)
-            return content, ext
-        else:
+        content = cls.get_loader(ext)(filepath)
+        return content, ext
+
+    @classmethod
+    def register_loader(cls, extensions, loader):
+        """
+        Add (or replace) the loader for one or more extensions
+
+        Register plugins at import time of your module, so worker
+        processes of the ingest pipeline see them too.
+
+        Args:
+            extensions: ".ext" or a list of extensions
+            loader: callable(filepath) -> text, or a "module:function"
+                    string imported on first use
+        """
+        if isinstance(extensions, str):
+            extensions = [extensions]
+
+        for ext in extensions:
+            ext = ext.lower()
+            if not ext.startswith('.'):
+                ext = f".{ext}"
+            if ext in cls.LOADERS:
+                # A replaced built-in loader takes over load_blocks too
+                cls.SEGMENTED_FORMATS.discard(ext)
+                cls.STREAMED_FORMATS.discard(ext)
+            cls.LOADERS[ext] = loader
+            cls._resolved_loaders.pop(ext, None)
+
+    @classmethod
+    def get_loader(cls, ext):
+        """Return the loader callable for an extension, importing it if needed"""
+        loader = cls._resolved_loaders.get(ext)
+        if loader is not None:
+            return loader
+
+        if ext not in cls.LOADERS:
             raise ValueError(f"Unsupported file type: {ext}")
+
+        loader = cls.LOADERS[ext]
+        if isinstance(loader, str):
+            module_name, _, attr_path = loader.partition(':')
+            loader = importlib.import_module(module_name)
+            for attr in attr_path.split('.'):
+                loader = getattr(loader, attr)
+
+        cls._resolved_loaders[ext] = loader
+        return loader
+    
+    @classmethod
+    def is_streamed(cls, filepath):
+        """True if the ingest process should read this file lazily via load_blocks"""
+        ext = Path(filepath).suffix.lower()
+        if ext in cls.STREAMED_FORMATS:
+            return True
+        return (
+            ext == '.pdf' and cls.LOADERS.get(ext) == cls.load_pdf
+            and bool(cls.STREAMED_PDF_MIN_PAGES)
+            and cls.count_pdf_pages(filepath) >= cls.STREAMED_PDF_MIN_PAGES
+        )
+
+    @classmethod
+    def load_blocks(cls, filepath, pdf_workers=None):
+        """
+        Like load(), but returns an iterator of (text, metadata) blocks
+        instead of one big string. PDFs stream one block per page with
+        the page number and chosen parser in the metadata, CSVs stream
+        row batches. HTML, Markdown and emails are split along their
+        structure (see segmenters.py) with the section path in the metadata.
+        Formats whose built-in loader was replaced come back as one block.
+
+        Args:
+            filepath: File to load
+            pdf_workers: Processes for page-parallel extraction of large
+                         PDFs (default: all cores, 1 = sequential). Callers
+                         that already run inside a process pool should pass
+                         only the cores they have to spare.
+        """
+        filepath = Path(filepath)
+        ext = filepath.suffix.lower()
+
+        if ext == '.csv' and cls.LOADERS.get(ext) == cls.load_csv:
+            if not filepath.exists():
+                raise FileNotFoundError(f"File not found: {filepath}")
+            return cls.iter_csv_blocks(filepath), ext
+
+        if ext == '.pdf' and cls.LOADERS.get(ext) == cls.load_pdf:
+            if not filepath.exists():
+                raise FileNotFoundError(f"File not found: {filepath}")
+            from advanced_pdf_features import choose_pdf_strategy
+
+            strategy = choose_pdf_strategy(filepath)
+            parser, n_pages = strategy['parser'], strategy['pages']
+            if cls.PARALLEL_PDF_MIN_PAGES and n_pages >= cls.PARALLEL_PDF_MIN_PAGES and pdf_workers != 1:
+                pages = cls.iter_pdf_pages_parallel(filepath, pdf_workers, n_pages, parser)
+            else:
+                pages = cls.iter_pdf_pages(filepath, parser=parser)
+            # The profiling pre-pass is timed so its cost shows up in stats
+            metadata = {'pdf_parser': parser, 'pdf_strategy_seconds': strategy['seconds']}
+            blocks = (
+                (text, {'page': page_number, **metadata})
+                for page_number, text in pages
+                if text.strip()
+            )
+            return blocks, ext
+
+        if ext in cls.SEGMENTED_FORMATS:
+            if not filepath.exists():
+                raise FileNotFoundError(f"File not found: {filepath}")
+            from segmenters import segment_file
+
+            return iter(segment_file(filepath)), ext
+
+        content, ext = cls.load(filepath)
+        return iter([(content, {})]), ext
     
     @classmethod
     def get_supported_formats(cls):
         """Return list of supported formats"""
-        return ['.txt', '.md', '.pdf', '.docx', '.eml', '.csv', '.html', '.htm']
+        return list(cls.LOADERS)
+
+
+# Built-in formats
+UniversalDocumentLoader.register_loader(['.txt', '.md'], UniversalDocumentLoader.load_text)
+UniversalDocumentLoader.register_loader('.pdf', UniversalDocumentLoader.load_pdf)
+UniversalDocumentLoader.register_loader('.docx', UniversalDocumentLoader.load_docx)
+UniversalDocumentLoader.register_loader('.eml', UniversalDocumentLoader.load_eml)
+UniversalDocumentLoader.register_loader('.csv', UniversalDocumentLoader.load_csv)
+UniversalDocumentLoader.register_loader(['.html', '.htm'], UniversalDocumentLoader.load_html)
+
 
 # Test
 if __name__ == "__main__":
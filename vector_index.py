@@ -0,0 +1,787 @@
+import os
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+# Set bits per byte (np.bitwise_count needs NumPy 2)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _append(array, used, rows):
+    """Write rows after the first `used` rows of array, growing it geometrically"""
+    needed = used + len(rows)
+    if array is None or needed > len(array) or isinstance(array, np.memmap):
+        capacity = len(array) if array is not None else 0
+        grown = np.empty((max(needed, 2 * capacity, 1024),) + rows.shape[1:], dtype=rows.dtype)
+        if used:
+            grown[:used] = array[:used]
+        array = grown
+    array[used:needed] = rows
+    return array
+
+
+class MatrixVectorIndex:
+    """
+    In-process vector index for small and medium corpora
+
+    All embeddings live L2-normalized in one contiguous float32 (or
+    float16) matrix, so a query - or a whole batch of queries - is one
+    matrix product plus an argpartition top-k. Metadata filters become
+    boolean row masks. On disk the matrix is a plain .npy that is
+    memory-mapped on load: no parsing, no copying until it is modified.
+
+    The index speaks the part of the Chroma collection API PAiKA uses
+    (add, upsert, query, get, update, delete, count), so it can stand in
+    for a collection in IngestPipeline, HybridSearchEngine and paika_v1.
+    Distances are cosine distances (1 - similarity), like a collection
+    created with hnsw:space=cosine.
+    """
+
+    # Rows upcast to float32 at a time when scoring float16 rows or codes
+    BLOCK_ROWS = 65536
+
+    def __init__(self, path=None, embedding_function=None, dtype="float32", name="paika"):
+        """
+        Args:
+            path: Folder to persist the index in (None = memory only)
+            embedding_function: callable(list[str]) -> embeddings, used
+                                for documents added without embeddings
+                                and for query_texts
+            dtype: "float32" or "float16" storage (half the memory, but
+                   NumPy has no float16 BLAS, so searches are slower)
+            name: Collection name (for code that prints it)
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype must be 'float32' or 'float16'")
+
+        self.path = Path(path) if path else None
+        self.embedding_function = embedding_function
+        self.dtype = np.dtype(dtype)
+        self.name = name
+
+        self._vectors = None        # (capacity, dim) array or read-only memmap
+        self._n = 0
+        self._ids = []
+        self._row = {}
+        self._documents = []
+        self._metadatas = []
+        self._columns = {}          # metadata field -> object array (filter cache)
+        self._dirty = False
+
+        if self.path is not None and (self.path / "records.json").exists():
+            self.load()
+
+    # ----- Persistence -----
+
+    def load(self):
+        with open(self.path / "records.json", 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        self._ids = records['ids']
+        self._documents = records['documents']
+        self._metadatas = records['metadatas']
+        self._row = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._n = len(self._ids)
+        self._columns = {}
+        self._load_rows()
+        self._dirty = False
+
+    def persist(self):
+        """Write the index if it changed (atomically: temp files + rename)"""
+        if self.path is None or not self._dirty:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._save_rows()
+
+        tmp_path = self.path / f"records.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'ids': self._ids,
+                'documents': self._documents,
+                'metadatas': self._metadatas
+            }, f)
+        os.replace(tmp_path, self.path / "records.json")
+        self._dirty = False
+
+    # ----- Row storage (QuantizedVectorIndex replaces these) -----
+
+    def _matrix(self):
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=self.dtype)
+        return self._vectors[:self._n]
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _load_rows(self):
+        vectors_path = self.path / "vectors.npy"
+        if self._n and vectors_path.exists():
+            self._vectors = np.load(vectors_path, mmap_mode='r')
+            self.dtype = self._vectors.dtype
+
+    def _save_rows(self):
+        vectors = self._matrix()
+        if isinstance(vectors, np.memmap):
+            vectors = np.array(vectors)
+        # Release the old mapping before replacing its file
+        self._vectors = vectors
+
+        tmp_path = self.path / f"vectors.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, vectors)
+        os.replace(tmp_path, self.path / "vectors.npy")
+
+    def _append_rows(self, vectors):
+        """Store normalized vectors as rows self._n, self._n + 1, ..."""
+        if self._vectors is not None and vectors.shape[1] != self._vectors.shape[1]:
+            raise ValueError(f"Embedding size {vectors.shape[1]} != index size {self._vectors.shape[1]}")
+        self._vectors = _append(self._vectors, self._n, vectors.astype(self.dtype))
+
+    def _set_rows(self, rows, vectors):
+        if isinstance(self._vectors, np.memmap):
+            self._vectors = np.array(self._vectors)
+        self._vectors[rows] = vectors
+
+    def _keep_rows(self, keep):
+        self._vectors = np.ascontiguousarray(self._matrix()[keep])
+
+    def _clear_rows(self):
+        self._vectors = None
+
+    def _full_rows(self, rows):
+        """float32 vectors of the given rows"""
+        return self._matrix()[rows].astype(np.float32)
+
+    def _embed(self, documents):
+        if self.embedding_function is None:
+            raise ValueError("No embeddings given and no embedding_function set")
+        return self.embedding_function(list(documents))
+
+    # ----- Collection API: writing -----
+
+    def add(self, ids, embeddings=None, documents=None, metadatas=None):
+        """Add new records (IDs that already exist are skipped, as in Chroma)"""
+        ids = list(ids)
+        keep, seen = [], set()
+        for i, chunk_id in enumerate(ids):
+            # Duplicate IDs within one call: the first wins
+            if chunk_id not in self._row and chunk_id not in seen:
+                seen.add(chunk_id)
+                keep.append(i)
+        if not keep:
+            return
+
+        if embeddings is None:
+            embeddings = self._embed([documents[i] for i in keep])
+        else:
+            embeddings = np.asarray(embeddings)[keep]
+
+        self._append_rows(self._normalize(embeddings))
+        self._n += len(keep)
+        for i in keep:
+            self._row[ids[i]] = len(self._ids)
+            self._ids.append(ids[i])
+            self._documents.append(documents[i] if documents is not None else None)
+            self._metadatas.append(metadatas[i] if metadatas is not None else None)
+        self._columns = {}
+        self._dirty = True
+
+    def update(self, ids, embeddings=None, documents=None, metadatas=None):
+        """Overwrite fields of existing records (unknown IDs are ignored)"""
+        positions = [(i, self._row[chunk_id]) for i, chunk_id in enumerate(ids) if chunk_id in self._row]
+        if not positions:
+            return
+
+        if embeddings is None and documents is not None:
+            embeddings = self._embed([documents[i] for i, _ in positions])
+            positions_embedded = positions
+        elif embeddings is not None:
+            embeddings = np.asarray(embeddings)[[i for i, _ in positions]]
+            positions_embedded = positions
+        else:
+            positions_embedded = []
+
+        if positions_embedded:
+            self._set_rows([row for _, row in positions_embedded], self._normalize(embeddings))
+
+        for i, row in positions:
+            if documents is not None:
+                self._documents[row] = documents[i]
+            if metadatas is not None:
+                self._metadatas[row] = metadatas[i]
+        self._columns = {}
+        self._dirty = True
+
+    def upsert(self, ids, embeddings=None, documents=None, metadatas=None):
+        """Update existing IDs and add the new ones"""
+        ids = list(ids)
+        existing = [i for i, chunk_id in enumerate(ids) if chunk_id in self._row]
+        new = [i for i, chunk_id in enumerate(ids) if chunk_id not in self._row]
+
+        def pick(values, idx):
+            if values is None:
+                return None
+            if isinstance(values, np.ndarray):
+                return values[idx]
+            return [values[i] for i in idx]
+
+        if existing:
+            self.update(
+                [ids[i] for i in existing], pick(embeddings, existing),
+                pick(documents, existing), pick(metadatas, existing)
+            )
+        if new:
+            self.add(
+                [ids[i] for i in new], pick(embeddings, new),
+                pick(documents, new), pick(metadatas, new)
+            )
+
+    def delete(self, ids=None, where=None):
+        rows = set()
+        if ids is not None:
+            rows.update(self._row[chunk_id] for chunk_id in ids if chunk_id in self._row)
+        if where is not None:
+            rows.update(np.flatnonzero(self._mask(where)).tolist())
+        if not rows:
+            return
+
+        keep = np.ones(self._n, dtype=bool)
+        keep[list(rows)] = False
+        self._keep_rows(keep)
+        self._n = int(keep.sum())
+        self._ids = [x for x, k in zip(self._ids, keep) if k]
+        self._documents = [x for x, k in zip(self._documents, keep) if k]
+        self._metadatas = [x for x, k in zip(self._metadatas, keep) if k]
+        self._row = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._columns = {}
+        self._dirty = True
+
+    def clear(self):
+        self._clear_rows()
+        self._n = 0
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._row, self._columns = {}, {}
+        self._dirty = True
+        self.persist()
+
+    def count(self):
+        return self._n
+
+    def get_stats(self):
+        matrix = self._matrix()
+        return {
+            'vectors': self._n,
+            'dtype': str(self.dtype),
+            'memory_mb': round(matrix.nbytes / (1024 * 1024), 2)
+        }
+
+    # ----- Metadata filters -----
+
+    def _column(self, field):
+        column = self._columns.get(field)
+        if column is None:
+            column = np.empty(self._n, dtype=object)
+            column[:] = [m.get(field) if m else None for m in self._metadatas]
+            self._columns[field] = column
+        return column
+
+    def _condition(self, field, condition):
+        column = self._column(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        mask = np.ones(self._n, dtype=bool)
+        for op, value in condition.items():
+            if op == "$eq":
+                mask &= column == value
+            elif op == "$ne":
+                mask &= column != value
+            elif op in ("$in", "$nin"):
+                values = set(value)
+                found = np.frompyfunc(lambda v: v in values, 1, 1)(column).astype(bool)
+                mask &= found if op == "$in" else ~found
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                compare = {
+                    "$gt": lambda v: v is not None and v > value,
+                    "$gte": lambda v: v is not None and v >= value,
+                    "$lt": lambda v: v is not None and v < value,
+                    "$lte": lambda v: v is not None and v <= value,
+                }[op]
+                mask &= np.frompyfunc(compare, 1, 1)(column).astype(bool)
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
+
+    def _mask(self, where):
+        """Chroma-style where filter -> boolean row mask"""
+        mask = np.ones(self._n, dtype=bool)
+        for key, value in where.items():
+            if key == "$and":
+                for clause in value:
+                    mask &= self._mask(clause)
+            elif key == "$or":
+                any_mask = np.zeros(self._n, dtype=bool)
+                for clause in value:
+                    any_mask |= self._mask(clause)
+                mask &= any_mask
+            else:
+                mask &= self._condition(key, value)
+        return mask
+
+    # ----- Search -----
+
+    def _scores(self, queries, rows=None):
+        """Cosine similarities of normalized queries to all (or some) rows"""
+        matrix = self._matrix() if rows is None else self._matrix()[rows]
+        if matrix.dtype == np.float32:
+            return queries @ matrix.T
+
+        # No BLAS for float16: upcast in blocks
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), self.BLOCK_ROWS):
+            block = matrix[start:start + self.BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def _search(self, queries, k, rows=None):
+        """Top-k over all rows, or over `rows` only (returns row numbers)"""
+        top, top_scores = self._top_k(self._scores(queries, rows), k)
+        return (top if rows is None else rows[top]), top_scores
+
+    @staticmethod
+    def _top_k(scores, k):
+        """Row-wise top-k of a (queries, candidates) score matrix, best first"""
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def search(self, query_embeddings, k=10, mask=None):
+        """
+        Raw top-k search
+
+        Args:
+            query_embeddings: (dim,) or (queries, dim) array
+            k: Results per query
+            mask: Optional boolean row mask (rows allowed to match)
+
+        Returns:
+            (rows, scores) - (queries, k) arrays of row numbers and cosine
+            similarities, best first
+        """
+        queries = self._normalize(query_embeddings)
+        if self._n == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        if mask is None:
+            return self._search(queries, k)
+
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        return self._search(queries, k, rows)
+
+    def query(self, query_embeddings=None, query_texts=None, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        """Chroma-style query: one result list per query"""
+        if query_embeddings is None:
+            query_embeddings = self._embed(query_texts)
+        mask = self._mask(where) if where else None
+        rows, scores = self.search(query_embeddings, n_results, mask)
+
+        results = {'ids': [[self._ids[r] for r in row_list] for row_list in rows.tolist()]}
+        if "distances" in include:
+            results['distances'] = (1.0 - scores).tolist()
+        if "documents" in include:
+            results['documents'] = [[self._documents[r] for r in row_list] for row_list in rows.tolist()]
+        if "metadatas" in include:
+            results['metadatas'] = [[self._metadatas[r] for r in row_list] for row_list in rows.tolist()]
+        return results
+
+    def get(self, ids=None, where=None, limit=None, offset=None,
+            include=("documents", "metadatas")):
+        """Chroma-style get by IDs and/or metadata filter"""
+        if ids is not None:
+            rows = [self._row[chunk_id] for chunk_id in ids if chunk_id in self._row]
+            if where is not None:
+                mask = self._mask(where)
+                rows = [r for r in rows if mask[r]]
+        elif where is not None:
+            rows = np.flatnonzero(self._mask(where)).tolist()
+        else:
+            rows = list(range(self._n))
+        rows = rows[offset or 0:]
+        if limit is not None:
+            rows = rows[:limit]
+
+        results = {'ids': [self._ids[r] for r in rows]}
+        if "documents" in include:
+            results['documents'] = [self._documents[r] for r in rows]
+        if "metadatas" in include:
+            results['metadatas'] = [self._metadatas[r] for r in rows]
+        if "embeddings" in include:
+            results['embeddings'] = self._full_rows(rows)
+        return results
+
+
+class QuantizedVectorIndex(MatrixVectorIndex):
+    """
+    MatrixVectorIndex that keeps only compact codes in memory
+
+    - "int8":   one signed byte per dimension plus a per-vector scale
+                (~4x smaller than float32)
+    - "binary": one sign bit per dimension, compared by Hamming distance
+                (32x smaller)
+
+    The codes give a fast approximate first pass. Its best `rescore`
+    candidates are then rescored exactly against the float32 vectors,
+    which stay on disk in a memory-mapped raw file, so only the
+    candidates' rows are ever read. benchmark() reports the recall@k
+    this costs against exact float32 search.
+    """
+
+    def __init__(self, path, embedding_function=None, quantization="int8", rescore=200, name="paika"):
+        """
+        Args:
+            path: Folder for the codes and the full-precision vectors
+            embedding_function: As for MatrixVectorIndex
+            quantization: "int8" or "binary"
+            rescore: First-pass candidates rescored at full precision
+                     (0 = return the approximate first pass)
+            name: Collection name
+        """
+        if path is None:
+            raise ValueError("QuantizedVectorIndex needs a path for its full-precision vectors")
+        if quantization not in ("int8", "binary"):
+            raise ValueError("quantization must be 'int8' or 'binary'")
+
+        self.quantization = quantization
+        self.rescore = rescore
+        self._codes = None          # (capacity, dim) int8 or (capacity, dim / 8) packed bits
+        self._scales = None         # (capacity,) float32, int8 only
+        self._file_rows = None      # (capacity,) row of each record in vectors.f32
+        self._file_count = 0        # rows written to vectors.f32 (live and dead)
+        self._dim = None
+        self._floats = None         # memmap of vectors.f32
+        super().__init__(path, embedding_function, "float32", name)
+
+    @property
+    def _float_path(self):
+        return self.path / "vectors.f32"
+
+    def _quantize(self, vectors):
+        if self.quantization == "binary":
+            return np.packbits(vectors > 0, axis=1), None
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _float_matrix(self):
+        if self._floats is None:
+            self._floats = np.memmap(
+                self._float_path, dtype=np.float32, mode='r', shape=(self._file_count, self._dim)
+            )
+        return self._floats
+
+    def _write_floats(self, vectors):
+        """Append full-precision rows to vectors.f32; returns their file rows"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self._float_path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        rows = np.arange(self._file_count, self._file_count + len(vectors))
+        self._file_count += len(vectors)
+        self._floats = None
+        return rows
+
+    # ----- Row storage -----
+
+    def _load_rows(self):
+        codes_path = self.path / "codes.npz"
+        if not codes_path.exists():
+            return
+        with np.load(codes_path) as data:
+            if str(data['quantization']) != self.quantization:
+                raise ValueError(f"{self.path} holds {data['quantization']} codes, not {self.quantization}")
+            self._codes = data['codes']
+            self._scales = data['scales'] if self.quantization == "int8" else None
+            self._file_rows = data['file_rows']
+            self._file_count = int(data['file_count'])
+            self._dim = int(data['dim'])
+        if not self._dim:
+            self._codes = self._scales = self._file_rows = self._dim = None
+            return
+
+        # Drop rows appended after the last persist (e.g. a crashed run)
+        row_bytes = self._dim * 4
+        if self._float_path.stat().st_size > self._file_count * row_bytes:
+            os.truncate(self._float_path, self._file_count * row_bytes)
+
+    def _save_rows(self):
+        n = self._n
+        # Compact once most of the file is replaced or deleted rows
+        if self._file_count > 2 * n:
+            tmp_path = self.path / f"vectors.{os.getpid()}.tmp.f32"
+            floats = self._float_matrix()
+            file_rows = self._file_rows[:n]
+            with open(tmp_path, 'wb') as f:
+                for start in range(0, n, self.BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(floats[file_rows[start:start + self.BLOCK_ROWS]]).tobytes())
+            self._floats = None
+            os.replace(tmp_path, self._float_path)
+            self._file_rows = np.arange(n)
+            self._file_count = n
+
+        tmp_path = self.path / f"codes.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            quantization=self.quantization,
+            codes=self._codes[:n] if self._codes is not None else np.zeros((0, 0), dtype=np.uint8),
+            scales=self._scales[:n] if self._scales is not None else np.zeros(0, dtype=np.float32),
+            file_rows=self._file_rows[:n] if self._file_rows is not None else np.zeros(0, dtype=np.int64),
+            file_count=self._file_count,
+            dim=self._dim or 0
+        )
+        os.replace(tmp_path, self.path / "codes.npz")
+
+    def _append_rows(self, vectors):
+        if self._dim is None:
+            self._dim = vectors.shape[1]
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(f"Embedding size {vectors.shape[1]} != index size {self._dim}")
+
+        codes, scales = self._quantize(vectors)
+        self._codes = _append(self._codes, self._n, codes)
+        if scales is not None:
+            self._scales = _append(self._scales, self._n, scales)
+        self._file_rows = _append(self._file_rows, self._n, self._write_floats(vectors))
+
+    def _set_rows(self, rows, vectors):
+        # vectors.f32 is append-only: new rows are written, the old ones
+        # are dropped when the file is compacted
+        codes, scales = self._quantize(vectors)
+        self._codes[rows] = codes
+        if scales is not None:
+            self._scales[rows] = scales
+        self._file_rows[rows] = self._write_floats(vectors)
+
+    def _keep_rows(self, keep):
+        n = self._n
+        self._codes = self._codes[:n][keep]
+        if self._scales is not None:
+            self._scales = self._scales[:n][keep]
+        self._file_rows = self._file_rows[:n][keep]
+
+    def _clear_rows(self):
+        self._codes = self._scales = self._file_rows = None
+        self._floats = None
+        self._file_count = 0
+        self._dim = None
+        if self._float_path.exists():
+            self._float_path.unlink()
+
+    def _full_rows(self, rows):
+        if self._dim is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self._float_matrix()[self._file_rows[rows]])
+
+    # ----- Search -----
+
+    def _code_scores(self, queries, rows=None):
+        """Approximate similarities from the codes (higher is better)"""
+        codes = self._codes[:self._n] if rows is None else self._codes[rows]
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+
+        if self.quantization == "binary":
+            query_bits = np.packbits(queries > 0, axis=1)
+            popcount = getattr(np, 'bitwise_count', None)
+            for start in range(0, len(codes), self.BLOCK_ROWS):
+                block = codes[start:start + self.BLOCK_ROWS]
+                for i, bits in enumerate(query_bits):
+                    differing = block ^ bits
+                    counts = popcount(differing) if popcount else _POPCOUNT[differing]
+                    # Fewer differing signs = more similar
+                    scores[i, start:start + len(block)] = -counts.sum(axis=1, dtype=np.int32)
+            return scores
+
+        scales = self._scales[:self._n] if rows is None else self._scales[rows]
+        for start in range(0, len(codes), self.BLOCK_ROWS):
+            block = codes[start:start + self.BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = (queries @ block.T) * scales[start:start + len(block)]
+        return scores
+
+    def _search(self, queries, k, rows=None):
+        first = self._code_scores(queries, rows)
+        if self.rescore <= 0:
+            top, top_scores = self._top_k(first, k)
+            return (top if rows is None else rows[top]), top_scores
+
+        candidates, _ = self._top_k(first, max(self.rescore, k))
+        if rows is not None:
+            candidates = rows[candidates]
+
+        # Read each candidate's float32 row once, even if several queries share it
+        unique, inverse = np.unique(candidates, return_inverse=True)
+        vectors = self._full_rows(unique)[inverse.reshape(candidates.shape)]
+        exact = np.einsum('qcd,qd->qc', vectors, queries)
+
+        top, top_scores = self._top_k(exact, k)
+        return np.take_along_axis(candidates, top, axis=1), top_scores
+
+    def get_stats(self):
+        hot = sum(a[:self._n].nbytes for a in (self._codes, self._scales, self._file_rows) if a is not None)
+        disk = self._float_path.stat().st_size if self._float_path.exists() else 0
+        return {
+            'vectors': self._n,
+            'quantization': self.quantization,
+            'rescore': self.rescore,
+            'memory_mb': round(hot / (1024 * 1024), 2),
+            'disk_mb': round(disk / (1024 * 1024), 2)
+        }
+
+
+def benchmark(vectors, queries, k=10, rescore=(0, 50, 200), folder=None):
+    """
+    Recall@k of the quantized indexes against exact float32 search
+
+    Args:
+        vectors: (n, dim) corpus embeddings
+        queries: (q, dim) query embeddings
+        k: Results per query
+        rescore: Candidate counts to try (0 = first pass only)
+        folder: Where to build the test indexes (default: a temp folder)
+
+    Returns:
+        List of {'index', 'rescore', 'recall', 'ms_per_query', 'memory_mb'}
+    """
+    import time
+    import tempfile
+
+    exact = MatrixVectorIndex()
+    ids = [str(i) for i in range(len(vectors))]
+    exact.add(ids=ids, embeddings=vectors)
+    truth, _ = exact.search(queries, k)
+
+    def timed(index):
+        index.search(queries[:1], k)
+        start = time.perf_counter()
+        rows, _ = index.search(queries, k)
+        return rows, 1000 * (time.perf_counter() - start) / len(queries)
+
+    _, ms = timed(exact)
+    results = [{
+        'index': 'float32', 'rescore': None, 'recall': 1.0,
+        'ms_per_query': ms, 'memory_mb': exact.get_stats()['memory_mb']
+    }]
+
+    with tempfile.TemporaryDirectory(dir=folder) as tmp:
+        for quantization in ("int8", "binary"):
+            index = QuantizedVectorIndex(Path(tmp) / quantization, quantization=quantization)
+            index.add(ids=ids, embeddings=vectors)
+            index.persist()
+            for candidates in rescore:
+                index.rescore = candidates
+                rows, ms = timed(index)
+                hits = sum(len(set(found) & set(expected)) for found, expected in zip(rows.tolist(), truth.tolist()))
+                results.append({
+                    'index': quantization, 'rescore': candidates,
+                    'recall': hits / truth.size, 'ms_per_query': ms,
+                    'memory_mb': index.get_stats()['memory_mb']
+                })
+            index._floats = None
+    return results
+
+
+# Test
+if __name__ == "__main__":
+    import sys
+    import time
+    import tempfile
+
+    print("=" * 60)
+    print("NUMPY MATRIX VECTOR INDEX TEST")
+    print("=" * 60 + "\n")
+
+    rng = np.random.RandomState(0)
+    n, dim = 100_000, 384
+    vectors = rng.randn(n, dim).astype(np.float32)
+    file_types = np.array(["pdf", "txt", "eml", "csv"])[rng.randint(0, 4, n)]
+
+    for dtype in ("float32", "float16"):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = MatrixVectorIndex(tmp, dtype=dtype)
+            start = time.time()
+            for i in range(0, n, 10_000):
+                index.add(
+                    ids=[f"c{j}" for j in range(i, i + 10_000)],
+                    embeddings=vectors[i:i + 10_000],
+                    metadatas=[{"file_type": t} for t in file_types[i:i + 10_000]]
+                )
+            index.persist()
+            print(f"📦 {dtype}: {n} vectors indexed + saved in {time.time() - start:.2f}s")
+
+            start = time.time()
+            index = MatrixVectorIndex(tmp)
+            print(f"   Reopened (memory-mapped) in {(time.time() - start) * 1000:.1f}ms")
+
+            queries = rng.randn(32, dim).astype(np.float32)
+            index.search(queries[0], k=5)      # warm up the page cache
+
+            timings = []
+            for q in queries:
+                start = time.perf_counter()
+                index.search(q, k=5)
+                timings.append(time.perf_counter() - start)
+            print(f"   Single query:  {1000 * np.median(timings):.2f}ms (median)")
+
+            start = time.perf_counter()
+            rows, _ = index.search(queries, k=5)
+            print(f"   32 queries batched: {1000 * (time.perf_counter() - start) / 32:.2f}ms per query")
+
+            start = time.perf_counter()
+            result = index.query(query_embeddings=queries[:1], n_results=5, where={"file_type": "pdf"})
+            print(f"   Filtered (file_type=pdf): {(time.perf_counter() - start) * 1000:.2f}ms, "
+                  f"{len(result['ids'][0])} results\n")
+
+            # Same top-5 as brute force
+            expected = np.argsort(-(vectors / np.linalg.norm(vectors, axis=1, keepdims=True)) @ (queries[0] / np.linalg.norm(queries[0])))[:5]
+            print(f"   Top-5 matches brute force: {set(rows[0].tolist()) == set(expected.tolist())}\n")
+
+    print("=" * 60)
+    print("QUANTIZED INDEX RECALL BENCHMARK")
+    print("=" * 60 + "\n")
+
+    if len(sys.argv) > 1:
+        # Real embeddings: chunks of the given files, 100 held out as queries
+        from chunking import StreamingChunker
+        from universal_loader import UniversalDocumentLoader
+        from embeddings import get_embedding_function
+
+        texts = []
+        for path in sys.argv[1:]:
+            blocks, _ = UniversalDocumentLoader.load_blocks(path)
+            texts += [chunk for chunk, _ in StreamingChunker(500, 50).chunk_blocks(blocks)]
+        embedded = get_embedding_function().encode(texts)
+        corpus, queries = embedded[100:], embedded[:100]
+    else:
+        # Clustered vectors resemble real embeddings better than pure noise
+        centers = rng.randn(1000, dim)
+        corpus = centers[rng.randint(0, 1000, 100_000)] + 0.8 * rng.randn(100_000, dim)
+        queries = centers[rng.randint(0, 1000, 100)] + 0.8 * rng.randn(100, dim)
+
+    print(f"📊 {len(corpus)} vectors, {len(queries)} queries, recall@10 vs exact float32\n")
+    print(f"   {'index':<8} {'rescore':>8} {'recall':>8} {'ms/query':>9} {'memory MB':>10}")
+    for result in benchmark(corpus.astype(np.float32), queries.astype(np.float32), k=10):
+        rescore = "-" if result['rescore'] is None else result['rescore']
+        print(f"   {result['index']:<8} {rescore:>8} {result['recall']:>8.3f} "
+              f"{result['ms_per_query']:>9.2f} {result['memory_mb']:>10.1f}")